@@ -0,0 +1,6 @@
+"""Headless entry point, e.g. for cron: python batch.py autofill --recursive ~/Music"""
+
+from src.batchCli import main
+
+if __name__ == "__main__":
+    raise SystemExit(main())
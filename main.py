@@ -1,16 +1,46 @@
-import sys
+import argparse
 import threading
 
+from src.batchCli import main as batch_main
+from src.tagModifier import TAG_PADDING_RESERVE
 from src.urwid_components.mainLoop import MainLoopManager
 
 
 def main():
-    if len(sys.argv) <= 1:
-        raise Warning("Provide a valid dir")
-    else:
-        dir = sys.argv[1]
+    parser = argparse.ArgumentParser(description="Browse and edit the tags of a folder of MP3s.")
+    parser.add_argument(
+        "dirs",
+        nargs="+",
+        metavar="dir",
+        help="music directory; pass several to list them together (the first is the working dir)",
+    )
+    parser.add_argument(
+        "-r",
+        "--recursive",
+        action="store_true",
+        help="also list songs in subdirectories, scanned in the background",
+    )
+    parser.add_argument(
+        "--repad",
+        action="store_true",
+        help="rewrite each song once with generous tag padding so later edits are in place, "
+        "then exit (same as batch.py repad)",
+    )
+    parser.add_argument(
+        "--padding-kib",
+        type=int,
+        default=TAG_PADDING_RESERVE // 1024,
+        help="tag padding to reserve with --repad (default: %(default)s KiB)",
+    )
+    args = parser.parse_args()
 
-    main_loop_manager = MainLoopManager(dir)
+    if args.repad:
+        argv = ["repad", "--padding-kib", str(args.padding_kib), *args.dirs]
+        if args.recursive:
+            argv.append("--recursive")
+        raise SystemExit(batch_main(argv))
+
+    main_loop_manager = MainLoopManager(args.dirs, recursive=args.recursive)
     main_loop_manager.start()
 
     for th in threading.enumerate():
@@ -1,15 +1,25 @@
 from __future__ import annotations
 
-import hashlib
+import json
 import os
 import pickle
+import sqlite3
+import threading
+import zlib
 from dataclasses import dataclass
 from pathlib import Path
 
+from src.ansiParser import ansi_attr_parser, half_block_attr_parser
+from src.coverRenderer import COLORS_256, CoverRuns
 from src.logging_config import setup_logging
 
 logger = setup_logging(__name__)
 
+SCHEMA_VERSION = 1
+
+# Renderings are very repetitive JSON; level 6 shrinks a cover 4-10x at little cost.
+COMPRESSION_LEVEL = 6
+
 
 @dataclass
 class CacheStats:
@@ -22,15 +32,42 @@ class CacheStats:
     disk_size_mb: float
 
 
+class _PlainUnpickler(pickle.Unpickler):
+    """Unpickler for the old cache files that refuses to import anything, so a tampered
+    file can't run code: renderings were only ever strings and lists."""
+
+    def find_class(self, module, name):
+        raise pickle.UnpicklingError(f"Refusing to load {module}.{name}")
+
+
+def _encode(ascii_art: CoverRuns) -> bytes:
+    return zlib.compress(json.dumps(ascii_art).encode("utf-8"), COMPRESSION_LEVEL)
+
+
+def _decode(data: bytes) -> CoverRuns:
+    value = json.loads(zlib.decompress(data))
+    if isinstance(value, list):
+        # JSON has no tuples; give back the (fg, bg), text pairs that were stored.
+        return [(tuple(attr), text) for attr, text in value]
+    return value
+
+
 class AlbumArtCache:
-    """Two-tier cache (memory + disk) for album art to avoid regenerating ASCII art."""
+    """Two-tier cache (memory + disk) for rendered album art, so covers aren't decoded
+    and rendered again.
+
+    Entries are keyed by the cover's content hash, so every track of an album that
+    embeds the same image shares one rendering. On disk they are zlib-compressed rows
+    of a single SQLite database, whose entry count and total size are kept up to date
+    by triggers, so stats never have to scan the cache.
+    """
 
     def __init__(
         self,
         cache_dir: str | Path | None = None,
         max_memory_cache_size: int = 50,
     ):
-        self._memory_cache: dict[str, str] = {}
+        self._memory_cache: dict[str, CoverRuns] = {}
         self._cache_access_order: list[str] = []
         self.max_memory_cache_size = max_memory_cache_size
 
@@ -41,21 +78,103 @@ class AlbumArtCache:
             self.cache_dir = Path(cache_dir)
 
         self.cache_dir.mkdir(parents=True, exist_ok=True)
-        logger.info(f"Album art cache directory: {self.cache_dir}")
+        self.db_path = self.cache_dir / "album_art.sqlite3"
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._create_schema()
+        self._migrate_pickles()
+        logger.info(f"Album art cache database: {self.db_path}")
         logger.info(f"Memory cache max size: {self.max_memory_cache_size}")
 
-    def _get_cache_key(
-        self,
-        file_path: str,
-        image_data: bytes,
-        album_art_size: tuple[int, int],
-    ) -> str:
-        """Generate a unique cache key based on file path and image data hash."""
+    def _create_schema(self) -> None:
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
 
-        image_hash = hashlib.md5(image_data).hexdigest()
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            if version != SCHEMA_VERSION:
+                self._conn.execute("DROP TABLE IF EXISTS renders")
+                self._conn.execute("DROP TABLE IF EXISTS totals")
+                self._conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+            self._conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS renders (
+                    key TEXT PRIMARY KEY,
+                    data BLOB NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS totals (
+                    id INTEGER PRIMARY KEY CHECK (id = 0),
+                    items INTEGER NOT NULL,
+                    bytes INTEGER NOT NULL
+                );
+                INSERT OR IGNORE INTO totals VALUES (0, 0, 0);
+                CREATE TRIGGER IF NOT EXISTS renders_insert AFTER INSERT ON renders BEGIN
+                    UPDATE totals SET items = items + 1, bytes = bytes + length(NEW.data);
+                END;
+                CREATE TRIGGER IF NOT EXISTS renders_update AFTER UPDATE ON renders BEGIN
+                    UPDATE totals SET bytes = bytes - length(OLD.data) + length(NEW.data);
+                END;
+                CREATE TRIGGER IF NOT EXISTS renders_delete AFTER DELETE ON renders BEGIN
+                    UPDATE totals SET items = items - 1, bytes = bytes - length(OLD.data);
+                END;
+                """
+            )
+            self._conn.commit()
 
-        path_hash = hashlib.md5(file_path.encode()).hexdigest()
-        return f"{path_hash}_{image_hash}_{album_art_size}.pkl"
+    def _migrate_pickles(self) -> None:
+        """Move renderings left as one .pkl file each by earlier versions into the
+        database, then delete the files.
+
+        Files named <hash>_<size>_<colors> already hold color runs. Files named
+        <hash>_<size> hold the ANSI text climage produced at 256 colors, which is parsed
+        into runs on the way. Anything else is from before covers were keyed by content
+        and is dropped.
+        """
+        pkl_files = list(self.cache_dir.glob("*.pkl"))
+        if not pkl_files:
+            return
+
+        rows = []
+        for cache_file in pkl_files:
+            parts = cache_file.stem.split("_")
+            # Content hashes are sha256; the older path-keyed files start with an md5.
+            if len(parts) not in (2, 3) or len(parts[0]) != 64:
+                continue
+            try:
+                with open(cache_file, "rb") as f:
+                    value = _PlainUnpickler(f).load()
+            except Exception as e:
+                logger.warning(f"Skipping unreadable album art cache file {cache_file}: {e}")
+                continue
+            if len(parts) == 2 and isinstance(value, str):
+                runs = half_block_attr_parser(value)
+                value = runs if runs is not None else ansi_attr_parser(value)
+                parts.append(str(COLORS_256))
+            elif not isinstance(value, list):
+                continue
+            rows.append(("_".join(parts), _encode(value)))
+
+        try:
+            with self._lock:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO renders (key, data) VALUES (?, ?)", rows
+                )
+                self._conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Error migrating album art cache: {e}")
+            return
+
+        for cache_file in pkl_files:
+            cache_file.unlink(missing_ok=True)
+        logger.info(f"Migrated {len(rows)} of {len(pkl_files)} album art cache files")
+
+    def _get_cache_key(
+        self, image_hash: str, album_art_size: tuple[int, int], colors: int = COLORS_256
+    ) -> str:
+        """Generate a cache key from the cover's content hash, the rendered size and the
+        color depth."""
+        return f"{image_hash}_{album_art_size}_{colors}"
 
     def _update_lru(self, cache_key: str) -> None:
         """Update LRU tracking for a cache key."""
@@ -70,26 +189,25 @@ class AlbumArtCache:
                 logger.debug(f"Evicted from memory cache: {oldest_key}")
 
     def get(
-        self,
-        file_path: str,
-        image_data: bytes,
-        album_art_size: tuple[int, int],
-    ) -> str | None:
-        """Get cached ASCII art for a file path and image data.
+        self, image_hash: str, album_art_size: tuple[int, int], colors: int = COLORS_256
+    ) -> CoverRuns | None:
+        """Get a cached rendering of a cover (see coverStore.cover_hash).
         Checks memory cache first, then disk cache."""
         try:
-            cache_key = self._get_cache_key(file_path, image_data, album_art_size)
+            cache_key = self._get_cache_key(image_hash, album_art_size, colors)
 
             if cache_key in self._memory_cache:
-                logger.debug(f"Memory cache hit for: {file_path}")
+                logger.debug(f"Memory cache hit for: {image_hash}")
                 self._update_lru(cache_key)
                 return self._memory_cache[cache_key]
 
-            cache_file = self.cache_dir / cache_key
-            if cache_file.exists():
-                logger.debug(f"Disk cache hit for: {file_path}")
-                with open(cache_file, "rb") as f:
-                    ascii_art = pickle.load(f)
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT data FROM renders WHERE key = ?", (cache_key,)
+                ).fetchone()
+            if row is not None:
+                logger.debug(f"Disk cache hit for: {image_hash}")
+                ascii_art = _decode(row[0])
 
                 self._memory_cache[cache_key] = ascii_art
                 self._update_lru(cache_key)
@@ -97,7 +215,7 @@ class AlbumArtCache:
 
                 return ascii_art
             else:
-                logger.debug(f"Cache miss for: {file_path}")
+                logger.debug(f"Cache miss for: {image_hash}")
                 return None
         except Exception as e:
             logger.error(f"Error reading from cache: {e}")
@@ -105,25 +223,30 @@ class AlbumArtCache:
 
     def set(
         self,
-        file_path: str,
-        image_data: bytes,
-        ascii_art: str,
+        image_hash: str,
+        ascii_art: CoverRuns,
         album_art_size: tuple[int, int],
+        colors: int = COLORS_256,
     ) -> None:
-        """Cache ASCII art for a file path and image data.
+        """Cache the rendering of a cover.
         Stores in both memory and disk cache."""
         try:
-            cache_key = self._get_cache_key(file_path, image_data, album_art_size)
+            cache_key = self._get_cache_key(image_hash, album_art_size, colors)
 
             self._memory_cache[cache_key] = ascii_art
             self._update_lru(cache_key)
             logger.debug(f"Stored in memory cache (size: {len(self._memory_cache)})")
 
-            cache_file = self.cache_dir / cache_key
-            with open(cache_file, "wb") as f:
-                pickle.dump(ascii_art, f)
+            data = _encode(ascii_art)
+            with self._lock:
+                self._conn.execute(
+                    "INSERT INTO renders (key, data) VALUES (?, ?) "
+                    "ON CONFLICT (key) DO UPDATE SET data = excluded.data",
+                    (cache_key, data),
+                )
+                self._conn.commit()
 
-            logger.debug(f"Stored in disk cache: {cache_file}")
+            logger.debug(f"Stored in disk cache: {cache_key} ({len(data)} bytes)")
         except Exception as e:
             logger.error(f"Error writing to cache: {e}")
 
@@ -139,17 +262,23 @@ class AlbumArtCache:
             logger.info("Memory cache cleared")
 
             if clear_disk:
-                for cache_file in self.cache_dir.glob("*.pkl"):
-                    cache_file.unlink()
+                with self._lock:
+                    self._conn.execute("DELETE FROM renders")
+                    self._conn.commit()
+                    self._conn.execute("VACUUM")
                 logger.info("Disk cache cleared")
         except Exception as e:
             logger.error(f"Error clearing cache: {e}")
 
+    def _disk_totals(self) -> tuple[int, int]:
+        """(entries, bytes of compressed renderings) on disk."""
+        with self._lock:
+            return self._conn.execute("SELECT items, bytes FROM totals").fetchone()
+
     def get_cache_size(self) -> int:
         """Get the total size of the disk cache in bytes."""
         try:
-            total_size = sum(f.stat().st_size for f in self.cache_dir.glob("*.pkl"))
-            return total_size
+            return self._disk_totals()[1]
         except Exception as e:
             logger.error(f"Error calculating cache size: {e}")
             return 0
@@ -157,13 +286,12 @@ class AlbumArtCache:
     def get_cache_stats(self) -> CacheStats:
         """Get statistics about the cache."""
         try:
-            disk_files = list(self.cache_dir.glob("*.pkl"))
-            disk_size = sum(f.stat().st_size for f in disk_files)
+            disk_items, disk_size = self._disk_totals()
 
             return CacheStats(
                 memory_items=len(self._memory_cache),
                 memory_max=self.max_memory_cache_size,
-                disk_items=len(disk_files),
+                disk_items=disk_items,
                 disk_size_bytes=disk_size,
                 disk_size_mb=disk_size / (1024 * 1024),
             )
@@ -176,3 +304,7 @@ class AlbumArtCache:
                 disk_size_bytes=0,
                 disk_size_mb=0.0,
             )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import os
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from difflib import SequenceMatcher
+
+# Smallest group of files worth resolving as an album; smaller ones are looked up per
+# track, which costs no more requests.
+MIN_ALBUM_TRACKS = 3
+
+# How well a file has to match a release track (title similarity, plus a bonus when the
+# track numbers agree) to be tagged from it.
+MATCH_THRESHOLD = 0.6
+TRACK_NUMBER_BONUS = 0.25
+
+_REGEX_LEADING_NUMBER = re.compile(r"^\s*(?:\d{1,2}-)?(\d{1,3})(?!\d)")
+_REGEX_NON_WORD = re.compile(r"[^\w]+")
+
+
+@dataclass
+class ReleaseTrack:
+    # Position on the release, counted across all its discs.
+    number: int
+    title: str
+    artist: str | None = None
+
+
+@dataclass
+class Release:
+    """A MusicBrainz release with its tracklist, as returned by a release lookup."""
+
+    id: str
+    title: str
+    artist: str | None
+    tracks: list[ReleaseTrack]
+    cover_urls: tuple[str, ...] = ()
+
+    def track_number(self, track: ReleaseTrack) -> str:
+        """TRCK value for a track, e.g. "3/12"."""
+        return f"{track.number}/{len(self.tracks)}"
+
+
+@dataclass
+class AlbumMember:
+    path: str
+    title: str = ""
+    track_number: int | None = None
+
+
+@dataclass
+class AlbumGroup:
+    """Files that look like one album: same directory and same album tag."""
+
+    directory: str
+    album: str
+    artist: str
+    members: list[AlbumMember] = field(default_factory=list)
+
+    @property
+    def query_album(self) -> str:
+        """The album to search for: the shared tag, else the folder name."""
+        return self.album or os.path.basename(os.path.normpath(self.directory))
+
+
+def parse_track_number(value: str | None, path: str = "") -> int | None:
+    """Track number from a TRCK value ("3" or "3/12"), else from a leading number in
+    the file name ("03 - Song.mp3", "1-03 Song.mp3")."""
+    for text in (value, os.path.basename(path)):
+        if text:
+            match = _REGEX_LEADING_NUMBER.match(text)
+            if match and int(match.group(1)) > 0:
+                return int(match.group(1))
+    return None
+
+
+def group_albums(
+    tracks: list[tuple[AlbumMember, str, str]], min_tracks: int = MIN_ALBUM_TRACKS
+) -> tuple[list[AlbumGroup], list[str]]:
+    """Group tracks by directory and album tag.
+
+    Args:
+        tracks: (member, album tag, artist tag) for each file
+        min_tracks: Smallest group resolved as an album
+
+    Returns:
+        (groups, singles): the album groups, and the paths left to per-track lookups
+    """
+    groups: dict[tuple[str, str], AlbumGroup] = {}
+    artists: dict[tuple[str, str], Counter] = {}
+    for member, album, artist in tracks:
+        directory = os.path.dirname(os.path.abspath(member.path))
+        key = directory, album.strip().casefold()
+        group = groups.setdefault(key, AlbumGroup(directory, album.strip(), ""))
+        group.members.append(member)
+        if artist:
+            artists.setdefault(key, Counter())[artist] += 1
+
+    albums, singles = [], []
+    for key, group in groups.items():
+        if len(group.members) < min_tracks:
+            singles.extend(member.path for member in group.members)
+            continue
+        if key in artists:
+            group.artist = artists[key].most_common(1)[0][0]
+        albums.append(group)
+    return albums, singles
+
+
+def _normalise(text: str) -> str:
+    return " ".join(_REGEX_NON_WORD.sub(" ", text.casefold()).split())
+
+
+def _member_name(member: AlbumMember) -> str:
+    """The file's title tag, else its file name without extension and track number."""
+    if member.title:
+        return _normalise(member.title)
+    stem = os.path.splitext(os.path.basename(member.path))[0]
+    return _normalise(_REGEX_LEADING_NUMBER.sub("", stem))
+
+
+def _score(member: AlbumMember, track: ReleaseTrack) -> float:
+    name = _member_name(member)
+    number_matches = member.track_number == track.number
+    if not name:
+        return 1.0 if number_matches else 0.0
+
+    title = _normalise(track.title)
+    if len(title) > 2 and title in name:
+        similarity = 1.0
+    else:
+        similarity = SequenceMatcher(None, name, title).ratio()
+    return similarity + (TRACK_NUMBER_BONUS if number_matches else 0.0)
+
+
+def match_tracks(
+    release: Release, members: list[AlbumMember], threshold: float = MATCH_THRESHOLD
+) -> dict[str, ReleaseTrack]:
+    """Pair files with the release's tracks, best matches first, each track used once.
+
+    Returns:
+        dict: path -> ReleaseTrack for every file that matched well enough
+    """
+    candidates = sorted(
+        (
+            (_score(member, track), i, j)
+            for i, member in enumerate(members)
+            for j, track in enumerate(release.tracks)
+        ),
+        reverse=True,
+    )
+
+    matches: dict[str, ReleaseTrack] = {}
+    used: set[int] = set()
+    for score, i, j in candidates:
+        if score < threshold:
+            break
+        path = members[i].path
+        if path in matches or j in used:
+            continue
+        matches[path] = release.tracks[j]
+        used.add(j)
+    return matches
@@ -6,6 +6,13 @@ import re
 # style-> 48 -> 5 -> {ID}m	Set background color where {ID} is a number between 0 and 255.
 
 ANSI_ESCAPE_PATTERN = re.compile(r"(\x1b\[[0-9;]*[a-zA-Z])")
+# climage's half-block output: each cell sets a 256-color background and foreground
+# (top and bottom pixel) before its glyph, and each row ends with a reset. A run of
+# identical cells matches as one, through the backreference.
+HALF_BLOCK_RUN_PATTERN = re.compile(
+    r"(\x1b\[48;5;(\d+)m\x1b\[38;5;(\d+)m([^\x1b]))\1*|\x1b\[0m([^\x1b]*)"
+)
+HALF_BLOCK_TEXT_PATTERN = re.compile(r"(?:\x1b\[48;5;\d+m\x1b\[38;5;\d+m[^\x1b]|\x1b\[0m[^\x1b]*)+")
 ANSI_SYMBOL = "\x1b"
 
 ANSI_ESCAPE_CODES_REVERSE = 20
@@ -178,9 +185,30 @@ def ansi_attr_parser(text: str) -> list[tuple[str, str]]:
     return attr_list
 
 
+def half_block_attr_parser(text: str) -> list[tuple[tuple[str, str], str]] | None:
+    """Fast path of ansi_attr_parser for climage's half-block output.
+
+    The regex engine does the work: every run of same-colored cells is one match, so a
+    cover comes back as one segment per color change rather than one per cell, in well
+    under the time ansi_attr_parser takes. Returns None for text that isn't climage
+    output, which the general parser then handles.
+    """
+    if not text or not HALF_BLOCK_TEXT_PATTERN.fullmatch(text):
+        return None
+
+    attr_list = []
+    for match in HALF_BLOCK_RUN_PATTERN.finditer(text):
+        cell, bg, fg, glyph, plain = match.groups()
+        if cell:
+            cells = (match.end() - match.start()) // len(cell)
+            attr_list.append(((f"h{fg}", f"h{bg}"), glyph * cells))
+        elif plain:
+            attr_list.append(((None, None), plain))
+    return attr_list
+
+
 def _test_parse_album_art_from_cache():
     """Read one album art from AlbumArtCache and parse with ansi_attr_parser."""
-    import pickle
 
     try:
         from albumArtCache import AlbumArtCache
@@ -189,18 +217,17 @@ def _test_parse_album_art_from_cache():
 
     cache = AlbumArtCache()
     album_art_size = (80, 40)
-    # Try to get one from disk, or seed and get
-    pkl_files = list(cache.cache_dir.glob("*.pkl"))
-    if not pkl_files:
+    ascii_art = cache.get("__test_album_art__", album_art_size)
+    if ascii_art is None:
         sample_ascii = "\x1b[31m#\x1b[0m\x1b[32m@\x1b[0m"
-        cache.set("__test_album_art__", b"dummy", sample_ascii, album_art_size)
-        ascii_art = cache.get("__test_album_art__", b"dummy", album_art_size)
-    else:
-        with open(pkl_files[0], "rb") as f:
-            ascii_art = pickle.load(f)
+        cache.set("__test_album_art__", sample_ascii, album_art_size)
+        ascii_art = cache.get("__test_album_art__", album_art_size)
     if ascii_art is None:
         print("ansiParser cache test: no album art from cache, skip")
         return
+    if not isinstance(ascii_art, str):
+        print("ansiParser cache test: cached album art is already parsed, skip")
+        return
     try:
         print(ascii_art)
         debug_ansi_sequences(ascii_art)
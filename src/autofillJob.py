@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from pathlib import Path
+
+from src.logging_config import setup_logging
+from src.lookupCache import NOT_FOUND_TTL
+from src.lookupEngine import FillProgress, JobControl, LookupEngine
+from src.tagIndex import StatSignature
+
+logger = setup_logging(__name__)
+
+# Outcomes that need no more work for as long as the file stays unchanged.
+DONE_OUTCOMES = ("updated", "skipped", "not_found")
+
+# The journal is rewritten with one line per file once it holds this many times more.
+COMPACT_RATIO = 4
+
+_journal = None
+_journal_lock = threading.Lock()
+
+
+@dataclass
+class JournalEntry:
+    outcome: str
+    signature: StatSignature | None
+    recorded_at: float
+    error: str | None = None
+
+
+class JobJournal:
+    """Append-only JSONL checkpoint of the last auto-fill outcome of each file.
+
+    A line is appended and flushed as each file finishes, so after a crash, a dropped
+    connection or a cancel the next run knows what is left. A file only counts as done
+    while it still has the stat signature recorded with it, and a not-found result goes
+    stale after NOT_FOUND_TTL, like its lookup cache entry.
+    """
+
+    def __init__(
+        self, journal_path: str | Path | None = None, clock: Callable[[], float] = time.time
+    ):
+        if journal_path is None:
+            cache_home = os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache"))
+            self.journal_path = Path(cache_home) / "metadata_editor" / "autofill_journal.jsonl"
+        else:
+            self.journal_path = Path(journal_path)
+
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: dict[str, JournalEntry] = {}
+        self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+        lines = self._load()
+        if lines > COMPACT_RATIO * max(1, len(self._entries)):
+            self._compact()
+        self._file = open(self.journal_path, "a", encoding="utf-8")
+        logger.info(f"Auto-fill journal: {self.journal_path}")
+
+    def _load(self) -> int:
+        lines = 0
+        try:
+            with open(self.journal_path, encoding="utf-8") as f:
+                for line in f:
+                    lines += 1
+                    try:
+                        record = json.loads(line)
+                        signature = record["signature"]
+                        self._entries[record["path"]] = JournalEntry(
+                            record["outcome"],
+                            StatSignature(*signature) if signature else None,
+                            record["at"],
+                            record.get("error"),
+                        )
+                    except (ValueError, KeyError, TypeError):
+                        # A line torn by a crash mid-write; that file just runs again.
+                        continue
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.error(f"Error reading auto-fill journal: {e}")
+        return lines
+
+    @staticmethod
+    def _line(path: str, entry: JournalEntry) -> str:
+        record = {
+            "path": path,
+            "outcome": entry.outcome,
+            "signature": list(entry.signature) if entry.signature else None,
+            "at": entry.recorded_at,
+            "error": entry.error,
+        }
+        return json.dumps(record) + "\n"
+
+    def _compact(self) -> None:
+        tmp = self.journal_path.with_suffix(".tmp")
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.writelines(self._line(path, entry) for path, entry in self._entries.items())
+            tmp.replace(self.journal_path)
+        except OSError as e:
+            logger.error(f"Error compacting auto-fill journal: {e}")
+
+    def record(self, path: str, outcome: str, error: str | None = None) -> None:
+        """Checkpoint a finished file, with its signature as it is now (after any write)."""
+        path = os.path.abspath(path)
+        try:
+            signature = StatSignature.from_stat(os.stat(path))
+        except OSError:
+            signature = None
+        entry = JournalEntry(outcome, signature, self._clock(), error)
+        with self._lock:
+            self._entries[path] = entry
+            try:
+                self._file.write(self._line(path, entry))
+                self._file.flush()
+            except (OSError, ValueError) as e:
+                logger.error(f"Error writing auto-fill journal: {e}")
+
+    def entry(self, path: str) -> JournalEntry | None:
+        with self._lock:
+            return self._entries.get(os.path.abspath(path))
+
+    def is_done(self, path: str) -> bool:
+        """Whether path finished in an earlier run and hasn't changed since."""
+        entry = self.entry(path)
+        if entry is None or entry.outcome not in DONE_OUTCOMES:
+            return False
+        if entry.outcome == "not_found" and self._clock() - entry.recorded_at > NOT_FOUND_TTL:
+            return False
+        try:
+            return StatSignature.from_stat(os.stat(path)) == entry.signature
+        except OSError:
+            return False
+
+    def is_failed(self, path: str) -> bool:
+        entry = self.entry(path)
+        return entry is not None and entry.outcome == "failed"
+
+    def clear(self) -> None:
+        """Forget every checkpoint, so the next run checks every file again."""
+        with self._lock:
+            self._entries.clear()
+            self._file.close()
+            self._file = open(self.journal_path, "w", encoding="utf-8")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+def get_journal() -> JobJournal:
+    """Get or create the journal shared by every auto-fill run."""
+    global _journal
+    with _journal_lock:
+        if _journal is None:
+            _journal = JobJournal()
+        return _journal
+
+
+class AutofillJob:
+    """A resumable bulk auto-fill over a fixed list of files.
+
+    run() submits only the files the journal doesn't have as done, so running the same
+    job again after it was cancelled or interrupted picks up where it stopped, and
+    retry_failed() re-runs just the files whose last attempt failed. pause(), resume()
+    and cancel() may be called from any thread while a run is in progress.
+    """
+
+    def __init__(
+        self,
+        paths: Iterable[str],
+        journal: JobJournal | None = None,
+        engine: LookupEngine | None = None,
+        by_album: bool = False,
+    ):
+        self.paths = list(paths)
+        self.journal = journal if journal is not None else get_journal()
+        self.engine = engine
+        self.by_album = by_album
+        self.control = JobControl()
+        # Files the last run() left out because an earlier run had finished them.
+        self.resumed = 0
+
+    def pending(self) -> list[str]:
+        return [path for path in self.paths if not self.journal.is_done(path)]
+
+    def failed(self) -> list[str]:
+        return [path for path in self.paths if self.journal.is_failed(path)]
+
+    async def run(
+        self,
+        on_progress: Callable[[FillProgress], None] | None = None,
+        only_failed: bool = False,
+    ) -> FillProgress:
+        """Auto-fill the files still pending (or only the failed ones), checkpointing
+        each in the journal as it finishes."""
+        paths = self.failed() if only_failed else self.pending()
+        self.resumed = 0 if only_failed else len(self.paths) - len(paths)
+        if self.control.cancelled:
+            self.control = JobControl()
+        engine = self.engine if self.engine is not None else LookupEngine()
+
+        def checkpoint(progress):
+            self.journal.record(progress.last_file, progress.last_outcome, progress.last_error)
+            if on_progress:
+                on_progress(progress)
+
+        return await engine.fill_tracks(
+            paths, on_progress=checkpoint, by_album=self.by_album, control=self.control
+        )
+
+    async def retry_failed(
+        self, on_progress: Callable[[FillProgress], None] | None = None
+    ) -> FillProgress:
+        return await self.run(on_progress, only_failed=True)
+
+    @property
+    def paused(self) -> bool:
+        return self.control.paused
+
+    def pause(self) -> None:
+        self.control.pause()
+
+    def resume(self) -> None:
+        self.control.resume()
+
+    def cancel(self) -> None:
+        self.control.cancel()
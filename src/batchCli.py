@@ -0,0 +1,251 @@
+"""Headless batch mode: library-wide auto-fill and tag operations without the UI.
+
+Every event is written to stdout as one JSON object per line, so runs can be logged
+or piped from cron. Nothing here imports urwid or the audio player.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import json
+import signal
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from mutagen import MutagenError
+
+from src.autofillJob import AutofillJob, get_journal
+from src.coverNormalizer import MAX_COVER_BYTES, MAX_COVER_DIMENSION, CoverFormat
+from src.httpSession import connection_summary
+from src.id3Reader import read_tags
+from src.libraryScanner import LibraryScanner
+from src.logging_config import setup_logging
+from src.lookupEngine import EXECUTOR_WORKERS, MAX_IN_FLIGHT, LookupEngine
+from src.rateLimiter import LIMITER
+from src.tagModifier import TAG_PADDING_RESERVE, repad_library
+
+logger = setup_logging(__name__)
+
+EXIT_OK = 0
+# Some files failed; rerun with --retry-failed.
+EXIT_FAILURES = 1
+# Bad arguments (argparse's own exit code).
+EXIT_USAGE = 2
+# Stopped by SIGINT/SIGTERM before every file was done; the next run resumes.
+EXIT_INTERRUPTED = 130
+
+
+class EventWriter:
+    """Writes JSON-lines events to a stream, flushing each so tailing sees it at once."""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def __call__(self, event: str, **fields) -> None:
+        self.stream.write(json.dumps({"event": event, **fields}) + "\n")
+        self.stream.flush()
+
+
+def library_paths(dirs: list[str], recursive: bool) -> list[str]:
+    scanner = LibraryScanner(dirs, recursive=recursive)
+    return sorted(scanner.path_of(song) for song in scanner.scan().added)
+
+
+async def _run_autofill(job: AutofillJob, emit: EventWriter, only_failed: bool):
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        with contextlib.suppress(NotImplementedError, RuntimeError):
+            loop.add_signal_handler(signum, job.cancel)
+
+    def report(progress):
+        emit(
+            "track",
+            path=progress.last_file,
+            outcome=progress.last_outcome,
+            error=progress.last_error,
+            completed=progress.completed,
+            total=progress.total,
+        )
+
+    return await job.run(on_progress=report, only_failed=only_failed)
+
+
+def autofill(args, emit: EventWriter) -> int:
+    """Auto-fill every song under args.dirs through the same job as the UI."""
+    journal = get_journal()
+    if args.fresh:
+        journal.clear()
+
+    paths = library_paths(args.dirs, args.recursive)
+    with ThreadPoolExecutor(max_workers=args.workers, thread_name_prefix="lookup") as executor:
+        cover_format = None
+        if not args.keep_covers:
+            cover_format = CoverFormat(args.cover_size, args.cover_kib * 1024)
+        engine = LookupEngine(max_in_flight=args.jobs, executor=executor, cover_format=cover_format)
+        job = AutofillJob(paths, journal=journal, engine=engine, by_album=args.by_album)
+        pending = job.failed() if args.retry_failed else job.pending()
+        emit(
+            "start",
+            command="autofill",
+            files=len(paths),
+            pending=len(pending),
+            by_album=args.by_album,
+            retry_failed=args.retry_failed,
+        )
+        progress = asyncio.run(_run_autofill(job, emit, args.retry_failed))
+
+    not_found = progress.completed - progress.updated - progress.skipped - progress.failed
+    emit(
+        "summary",
+        command="autofill",
+        total=progress.total,
+        completed=progress.completed,
+        updated=progress.updated,
+        skipped=progress.skipped,
+        not_found=not_found,
+        failed=progress.failed,
+        resumed=job.resumed,
+        cancelled=progress.cancelled,
+        throughput=LIMITER.summary(),
+        connections=connection_summary(),
+    )
+    if progress.cancelled:
+        return EXIT_INTERRUPTED
+    return EXIT_FAILURES if progress.failed else EXIT_OK
+
+
+def repad(args, emit: EventWriter) -> int:
+    """Rewrite every song once with enough tag padding for later in-place edits."""
+    paths = library_paths(args.dirs, args.recursive)
+    emit("start", command="repad", files=len(paths))
+
+    def report(path, rewritten):
+        emit("track", path=path, outcome="rewritten" if rewritten else "unchanged")
+
+    rewritten, failed = repad_library(paths, args.padding_kib * 1024, on_progress=report)
+    emit("summary", command="repad", total=len(paths), rewritten=rewritten, failed=failed)
+    return EXIT_FAILURES if failed else EXIT_OK
+
+
+def tags(args, emit: EventWriter) -> int:
+    """List each song's title, album, artist and cover flag."""
+    failed = 0
+    for path in library_paths(args.dirs, args.recursive):
+        try:
+            info = read_tags(path)
+        except (MutagenError, OSError, ValueError) as e:
+            failed += 1
+            emit("track", path=path, error=str(e))
+            continue
+        emit(
+            "track",
+            path=path,
+            title=info.title,
+            album=info.album,
+            artist=info.artist,
+            has_cover=info.has_cover,
+        )
+    return EXIT_FAILURES if failed else EXIT_OK
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Auto-fill and edit the tags of a music library without the UI. "
+        "Progress is written to stdout as JSON lines."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def add_library_args(command):
+        command.add_argument("dirs", nargs="+", metavar="dir", help="music directory")
+        command.add_argument(
+            "-r", "--recursive", action="store_true", help="also process subdirectories"
+        )
+
+    fill = commands.add_parser(
+        "autofill",
+        help="look up and write missing metadata and covers",
+        description="Look up and write missing title/artist/album/cover. Files finished by "
+        "an earlier run are skipped unless they changed since.",
+    )
+    add_library_args(fill)
+    fill.add_argument(
+        "--by-album",
+        action="store_true",
+        help="resolve album folders with a single release lookup each",
+    )
+    fill.add_argument(
+        "--retry-failed", action="store_true", help="only re-run files whose last attempt failed"
+    )
+    fill.add_argument(
+        "--fresh", action="store_true", help="forget earlier runs and check every file again"
+    )
+    fill.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=MAX_IN_FLIGHT,
+        help="tracks in flight at once (default: %(default)s); "
+        "per-provider rate limits still apply",
+    )
+    fill.add_argument(
+        "--workers",
+        type=int,
+        default=EXECUTOR_WORKERS,
+        help="threads for network requests and tag writes (default: %(default)s)",
+    )
+    fill.add_argument(
+        "--cover-size",
+        type=int,
+        default=MAX_COVER_DIMENSION,
+        help="largest side of embedded covers, in pixels (default: %(default)s)",
+    )
+    fill.add_argument(
+        "--cover-kib",
+        type=int,
+        default=MAX_COVER_BYTES // 1024,
+        help="size budget of embedded covers (default: %(default)s KiB)",
+    )
+    fill.add_argument(
+        "--keep-covers",
+        action="store_true",
+        help="embed covers as downloaded instead of resizing and re-encoding them",
+    )
+    fill.set_defaults(func=autofill)
+
+    pad = commands.add_parser(
+        "repad", help="rewrite each song once with generous tag padding for in-place edits"
+    )
+    add_library_args(pad)
+    pad.add_argument(
+        "--padding-kib",
+        type=int,
+        default=TAG_PADDING_RESERVE // 1024,
+        help="tag padding to reserve (default: %(default)s KiB)",
+    )
+    pad.set_defaults(func=repad)
+
+    show = commands.add_parser("tags", help="list each song's tags")
+    add_library_args(show)
+    show.set_defaults(func=tags)
+
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    if getattr(args, "jobs", 1) < 1 or getattr(args, "workers", 1) < 1:
+        build_parser().error("--jobs and --workers must be at least 1")
+    if getattr(args, "cover_size", 1) < 1 or getattr(args, "cover_kib", 1) < 1:
+        build_parser().error("--cover-size and --cover-kib must be at least 1")
+
+    # Only events go to stdout; anything else printed along the way goes to stderr.
+    emit = EventWriter(sys.stdout)
+    with contextlib.redirect_stdout(sys.stderr):
+        try:
+            return args.func(args, emit)
+        except Exception as e:
+            logger.exception(f"Batch {args.command} failed")
+            emit("error", command=args.command, error=str(e))
+            return EXIT_FAILURES
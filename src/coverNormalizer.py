@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from io import BytesIO
+
+from PIL import Image, ImageOps
+
+from src.logging_config import setup_logging
+
+logger = setup_logging(__name__)
+
+# Covers are embedded at most this many pixels on a side, within this many bytes; the
+# song list and the terminal renderer never show more.
+MAX_COVER_DIMENSION = 500
+MAX_COVER_BYTES = 96 * 1024
+
+# JPEG qualities tried, best first, until the image fits the byte budget.
+JPEG_QUALITIES = (90, 85, 80, 75, 65, 50)
+
+# Decoding and re-encoding holds the GIL, so bulk runs spread it over processes.
+COVER_WORKERS = min(4, os.cpu_count() or 1)
+
+
+@dataclass(frozen=True)
+class CoverFormat:
+    max_dimension: int = MAX_COVER_DIMENSION
+    max_bytes: int = MAX_COVER_BYTES
+
+
+def normalize_cover(data: bytes, cover_format: CoverFormat = CoverFormat()) -> bytes:
+    """Shrink a cover to fit cover_format as a baseline JPEG without EXIF.
+
+    A JPEG that already fits and carries no metadata is returned as is, so covers aren't
+    recompressed every time they pass through. Data Pillow can't decode is returned
+    unchanged rather than dropping the cover.
+    """
+    try:
+        with Image.open(BytesIO(data)) as image:
+            fits = (
+                image.format == "JPEG"
+                and max(image.size) <= cover_format.max_dimension
+                and len(data) <= cover_format.max_bytes
+                and "exif" not in image.info
+            )
+            if fits:
+                return data
+
+            image = ImageOps.exif_transpose(image)
+            if image.mode in ("RGBA", "LA") or "transparency" in image.info:
+                image = image.convert("RGBA")
+                background = Image.new("RGB", image.size, "white")
+                background.paste(image, mask=image.getchannel("A"))
+                image = background
+            elif image.mode != "RGB":
+                image = image.convert("RGB")
+            image.thumbnail(
+                (cover_format.max_dimension, cover_format.max_dimension),
+                Image.Resampling.LANCZOS,
+            )
+
+            encoded = data
+            for quality in JPEG_QUALITIES:
+                buffer = BytesIO()
+                image.save(buffer, "JPEG", quality=quality, optimize=True)
+                encoded = buffer.getvalue()
+                if len(encoded) <= cover_format.max_bytes:
+                    break
+            return encoded
+    except Exception as e:
+        logger.error(f"Error normalizing cover ({len(data)} bytes): {e}")
+        return data
+
+
+class CoverPool:
+    """Process pool running normalize_cover, started on first use.
+
+    Workers are spawned rather than forked, since the app forks from threads (the UI,
+    the event loop, the lookup pool) that may hold locks.
+    """
+
+    def __init__(self, workers: int = COVER_WORKERS):
+        self.workers = workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def submit(self, data: bytes, cover_format: CoverFormat) -> Future:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor.submit(normalize_cover, data, cover_format)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import os
+from functools import lru_cache
+from itertools import groupby
+
+from PIL import Image
+
+# Color depths a cover can be rendered at: the xterm 256-color palette, or 24-bit.
+COLORS_256 = 256
+TRUE_COLORS = 2**24
+
+# The lower half block: its foreground paints the bottom pixel of a cell, the cell's
+# background the top one, so every terminal row shows two image rows.
+HALF_BLOCK = "▄"
+
+# Segments of (foreground, background) color and text, as ansiParser returns them and
+# ANSIText.ansi_markup_parser takes them; rows are separated by uncolored newlines.
+CoverRuns = list[tuple[tuple[str | None, str | None], str]]
+
+# Palette index -> urwid color of the matching xterm color, 16 and up.
+_HIGH_COLORS = [f"h{i}" for i in range(16, 256)]
+
+
+def terminal_colors() -> int:
+    """TRUE_COLORS when the terminal advertises 24-bit color, else COLORS_256."""
+    if os.environ.get("COLORTERM", "").lower() in ("truecolor", "24bit"):
+        return TRUE_COLORS
+    return COLORS_256
+
+
+@lru_cache(maxsize=1)
+def _xterm_palette() -> Image.Image:
+    """A palette image of the 240 fixed xterm colors (6x6x6 cube, then grays).
+
+    The 16 system colors are left out: terminal themes redefine them.
+    """
+    levels = (0, 95, 135, 175, 215, 255)
+    cube = [(r, g, b) for r in levels for g in levels for b in levels]
+    grays = [(8 + 10 * i,) * 3 for i in range(24)]
+
+    palette = Image.new("P", (1, 1))
+    palette.putpalette([channel for color in cube + grays for channel in color])
+    return palette
+
+
+def _pixel_colors(image: Image.Image, colors: int) -> list[str]:
+    """Every pixel's urwid color, row by row: "#rrggbb", or "hN" for the palette."""
+    if colors == TRUE_COLORS:
+        hex_pixels = image.tobytes().hex()
+        return ["#" + hex_pixels[i : i + 6] for i in range(0, len(hex_pixels), 6)]
+
+    indexed = image.quantize(palette=_xterm_palette(), dither=Image.Dither.NONE)
+    return [_HIGH_COLORS[i] for i in indexed.tobytes()]
+
+
+def render_half_blocks(image: Image.Image, width: int, colors: int = COLORS_256) -> CoverRuns:
+    """Render an image width cells wide with half-block cells, straight from its pixels.
+
+    The image is scaled the way climage scales it, so a cover keeps its shape, and
+    neighbouring cells of the same colors come back as one segment.
+    """
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    height = int(image.height // (image.width / width))
+    height -= height % 2
+    if height == 0:
+        return []
+    image = image.resize((width, height))
+
+    pixels = _pixel_colors(image, colors)
+    runs: CoverRuns = []
+    for top in range(0, len(pixels), 2 * width):
+        cells = zip(pixels[top + width : top + 2 * width], pixels[top : top + width])
+        runs.extend((attr, HALF_BLOCK * len(list(group))) for attr, group in groupby(cells))
+        runs.append(((None, None), "\n"))
+    return runs
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+from src.logging_config import setup_logging
+
+logger = setup_logging(__name__)
+
+# Disk budget for downloaded covers; the least recently stored are dropped beyond it.
+MAX_STORE_BYTES = 200 * 1024 * 1024
+
+
+def cover_hash(image_data: bytes | memoryview) -> str:
+    """Content address of a cover image."""
+    return hashlib.sha256(image_data).hexdigest()
+
+
+class CoverStore:
+    """Content-addressed store of downloaded cover images.
+
+    Images are kept once per content hash, with an index from source URL to hash, so
+    the tracks of an album that all point at the same release cover download it once.
+    URLs that had no image are remembered for the session, so later tracks skip
+    straight to their next candidate.
+    """
+
+    def __init__(self, store_dir: str | Path | None = None, max_bytes: int = MAX_STORE_BYTES):
+        if store_dir is None:
+            cache_home = os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache"))
+            self.store_dir = Path(cache_home) / "metadata_editor" / "covers"
+        else:
+            self.store_dir = Path(store_dir)
+
+        self.max_bytes = max_bytes
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._missing: set[str] = set()
+        self._conn = sqlite3.connect(self.store_dir / "urls.sqlite3", check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY, hash TEXT NOT NULL)"
+            )
+            self._conn.commit()
+        self._size = sum(f.stat().st_size for f in self._blobs())
+        logger.info(f"Cover store directory: {self.store_dir}")
+
+    def _blobs(self):
+        return self.store_dir.glob("*.img")
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.store_dir / f"{digest}.img"
+
+    def get(self, digest: str) -> bytes | None:
+        try:
+            return self._blob_path(digest).read_bytes()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.error(f"Error reading cover {digest}: {e}")
+            return None
+
+    def get_by_url(self, url: str) -> bytes | None:
+        """The image previously downloaded from url, if it's still stored."""
+        try:
+            with self._lock:
+                row = self._conn.execute("SELECT hash FROM urls WHERE url = ?", (url,)).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"Error reading cover index: {e}")
+            return None
+        return self.get(row[0]) if row else None
+
+    def put(self, url: str, image_data: bytes) -> str:
+        """Store the image downloaded from url and return its content hash."""
+        digest = cover_hash(image_data)
+        path = self._blob_path(digest)
+        try:
+            with self._lock:
+                if not path.exists():
+                    tmp = path.with_suffix(".tmp")
+                    tmp.write_bytes(image_data)
+                    tmp.replace(path)
+                    self._size += len(image_data)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO urls (url, hash) VALUES (?, ?)", (url, digest)
+                )
+                self._conn.commit()
+                self._missing.discard(url)
+                if self._size > self.max_bytes:
+                    self._prune(keep=digest)
+        except (OSError, sqlite3.Error) as e:
+            logger.error(f"Error storing cover from {url}: {e}")
+        return digest
+
+    def _prune(self, keep: str) -> None:
+        """Drop the oldest images until the store is back under 90% of its budget."""
+        for blob in sorted(self._blobs(), key=lambda f: f.stat().st_mtime):
+            if self._size <= self.max_bytes * 0.9:
+                break
+            if blob.stem == keep:
+                continue
+            self._size -= blob.stat().st_size
+            blob.unlink()
+            self._conn.execute("DELETE FROM urls WHERE hash = ?", (blob.stem,))
+        self._conn.commit()
+
+    def mark_missing(self, url: str) -> None:
+        """Remember that url had no image."""
+        with self._lock:
+            self._missing.add(url)
+
+    def is_missing(self, url: str) -> bool:
+        with self._lock:
+            return url in self._missing
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.logging_config import setup_logging
+
+logger = setup_logging(__name__)
+
+# Keep-alive connections kept open per host. Sized to the bulk lookup's thread pool,
+# except where the host's rate limit means more could never be busy at once.
+POOL_SIZES = {
+    "musicbrainz.org": 2,
+    "coverartarchive.org": 8,
+    "api.spotify.com": 4,
+}
+DEFAULT_POOL_SIZE = 8
+
+_session = None
+_session_lock = threading.Lock()
+
+
+@dataclass
+class ConnectionStats:
+    host: str
+    requests: int
+    connections: int
+
+    @property
+    def reused(self) -> int:
+        """Requests that went over an already open connection."""
+        return max(0, self.requests - self.connections)
+
+
+def create_session(
+    pool_sizes: dict[str, int] = POOL_SIZES, default_pool_size: int = DEFAULT_POOL_SIZE
+) -> requests.Session:
+    """A session with a keep-alive connection pool per host, sized by pool_sizes.
+
+    Retries are left to rateLimiter, so the adapters never retry on their own.
+    """
+    session = requests.Session()
+    default = HTTPAdapter(pool_connections=16, pool_maxsize=default_pool_size)
+    session.mount("https://", default)
+    session.mount("http://", default)
+    for host, size in pool_sizes.items():
+        session.mount(f"https://{host}/", HTTPAdapter(pool_connections=1, pool_maxsize=size))
+    return session
+
+
+def get_session() -> requests.Session:
+    """Get or create the session shared by every outbound lookup and download."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = create_session()
+        return _session
+
+
+def connection_stats(session: requests.Session | None = None) -> list[ConnectionStats]:
+    """Requests sent and connections opened per host since the session was created."""
+    session = session or get_session()
+    totals: dict[str, ConnectionStats] = {}
+    for adapter in {id(a): a for a in session.adapters.values()}.values():
+        for key in adapter.poolmanager.pools.keys():
+            pool = adapter.poolmanager.pools[key]
+            stats = totals.setdefault(pool.host, ConnectionStats(pool.host, 0, 0))
+            stats.requests += pool.num_requests
+            stats.connections += pool.num_connections
+    return list(totals.values())
+
+
+def connection_summary(session: requests.Session | None = None) -> str:
+    """e.g. "412 requests over 9 connections (98% reused)", or "" before any request."""
+    stats = connection_stats(session)
+    requests_sent = sum(s.requests for s in stats)
+    if not requests_sent:
+        return ""
+    connections = sum(s.connections for s in stats)
+    reused = sum(s.reused for s in stats) * 100 // requests_sent
+    plural = "" if connections == 1 else "s"
+    return f"{requests_sent} requests over {connections} connection{plural} ({reused}% reused)"
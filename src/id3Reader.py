@@ -0,0 +1,313 @@
+from __future__ import annotations
+
+import io
+import mmap
+import struct
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import BinaryIO
+
+from PIL import Image
+
+from src.logging_config import setup_logging
+from src.tagIndex import HAS_COVER, NO_COVER, CoverLocation
+
+logger = setup_logging(__name__)
+
+# The cover the rest of the app reads and writes (mutagen's "APIC:Cover").
+COVER_DESCRIPTION = "Cover"
+
+# Enough of an APIC frame to get past its encoding, MIME type, picture type and description.
+APIC_HEADER_PEEK = 512
+
+_TEXT_FRAMES = {
+    b"TIT2": "title",
+    b"TALB": "album",
+    b"TPE1": "artist",
+    # ID3v2.2 names
+    b"TT2": "title",
+    b"TAL": "album",
+    b"TP1": "artist",
+}
+_PICTURE_FRAMES = (b"APIC", b"PIC")
+
+# Tag header flags
+_TAG_UNSYNC = 0x80
+_TAG_EXTENDED = 0x40
+
+# ID3v2.3 frame flags
+_V23_COMPRESSED = 0x0080
+_V23_ENCRYPTED = 0x0040
+_V23_GROUPED = 0x0020
+
+# ID3v2.4 frame flags
+_V24_GROUPED = 0x0040
+_V24_COMPRESSED = 0x0008
+_V24_ENCRYPTED = 0x0004
+_V24_UNSYNC = 0x0002
+_V24_DATA_LENGTH = 0x0001
+
+
+class ID3ReadError(ValueError):
+    """The file has no ID3v2 tag, or uses a feature the lightweight reader leaves to mutagen."""
+
+
+@dataclass
+class ListTags:
+    """The tags shown in the song list, plus where the cover image lives in the file."""
+
+    title: str = ""
+    album: str = ""
+    artist: str = ""
+    cover_size: int = 0
+    # File offset of the raw cover image, or None if there is no cover or it isn't
+    # stored verbatim (unsynchronised frame).
+    cover_offset: int | None = None
+    has_cover: bool = False
+    # Unused space at the end of the tag, available to later edits without a file rewrite.
+    padding: int = 0
+
+    def song_info(self) -> tuple[str, str, str, str]:
+        return self.title, self.album, self.artist, HAS_COVER if self.has_cover else NO_COVER
+
+    @property
+    def cover_location(self) -> CoverLocation | None:
+        if self.cover_offset is None:
+            return None
+        return self.cover_offset, self.cover_size
+
+
+def _syncsafe(data: bytes) -> int:
+    if any(byte & 0x80 for byte in data):
+        raise ID3ReadError("invalid syncsafe integer")
+    value = 0
+    for byte in data:
+        value = (value << 7) | byte
+    return value
+
+
+def _split_terminated(data: bytes, encoding: int) -> tuple[bytes, bytes]:
+    """Split data at the first string terminator for the given text encoding."""
+    if encoding in (1, 2):
+        for i in range(0, len(data) - 1, 2):
+            if data[i : i + 2] == b"\0\0":
+                return data[:i], data[i + 2 :]
+        return data, b""
+    head, _, tail = data.partition(b"\0")
+    return head, tail
+
+
+def _decode(data: bytes, encoding: int) -> str:
+    codec = {0: "latin-1", 1: "utf-16", 2: "utf-16-be", 3: "utf-8"}.get(encoding)
+    if codec is None:
+        raise ID3ReadError(f"unknown text encoding {encoding}")
+    try:
+        return data.decode(codec)
+    except UnicodeDecodeError as e:
+        raise ID3ReadError(str(e)) from e
+
+
+def _text_value(data: bytes) -> str:
+    """First value of a text frame, the same one mutagen's frame.text[0] gives."""
+    if not data:
+        return ""
+    value, _ = _split_terminated(data[1:], data[0])
+    return _decode(value, data[0])
+
+
+def _picture_header_size(data: bytes, version: int) -> tuple[str, int]:
+    """Description of an APIC/PIC frame and how many bytes precede the image data."""
+    if len(data) < 2:
+        raise ID3ReadError("truncated picture frame")
+    encoding = data[0]
+    if version == 2:
+        # Three-character image format instead of a MIME type.
+        rest = data[5:]
+    else:
+        _mime, _, rest = data[1:].partition(b"\0")
+        rest = rest[1:]
+    description, image = _split_terminated(rest, encoding)
+    if not image and len(data) == APIC_HEADER_PEEK:
+        raise ID3ReadError("picture description too long")
+    return _decode(description, encoding), len(data) - len(image)
+
+
+def _read_frames(f: BinaryIO, version: int, tag_end: int) -> ListTags:
+    tags = ListTags()
+    id_size, header_size = (3, 6) if version == 2 else (4, 10)
+
+    while f.tell() + header_size <= tag_end:
+        frames_end = f.tell()
+        header = f.read(header_size)
+        if len(header) < header_size:
+            raise ID3ReadError("tag is longer than the file")
+        frame_id = header[:id_size]
+        if frame_id[0] == 0:
+            tags.padding = tag_end - frames_end
+            break
+        if not (frame_id.isalnum() and frame_id == frame_id.upper()):
+            raise ID3ReadError(f"invalid frame id {frame_id!r}")
+
+        flags = 0
+        if version == 2:
+            size = int.from_bytes(header[3:6], "big")
+        elif version == 3:
+            size, flags = struct.unpack(">IH", header[4:])
+        else:
+            size, flags = _syncsafe(header[4:8]), int.from_bytes(header[8:10], "big")
+
+        start = f.tell()
+        if start + size > tag_end:
+            raise ID3ReadError(f"frame {frame_id!r} overruns the tag")
+
+        is_text = frame_id in _TEXT_FRAMES
+        is_picture = frame_id in _PICTURE_FRAMES
+        if not (is_text or is_picture):
+            f.seek(start + size)
+            continue
+
+        skip = 0
+        unsync = False
+        if version == 3:
+            if flags & (_V23_COMPRESSED | _V23_ENCRYPTED):
+                raise ID3ReadError(f"compressed or encrypted frame {frame_id!r}")
+            skip += 1 if flags & _V23_GROUPED else 0
+        elif version == 4:
+            if flags & (_V24_COMPRESSED | _V24_ENCRYPTED):
+                raise ID3ReadError(f"compressed or encrypted frame {frame_id!r}")
+            skip += 1 if flags & _V24_GROUPED else 0
+            skip += 4 if flags & _V24_DATA_LENGTH else 0
+            unsync = bool(flags & _V24_UNSYNC)
+
+        f.seek(start + skip)
+        data_size = size - skip
+        if is_text:
+            data = f.read(data_size)
+            if unsync:
+                data = data.replace(b"\xff\x00", b"\xff")
+            setattr(tags, _TEXT_FRAMES[frame_id], _text_value(data))
+        else:
+            peek = f.read(min(data_size, APIC_HEADER_PEEK))
+            if unsync:
+                peek = peek.replace(b"\xff\x00", b"\xff")
+            description, image_start = _picture_header_size(peek, version)
+            if description == COVER_DESCRIPTION and not tags.has_cover:
+                tags.has_cover = True
+                if unsync:
+                    # The stored bytes are escaped, so only mutagen can get the image out.
+                    tags.cover_size = data_size - image_start
+                else:
+                    tags.cover_offset = start + skip + image_start
+                    tags.cover_size = data_size - image_start
+
+        f.seek(start + size)
+    else:
+        tags.padding = tag_end - f.tell()
+
+    return tags
+
+
+def read_list_tags(path: str) -> ListTags:
+    """Read title/album/artist and cover presence without loading any picture data.
+
+    Only the ID3v2 header, the three text frames and the first few hundred bytes of
+    each picture frame are read; everything else is skipped by seeking.
+
+    Raises:
+        ID3ReadError: No ID3v2 tag, or one only mutagen can parse (tag-wide
+            unsynchronisation, compressed or encrypted frames, malformed sizes).
+        OSError: The file can't be read.
+    """
+    with open(path, "rb") as f:
+        header = f.read(10)
+        if len(header) < 10 or header[:3] != b"ID3":
+            raise ID3ReadError("no ID3v2 header")
+
+        version, flags = header[3], header[5]
+        if version not in (2, 3, 4):
+            raise ID3ReadError(f"unsupported ID3v2.{version}")
+        if flags & _TAG_UNSYNC:
+            raise ID3ReadError("unsynchronised tag")
+        if version == 2 and flags & _TAG_EXTENDED:
+            raise ID3ReadError("compressed ID3v2.2 tag")
+
+        tag_end = 10 + _syncsafe(header[6:10])
+        if version > 2 and flags & _TAG_EXTENDED:
+            raw = f.read(4)
+            if version == 3:
+                # The v2.3 size excludes the size field itself; v2.4's includes it.
+                f.seek(struct.unpack(">I", raw)[0], 1)
+            else:
+                f.seek(_syncsafe(raw) - 4, 1)
+
+        return _read_frames(f, version, tag_end)
+
+
+def read_tags(path: str) -> ListTags:
+    """List tags for path, falling back to a full mutagen parse for tags the lightweight
+    reader doesn't handle (the cover location is unknown then)."""
+    try:
+        return read_list_tags(path)
+    except ID3ReadError as e:
+        logger.debug(f"Falling back to mutagen for {path}: {e}")
+
+    from src.tagModifier import MP3Editor
+
+    title, album, artist, album_art = MP3Editor(path).song_info()
+    return ListTags(title, album, artist, has_cover=album_art == HAS_COVER)
+
+
+class _CoverReader(io.RawIOBase):
+    """Read-only, seekable file over a buffer, so PIL can decode straight out of an mmap."""
+
+    def __init__(self, buffer: memoryview):
+        self._buffer = buffer
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        chunk = self._buffer[self._pos : self._pos + len(b)]
+        b[: len(chunk)] = chunk
+        self._pos += len(chunk)
+        return len(chunk)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += len(self._buffer)
+        self._pos = max(0, offset)
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+
+@contextmanager
+def map_cover(path: str, location: CoverLocation) -> Iterator[memoryview]:
+    """Map the cover image of path into memory without copying it.
+
+    The view is only valid inside the with block; decode it there.
+    """
+    offset, size = location
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        if offset + size > len(mapped):
+            raise ID3ReadError(f"cover location {location} is past the end of {path}")
+        whole = memoryview(mapped)
+        cover = whole[offset : offset + size]
+        try:
+            yield cover
+        finally:
+            cover.release()
+            whole.release()
+
+
+def open_cover_image(cover: memoryview) -> Image.Image:
+    """Open a mapped cover with PIL, reading it in place."""
+    return Image.open(_CoverReader(cover))
@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import os
+import stat
+import threading
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+
+from src.logging_config import setup_logging
+from src.tagIndex import StatSignature
+
+logger = setup_logging(__name__)
+
+SONG_EXTENSION = ".mp3"
+SCAN_WORKERS = 8
+
+# A directory to read, paired with the prefix its songs get in the library. Songs under
+# the primary root are keyed relative to it (so top-level songs keep their bare file
+# name); songs under any other root are keyed by absolute path.
+ScanTarget = tuple[str, str]
+
+
+def is_song_file(name: str) -> bool:
+    return name.lower().endswith(SONG_EXTENSION)
+
+
+def scan_targets(roots: Sequence[str]) -> list[ScanTarget]:
+    """The root directories with the key prefix used for their songs."""
+    return [(roots[0], "")] + [(root, os.path.abspath(root)) for root in roots[1:]]
+
+
+@dataclass
+class ScanDelta:
+    """Songs that appeared, disappeared or changed on disk between two scans."""
+
+    added: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    modified: list[str] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.modified)
+
+
+class LibraryScanner:
+    """Keeps a stat snapshot of one or more music roots and reports what changed between scans.
+
+    With recursive=True every subdirectory is read too, one directory per task on a
+    thread pool, so large trees are enumerated in parallel.
+    """
+
+    def __init__(
+        self,
+        roots: str | Sequence[str],
+        recursive: bool = False,
+        max_workers: int = SCAN_WORKERS,
+    ):
+        self.roots = [roots] if isinstance(roots, str) else list(roots)
+        self.root = self.roots[0]
+        self.recursive = recursive
+        self.max_workers = max_workers
+        self._snapshot: dict[str, StatSignature] = {}
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+
+    def cancel(self) -> None:
+        """Make a running recursive scan stop early (used on shutdown)."""
+        self._cancelled.set()
+
+    def __contains__(self, song: str) -> bool:
+        with self._lock:
+            return song in self._snapshot
+
+    def path_of(self, song: str) -> str:
+        return os.path.join(self.root, song)
+
+    def _read_dir(self, target: ScanTarget) -> tuple[dict[str, StatSignature], list[ScanTarget]]:
+        """Read one directory: its songs, and its subdirectories when scanning recursively."""
+        path, prefix = target
+        songs = {}
+        subdirs = []
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_file():
+                        if is_song_file(entry.name):
+                            key = os.path.join(prefix, entry.name) if prefix else entry.name
+                            songs[key] = StatSignature.from_stat(entry.stat())
+                    elif (
+                        self.recursive
+                        and not entry.name.startswith(".")
+                        and entry.is_dir(follow_symlinks=False)
+                    ):
+                        subdirs.append((entry.path, os.path.join(prefix, entry.name)))
+                except OSError:
+                    # Vanished between readdir and stat; the next scan settles it.
+                    continue
+        return songs, subdirs
+
+    def _walk(
+        self, on_directory: Callable[[str, str], None] | None = None
+    ) -> Iterator[dict[str, StatSignature]]:
+        """Yield the songs of each directory as soon as it has been read."""
+        if not self.recursive:
+            for target in scan_targets(self.roots):
+                yield self._read_dir(target)[0]
+            return
+
+        def read(target: ScanTarget) -> tuple[dict[str, StatSignature], list[ScanTarget]]:
+            if on_directory is not None:
+                # Register before reading so nothing created meanwhile is missed.
+                on_directory(*target)
+            try:
+                return self._read_dir(target)
+            except OSError as e:
+                logger.error(f"Error reading {target[0]}: {e}")
+                return {}, []
+
+        with ThreadPoolExecutor(self.max_workers, thread_name_prefix="library_scan") as pool:
+            pending = {pool.submit(read, target) for target in scan_targets(self.roots)}
+            while pending:
+                if self._cancelled.is_set():
+                    for future in pending:
+                        future.cancel()
+                    return
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    songs, subdirs = future.result()
+                    pending |= {pool.submit(read, subdir) for subdir in subdirs}
+                    yield songs
+
+    def scan(
+        self,
+        on_added: Callable[[list[str]], None] | None = None,
+        on_directory: Callable[[str, str], None] | None = None,
+    ) -> ScanDelta:
+        """Re-read the library and diff it against the previous snapshot.
+
+        Args:
+            on_added: Called with each batch of new songs as soon as its directory is read,
+                so callers can show results while a large tree is still being walked.
+            on_directory: Called with (path, key prefix) for each directory before it is read.
+        """
+        with self._lock:
+            before = set(self._snapshot)
+
+        seen: set[str] = set()
+        delta = ScanDelta()
+        for songs in self._walk(on_directory):
+            seen.update(songs)
+            with self._lock:
+                added = sorted(song for song in songs if song not in self._snapshot)
+                delta.modified.extend(
+                    song
+                    for song in songs
+                    if song in self._snapshot and self._snapshot[song] != songs[song]
+                )
+                self._snapshot.update(songs)
+            delta.added.extend(added)
+            if on_added is not None and added:
+                on_added(added)
+
+        # Only songs known before the walk can be declared gone; anything a concurrent
+        # rescan() added meanwhile may live in a directory the walk had already passed.
+        # A cancelled, partial walk can't tell which songs are gone at all.
+        if not self._cancelled.is_set():
+            with self._lock:
+                delta.removed = sorted(before - seen)
+                for song in delta.removed:
+                    self._snapshot.pop(song, None)
+
+        delta.added.sort()
+        delta.modified.sort()
+        if delta:
+            logger.debug(
+                f"Scan of {self.roots}: +{len(delta.added)} -{len(delta.removed)} "
+                f"~{len(delta.modified)}"
+            )
+        return delta
+
+    def rescan(self, songs: Iterable[str]) -> ScanDelta:
+        """Stat only the given songs and diff them against the snapshot."""
+        delta = ScanDelta()
+
+        with self._lock:
+            for song in sorted(set(songs)):
+                if not is_song_file(song):
+                    continue
+
+                try:
+                    st = os.stat(self.path_of(song))
+                    signature = StatSignature.from_stat(st) if stat.S_ISREG(st.st_mode) else None
+                except OSError:
+                    signature = None
+
+                previous = self._snapshot.get(song)
+                if signature is None:
+                    if previous is not None:
+                        del self._snapshot[song]
+                        delta.removed.append(song)
+                elif previous is None:
+                    self._snapshot[song] = signature
+                    delta.added.append(song)
+                elif previous != signature:
+                    self._snapshot[song] = signature
+                    delta.modified.append(song)
+
+        return delta
@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import threading
+from collections.abc import Callable, Iterator, Sequence
+
+from src.libraryScanner import LibraryScanner, is_song_file, scan_targets
+from src.logging_config import setup_logging
+
+logger = setup_logging(__name__)
+
+# Called from the watcher thread with the changed song names, or None when the
+# watcher lost track of events and the whole library has to be rescanned.
+ChangeCallback = Callable[[set[str] | None], None]
+
+# <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = os.O_CLOEXEC
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE
+# Recursive libraries also need to hear about new subdirectories to watch them.
+RECURSIVE_WATCH_MASK = WATCH_MASK | IN_CREATE
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+DEBOUNCE_SECONDS = 0.1
+POLL_INTERVAL_SECONDS = 2.0
+RECURSIVE_POLL_INTERVAL_SECONDS = 30.0
+
+
+def _load_libc():
+    """Return libc with the inotify calls typed, or raise OSError if they're unavailable."""
+    libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    try:
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_init1.restype = ctypes.c_int
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        libc.inotify_add_watch.restype = ctypes.c_int
+    except AttributeError as e:
+        raise OSError("inotify is not available on this platform") from e
+    return libc
+
+
+def parse_events(data: bytes) -> Iterator[tuple[int, int, str]]:
+    """Yield (watch descriptor, mask, name) for each inotify_event in a read() buffer."""
+    offset = 0
+    while offset + _EVENT_HEADER.size <= len(data):
+        wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+        offset += _EVENT_HEADER.size
+        name = data[offset : offset + length].rstrip(b"\0")
+        offset += length
+        yield wd, mask, os.fsdecode(name)
+
+
+class InotifyWatcher:
+    """Watches music directories with inotify and reports changed songs in batches.
+
+    The thread blocks in select() while the library is idle, and coalesces bursts of
+    events (a yt-dlp rename, a tag rewrite) for DEBOUNCE_SECONDS before reporting.
+    In recursive mode every subdirectory needs its own watch: the library scan
+    registers them through add_directory(), and directories created later are picked
+    up by the watcher itself.
+    """
+
+    def __init__(
+        self,
+        roots: Sequence[str],
+        on_change: ChangeCallback,
+        recursive: bool = False,
+        debounce: float = DEBOUNCE_SECONDS,
+    ):
+        self.roots = list(roots)
+        self.on_change = on_change
+        self.recursive = recursive
+        self.debounce = debounce
+        self._mask = RECURSIVE_WATCH_MASK if recursive else WATCH_MASK
+        self._libc = _load_libc()
+        self._fd = -1
+        self._stop_r = self._stop_w = -1
+        self._prefixes: dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._fd = self._libc.inotify_init1(IN_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+
+        try:
+            for path, prefix in scan_targets(self.roots):
+                self.add_directory(path, prefix)
+        except OSError:
+            os.close(self._fd)
+            raise
+
+        self._stop_r, self._stop_w = os.pipe()
+        self._thread = threading.Thread(target=self._run, name="library_watcher", daemon=True)
+        self._thread.start()
+        logger.info(f"Watching {self.roots} with inotify")
+
+    def add_directory(self, path: str, prefix: str) -> None:
+        """Watch one directory whose songs are keyed under prefix. Safe from any thread."""
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), self._mask)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), path)
+        with self._lock:
+            self._prefixes[wd] = prefix
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        os.write(self._stop_w, b"x")
+        self._thread.join()
+        self._thread = None
+        for fd in (self._fd, self._stop_r, self._stop_w):
+            os.close(fd)
+
+    def _watch_tree(self, path: str, prefix: str) -> set[str]:
+        """Watch a directory that appeared after the scan, returning the songs already in it."""
+        songs = set()
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames[:] = [name for name in dirnames if not name.startswith(".")]
+            dir_prefix = os.path.normpath(os.path.join(prefix, os.path.relpath(dirpath, path)))
+            try:
+                self.add_directory(dirpath, dir_prefix)
+            except OSError as e:
+                logger.error(f"Error watching {dirpath}: {e}")
+                continue
+            songs.update(os.path.join(dir_prefix, name) for name in filenames if is_song_file(name))
+        return songs
+
+    def _run(self) -> None:
+        pending: set[str] = set()
+        overflowed = False
+
+        while True:
+            timeout = self.debounce if pending or overflowed else None
+            ready, _, _ = select.select([self._fd, self._stop_r], [], [], timeout)
+
+            if self._stop_r in ready:
+                return
+
+            if self._fd in ready:
+                for wd, mask, name in parse_events(os.read(self._fd, 64 * 1024)):
+                    if mask & IN_Q_OVERFLOW:
+                        overflowed = True
+                        continue
+
+                    with self._lock:
+                        if mask & IN_IGNORED:
+                            self._prefixes.pop(wd, None)
+                            continue
+                        prefix = self._prefixes.get(wd)
+                    if prefix is None:
+                        continue
+                    key = os.path.join(prefix, name) if prefix else name
+
+                    if mask & IN_ISDIR:
+                        if not self.recursive or name.startswith("."):
+                            continue
+                        if mask & (IN_CREATE | IN_MOVED_TO):
+                            path = os.path.join(self._path_of_prefix(prefix), name)
+                            pending |= self._watch_tree(path, key)
+                        elif mask & IN_MOVED_FROM:
+                            # Its songs left without events of their own.
+                            overflowed = True
+                    elif is_song_file(name):
+                        pending.add(key)
+                continue
+
+            # Quiet for a whole debounce period: report what accumulated.
+            try:
+                self.on_change(None if overflowed else pending)
+            except Exception as e:
+                logger.error(f"Error delivering library changes: {e}")
+            pending = set()
+            overflowed = False
+
+    def _path_of_prefix(self, prefix: str) -> str:
+        return os.path.join(self.roots[0], prefix)
+
+
+class PollingWatcher:
+    """Fallback watcher for platforms without inotify: stat-diffs the library periodically."""
+
+    def __init__(
+        self,
+        roots: Sequence[str],
+        on_change: ChangeCallback,
+        recursive: bool = False,
+        interval: float | None = None,
+    ):
+        self.roots = list(roots)
+        self.on_change = on_change
+        if interval is None:
+            interval = RECURSIVE_POLL_INTERVAL_SECONDS if recursive else POLL_INTERVAL_SECONDS
+        self.interval = interval
+        self._scanner = LibraryScanner(roots, recursive=recursive)
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="library_watcher", daemon=True)
+        self._thread.start()
+        logger.info(f"Polling {self.roots} every {self.interval}s")
+
+    def add_directory(self, path: str, prefix: str) -> None:
+        """Nothing to do: every poll re-reads the whole library."""
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self) -> None:
+        try:
+            self._scanner.scan()
+        except OSError as e:
+            logger.error(f"Error polling library: {e}")
+
+        while not self._stop_event.wait(self.interval):
+            try:
+                delta = self._scanner.scan()
+                if delta:
+                    self.on_change({*delta.added, *delta.removed, *delta.modified})
+            except Exception as e:
+                logger.error(f"Error polling library: {e}")
+
+
+def start_library_watcher(
+    roots: Sequence[str], on_change: ChangeCallback, recursive: bool = False
+) -> InotifyWatcher | PollingWatcher:
+    """Start an inotify watcher where supported, otherwise a polling one."""
+    try:
+        watcher = InotifyWatcher(roots, on_change, recursive=recursive)
+        watcher.start()
+        return watcher
+    except OSError as e:
+        logger.info(f"inotify unavailable ({e}), falling back to polling")
+
+    watcher = PollingWatcher(roots, on_change, recursive=recursive)
+    watcher.start()
+    return watcher
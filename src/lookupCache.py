@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from src.logging_config import setup_logging
+
+logger = setup_logging(__name__)
+
+SCHEMA_VERSION = 2
+
+# How long a lookup result is trusted. Matches rarely change; a miss is retried sooner
+# since the providers' catalogues grow.
+FOUND_TTL = 30 * 24 * 3600
+NOT_FOUND_TTL = 7 * 24 * 3600
+
+# Oldest entries beyond this are evicted.
+MAX_ENTRIES = 50_000
+
+# (name, artist, album, cover_urls), as returned by trackInfo.get_track_features.
+LookupResult = tuple[str | None, str | None, str | None, tuple[str, ...]]
+NOT_FOUND: LookupResult = (None, None, None, ())
+
+
+class LookupCache:
+    """Persistent SQLite cache of metadata lookups, keyed by the cleaned search query.
+
+    Stores both matches and definitive misses (every provider answered, none matched),
+    each with its own TTL, so re-running auto-fill only queries what it hasn't asked
+    recently. Failed lookups (network errors, throttling) are never stored.
+    """
+
+    def __init__(
+        self,
+        db_path: str | Path | None = None,
+        max_entries: int = MAX_ENTRIES,
+        clock: Callable[[], float] = time.time,
+    ):
+        if db_path is None:
+            cache_home = os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache"))
+            self.db_path = Path(cache_home) / "metadata_editor" / "lookup_cache.sqlite3"
+        else:
+            self.db_path = Path(db_path)
+
+        self.max_entries = max_entries
+        self._clock = clock
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._create_schema()
+        logger.info(f"Lookup cache database: {self.db_path}")
+
+    def _create_schema(self) -> None:
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            if version != SCHEMA_VERSION:
+                self._conn.execute("DROP TABLE IF EXISTS lookups")
+                self._conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS lookups (
+                    query TEXT PRIMARY KEY,
+                    name TEXT,
+                    artist TEXT,
+                    album TEXT,
+                    cover_urls TEXT NOT NULL,
+                    stored_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS lookups_stored_at ON lookups (stored_at)"
+            )
+            self._conn.commit()
+
+    def get(self, query: str) -> LookupResult | None:
+        """Return the cached result for query (NOT_FOUND for a cached miss), or None if
+        it isn't cached or has expired."""
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT name, artist, album, cover_urls, stored_at FROM lookups "
+                    "WHERE query = ?",
+                    (query,),
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"Error reading lookup cache: {e}")
+            return None
+
+        if row is None:
+            return None
+
+        name, artist, album, cover_urls, stored_at = row
+        result = name, artist, album, tuple(cover_urls.split("\n")) if cover_urls else ()
+        ttl = NOT_FOUND_TTL if result == NOT_FOUND else FOUND_TTL
+        if self._clock() - stored_at > ttl:
+            return None
+        return result
+
+    def put(self, query: str, result: LookupResult) -> None:
+        """Record the result of a completed lookup, evicting the oldest entries if full."""
+        name, artist, album, cover_urls = result
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO lookups "
+                    "(query, name, artist, album, cover_urls, stored_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (query, name, artist, album, "\n".join(cover_urls), self._clock()),
+                )
+                self._conn.execute(
+                    "DELETE FROM lookups WHERE query IN "
+                    "(SELECT query FROM lookups ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+                self._conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Error writing lookup cache: {e}")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM lookups").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
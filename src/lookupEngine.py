@@ -0,0 +1,445 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from urllib.parse import urlsplit
+
+import src.tagModifier as tagModifier
+import src.trackInfo as trackInfo
+from src.albumLookup import AlbumMember, group_albums, match_tracks, parse_track_number
+from src.coverNormalizer import CoverFormat, CoverPool, normalize_cover
+from src.logging_config import setup_logging
+from src.lookupCache import NOT_FOUND
+from src.rateLimiter import LIMITER, ThrottledError
+from src.tagIndex import HAS_COVER
+
+logger = setup_logging(__name__)
+
+# Tracks in flight at once. The buckets set the actual request rate; this only needs to
+# be high enough that a slow response never leaves a provider's budget unused.
+MAX_IN_FLIGHT = 16
+
+# Worker threads for the blocking client calls and tag writes. Threads never wait on a
+# rate limit (tasks do that on the event loop), so this only bounds concurrent I/O.
+EXECUTOR_WORKERS = 8
+
+
+@dataclass
+class FillProgress:
+    """Running totals of a bulk auto-fill, passed to the progress callback."""
+
+    total: int
+    completed: int = 0
+    updated: int = 0
+    skipped: int = 0
+    failed: int = 0
+    last_file: str = ""
+    # "updated", "skipped", "not_found" or "failed"
+    last_outcome: str = ""
+    last_error: str | None = None
+    # The run was cancelled before every track was submitted.
+    cancelled: bool = False
+
+
+def _raise_first(failures) -> None:
+    """Raise the first failed step, so the track is counted (and journaled) as failed
+    and is tried again instead of being taken as done."""
+    if failures:
+        raise failures[0]
+
+
+class JobControl:
+    """Pause, resume or cancel a running fill_tracks from any thread.
+
+    Pausing or cancelling stops new tracks from being submitted; tracks already in
+    flight run to completion, so every file is either fully written or untouched.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._paused = False
+        self._cancelled = False
+        self._loop = None
+        self._running = None
+
+    @property
+    def paused(self) -> bool:
+        return self._paused
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    def _bind(self, loop) -> None:
+        with self._lock:
+            self._loop = loop
+            self._running = asyncio.Event()
+            if not self._paused:
+                self._running.set()
+
+    def _unbind(self) -> None:
+        with self._lock:
+            self._loop = None
+
+    def _set_running(self, running: bool) -> None:
+        with self._lock:
+            if self._loop is not None:
+                event = self._running
+                self._loop.call_soon_threadsafe(event.set if running else event.clear)
+
+    def pause(self) -> None:
+        self._paused = True
+        self._set_running(False)
+
+    def resume(self) -> None:
+        self._paused = False
+        self._set_running(True)
+
+    def cancel(self) -> None:
+        self._cancelled = True
+        self._set_running(True)
+
+    async def wait_turn(self) -> bool:
+        """Wait while paused; False once cancelled."""
+        await self._running.wait()
+        return not self._cancelled
+
+
+class LookupEngine:
+    """Looks up metadata for many tracks at once, keeping each provider at its rate limit.
+
+    Every track runs the same pipeline as trackInfo.get_track_features (MusicBrainz
+    search, Spotify fallback, then the cover download) as an asyncio task. Before each
+    request a task waits on the provider's rate limiter (including any backoff after a
+    429/503), so while one track waits for MusicBrainz another can be downloading covers or
+    querying Spotify. The provider clients are synchronous, so the requests themselves
+    run on a small thread pool.
+
+    In album mode, files sharing a folder and album tag are resolved together: one
+    MusicBrainz release search and one release lookup tag every track of the album.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = MAX_IN_FLIGHT,
+        executor: ThreadPoolExecutor | None = None,
+        limiter=LIMITER,
+        cache=None,
+        cover_store=None,
+        cover_format: CoverFormat | None = CoverFormat(),
+        cover_pool: CoverPool | None = None,
+    ):
+        self.max_in_flight = max_in_flight
+        # Downloaded covers are shrunk to this before they are stored and embedded
+        # (None keeps them as downloaded).
+        self.cover_format = cover_format
+        self._cover_pool = cover_pool
+        self.limiter = limiter
+        self.cache = cache if cache is not None else trackInfo.get_lookup_cache()
+        self.cover_store = cover_store if cover_store is not None else trackInfo.get_cover_store()
+        self._executor = executor
+        # Cover downloads in progress by URL, so tracks of one album share a single one.
+        self._downloads: dict[str, asyncio.Task] = {}
+
+    async def _call(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    async def _limited(self, failures, host, func, *args):
+        """Like trackInfo._limited: a failed step counts as no match and is recorded."""
+        try:
+            return await self.limiter.call_async(host, func, *args, executor=self._executor)
+        except (ThrottledError, trackInfo.ProviderError) as e:
+            logger.error(f"Lookup on {host} failed: {e}")
+            failures.append(e)
+            return None
+
+    async def lookup(self, title, artist, album, file_path, failures=None):
+        """Async counterpart of trackInfo.get_track_features, sharing its cache.
+
+        Steps that failed (rather than found nothing) are appended to failures, so the
+        caller can tell a miss from an outage.
+
+        Returns:
+            tuple: (name, artist, album, cover_urls), (None, None, None, ()) if nothing
+                was found
+        """
+        query = trackInfo._clean_query(title, artist, album, file_path)
+        cached = self.cache.get(query)
+        if cached is not None:
+            return cached
+
+        if failures is None:
+            failures = []
+        found = (
+            await self._limited(
+                failures, trackInfo.MUSICBRAINZ_HOST, trackInfo._search_musicbrainz, query
+            )
+            or await self._limited(
+                failures, trackInfo.SPOTIFY_HOST, trackInfo._search_spotify, query
+            )
+            or NOT_FOUND
+        )
+
+        trackInfo.remember_lookup(self.cache, query, found, failures)
+        return found
+
+    async def fetch_cover(self, cover_urls, failures=None):
+        """Async counterpart of trackInfo.fetch_cover. Tracks asking for a cover that is
+        already being downloaded wait for that download instead of starting another.
+
+        Downloads that failed are appended to failures, as in lookup."""
+        for url in cover_urls:
+            data = await self._call(self.cover_store.get_by_url, url)
+            if data is None and not self.cover_store.is_missing(url):
+                task = self._downloads.get(url)
+                if task is None:
+                    task = asyncio.ensure_future(self._download_cover(url))
+                    self._downloads[url] = task
+                    task.add_done_callback(lambda _, url=url: self._downloads.pop(url, None))
+                data, download_failures = await task
+                if failures is not None:
+                    failures.extend(download_failures)
+            if data:
+                return data
+        return None
+
+    async def _download_cover(self, url):
+        """Download, normalize and store one cover.
+
+        Returns:
+            tuple: (data or None, the failures of the download)
+        """
+        failures = []
+        host = urlsplit(url).hostname or ""
+        data = await self._limited(failures, host, trackInfo._download_cover, host, url)
+        if data:
+            data = await self._normalize_cover(data)
+        await self._call(trackInfo.remember_cover, self.cover_store, url, data, failures)
+        return data, failures
+
+    async def _normalize_cover(self, data):
+        """normalize_cover on the process pool during fill_tracks (so it overlaps the
+        network work of other tracks on every core), else on the thread pool."""
+        if self.cover_format is None:
+            return data
+        if self._cover_pool is None:
+            return await self._call(normalize_cover, data, self.cover_format)
+        return await asyncio.wrap_future(self._cover_pool.submit(data, self.cover_format))
+
+    async def lookup_release(self, album, artist, track_count):
+        """Find the release an album folder holds, with its tracklist.
+
+        Returns:
+            Release: or None if no release fits or MusicBrainz couldn't be asked
+        """
+        failures = []
+        release_id = await self._limited(
+            failures,
+            trackInfo.MUSICBRAINZ_HOST,
+            trackInfo._search_musicbrainz_release,
+            album,
+            artist,
+            track_count,
+        )
+        if release_id is None:
+            return None
+        return await self._limited(
+            failures, trackInfo.MUSICBRAINZ_HOST, trackInfo._lookup_musicbrainz_release, release_id
+        )
+
+    async def _fill_track(self, file_path, semaphore) -> str:
+        async with semaphore:
+            modifier = await self._call(tagModifier.MP3Editor, file_path)
+            if modifier.has_metadata():
+                return "skipped"
+
+            title, album, artist, album_art = modifier.song_info()
+            failures = []
+            found = await self.lookup(title, artist, album, file_path, failures)
+            if not any(found):
+                # A miss is only final if every provider answered.
+                _raise_first(failures)
+                return "not_found"
+
+            name, artist, album, cover_urls = found
+            cover = None
+            failures = []
+            if cover_urls and album_art != HAS_COVER:
+                cover = await self.fetch_cover(cover_urls, failures)
+            await self._call(modifier.apply_metadata, name, artist, album, cover)
+            if cover is None:
+                # The tags are written, but the file isn't done until it has its cover.
+                _raise_first(failures)
+            return "updated"
+
+    async def _fill_release_track(self, file_path, release, track, semaphore) -> str:
+        async with semaphore:
+            modifier = await self._call(tagModifier.MP3Editor, file_path)
+            cover = None
+            failures = []
+            if modifier.song_info()[3] != HAS_COVER:
+                cover = await self.fetch_cover(release.cover_urls, failures)
+            await self._call(
+                modifier.apply_metadata,
+                track.title,
+                track.artist or release.artist,
+                release.title,
+                cover,
+                release.track_number(track),
+            )
+            if cover is None:
+                _raise_first(failures)
+            return "updated"
+
+    async def _fill_album(self, group, semaphore, run, record):
+        """Tag an album group from a single release. Files that match none of its
+        tracks, and whole groups no release fits, fall back to per-track lookups."""
+        async with semaphore:
+            release = await self.lookup_release(group.query_album, group.artist, len(group.members))
+        matches = match_tracks(release, group.members) if release else {}
+        logger.info(
+            f"Album {group.query_album!r}: {len(matches)}/{len(group.members)} "
+            f"tracks matched {'release ' + release.id if release else 'no release'}"
+        )
+
+        async def fill(path):
+            track = matches.get(path)
+            if track is None:
+                await run(path)
+                return
+            try:
+                outcome = await self._fill_release_track(path, release, track, semaphore)
+            except Exception as e:
+                record(path, "failed", str(e))
+                return
+            record(path, outcome)
+
+        await asyncio.gather(*(fill(member.path) for member in group.members))
+
+    async def _run_window(self, jobs: Iterable[Callable], control: JobControl | None) -> bool:
+        """Start each job (a coroutine function) once fewer than max_in_flight are
+        running, so a large library never has more than a window of tasks alive.
+
+        Returns:
+            bool: False if control cancelled the run before every job was started
+        """
+        pending = set()
+        try:
+            for job in jobs:
+                while len(pending) >= self.max_in_flight:
+                    _, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                if control is not None and not await control.wait_turn():
+                    return False
+                pending.add(asyncio.ensure_future(job()))
+            return True
+        finally:
+            if pending:
+                await asyncio.wait(pending)
+
+    async def _album_jobs(self, paths, semaphore, run, record, control):
+        """Read every file's tags, report complete ones as skipped, and return a job
+        per album group plus one per remaining track, or None if cancelled meanwhile."""
+
+        async def read(path):
+            try:
+                async with semaphore:
+                    modifier = await self._call(tagModifier.MP3Editor, path)
+            except Exception as e:
+                record(path, "failed", str(e))
+                return None
+            if modifier.has_metadata():
+                record(path, "skipped")
+                return None
+            title, album, artist, _ = modifier.song_info()
+            member = AlbumMember(path, title, parse_track_number(modifier.track_number(), path))
+            return member, album, artist
+
+        tracks = []
+
+        async def collect(path):
+            track = await read(path)
+            if track:
+                tracks.append(track)
+
+        if not await self._run_window((partial(collect, path) for path in paths), control):
+            return None
+        groups, singles = group_albums(tracks)
+        return [partial(self._fill_album, group, semaphore, run, record) for group in groups] + [
+            partial(run, path) for path in singles
+        ]
+
+    async def fill_tracks(
+        self,
+        paths: list[str],
+        on_progress: Callable[[FillProgress], None] | None = None,
+        by_album: bool = False,
+        control: JobControl | None = None,
+    ) -> FillProgress:
+        """Look up and write metadata for every track in paths that is missing some.
+
+        Tracks that already have title, artist, album and cover are skipped. Errors,
+        including a provider that couldn't be reached, are counted and logged per track;
+        they don't stop the run. on_progress is called
+        from the event loop after each track finishes. With by_album, album folders are
+        resolved a release at a time (see albumLookup). control pauses or cancels the
+        run from another thread.
+        """
+        progress = FillProgress(total=len(paths))
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+        owns_executor = self._executor is None
+        if owns_executor:
+            self._executor = ThreadPoolExecutor(
+                max_workers=EXECUTOR_WORKERS, thread_name_prefix="lookup"
+            )
+        owns_cover_pool = self._cover_pool is None and self.cover_format is not None
+        if owns_cover_pool:
+            self._cover_pool = CoverPool()
+
+        def record(path, outcome, error=None):
+            progress.completed += 1
+            progress.last_file = path
+            progress.last_outcome = outcome
+            progress.last_error = error
+            if outcome == "updated":
+                progress.updated += 1
+            elif outcome == "skipped":
+                progress.skipped += 1
+            elif outcome == "failed":
+                progress.failed += 1
+                logger.error(f"Error auto-filling {path}: {error}")
+            if on_progress:
+                on_progress(progress)
+
+        async def run(path):
+            try:
+                outcome = await self._fill_track(path, semaphore)
+            except Exception as e:
+                record(path, "failed", str(e))
+                return
+            record(path, outcome)
+
+        if control is not None:
+            control._bind(asyncio.get_running_loop())
+
+        try:
+            if by_album:
+                jobs = await self._album_jobs(paths, semaphore, run, record, control)
+            else:
+                jobs = (partial(run, path) for path in paths)
+            progress.cancelled = jobs is None or not await self._run_window(jobs, control)
+        finally:
+            if control is not None:
+                control._unbind()
+            if owns_executor:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+            if owns_cover_pool:
+                self._cover_pool.shutdown()
+                self._cover_pool = None
+
+        return progress
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import threading
+
+from src.logging_config import setup_logging
+
+logger = setup_logging(__name__)
+
+# How many rows ahead of the focus to load: roughly one screen of held-down arrow key.
+PREFETCH_DEPTH = 16
+
+
+class MetadataPrefetcher:
+    """Loads song info for the rows the user is about to reach on a background thread.
+
+    Each request() replaces the previous one, so after a jump the worker drops what it
+    was loading for the old position instead of finishing a read-ahead nobody needs.
+    Song names are resolved on the caller's (UI) thread; the worker only reads files.
+    """
+
+    def __init__(self, view_info, depth: int = PREFETCH_DEPTH):
+        self.view_info = view_info
+        self.depth = depth
+        self._cond = threading.Condition()
+        self._pending: list[str] = []
+        self._generation = 0
+        self._stopped = False
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="metadata_prefetch", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        self._thread.join()
+        self._thread = None
+
+    def request(self, focus: int, direction: int = 1) -> None:
+        """Prefetch the rows after focus in the given direction (1 down, -1 up), wrapping
+        around the ends like list navigation does."""
+        count = self.view_info.songs_len()
+        songs = [
+            self.view_info.song_file_name((focus + direction * step) % count)
+            for step in range(1, min(self.depth, count - 1) + 1)
+        ]
+        with self._cond:
+            self._generation += 1
+            self._pending = songs
+            self._cond.notify()
+
+    def cancel(self) -> None:
+        """Drop any outstanding read-ahead."""
+        with self._cond:
+            self._generation += 1
+            self._pending = []
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                songs, generation = self._pending, self._generation
+                self._pending = []
+
+            for song in songs:
+                if generation != self._generation or self._stopped:
+                    break
+                try:
+                    self.view_info.song_info_by_name(song)
+                except Exception as e:
+                    logger.error(f"Error prefetching metadata for {song}: {e}")
@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+import asyncio
+import email.utils
+import functools
+import itertools
+import random
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass
+
+# Statuses a host uses to say "slow down": rate limited, or overloaded.
+RETRY_STATUSES = (429, 503)
+
+# Seconds of history behind the requests-per-second figures.
+THROUGHPUT_WINDOW = 10.0
+
+
+class TokenBucket:
+    """Token bucket rate limiter shared by threads and asyncio tasks.
+
+    Up to `capacity` calls go through immediately; after that callers are paced to
+    `rate` calls per second. Each acquire reserves the next free slot up front (the
+    token count may go negative), so waiters are served in arrival order and nobody
+    polls.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        """Credit the tokens earned since the last update. Call with the lock held."""
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self) -> float:
+        """Take a token and return how many seconds to wait before using it."""
+        with self._lock:
+            self._refill()
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def pause(self, delay: float) -> None:
+        """Hold back every caller, including ones already queued, for at least delay seconds."""
+        with self._lock:
+            # Refill first, or the time before the pause would be credited against it.
+            self._refill()
+            self._tokens = min(self._tokens, 1 - delay * self.rate)
+
+    def acquire(self) -> None:
+        """Block the calling thread until a call is allowed."""
+        delay = self.reserve()
+        if delay:
+            time.sleep(delay)
+
+    async def acquire_async(self) -> None:
+        """Wait, without blocking the event loop, until a call is allowed."""
+        delay = self.reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+
+class ThrottledError(Exception):
+    """A host answered 429 or 503; retry_after is its Retry-After in seconds, if it sent one."""
+
+    def __init__(self, host: str, status: int, retry_after: float | None = None):
+        super().__init__(f"{host} returned HTTP {status}")
+        self.host = host
+        self.status = status
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Seconds to wait from a Retry-After header, given as seconds or as an HTTP date."""
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+def check_response(host: str, response):
+    """Raise ThrottledError if a requests response is a 429/503, otherwise return it."""
+    if response.status_code in RETRY_STATUSES:
+        raise ThrottledError(
+            host, response.status_code, parse_retry_after(response.headers.get("Retry-After"))
+        )
+    return response
+
+
+@dataclass
+class HostLimit:
+    rate: float
+    capacity: float = 1.0
+    label: str | None = None
+
+
+@dataclass
+class RetryPolicy:
+    attempts: int = 4
+    base_delay: float = 1.0
+    # Longest backoff; a Retry-After beyond this gives up rather than stall a bulk run.
+    max_delay: float = 60.0
+
+    def backoff(self, attempt: int, retry_after: float | None, rand=random.random) -> float:
+        """Delay after the given failed attempt (0-based): exponential with full jitter,
+        but never shorter than what the server asked for."""
+        delay = rand() * min(self.max_delay, self.base_delay * 2**attempt)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+
+# Published limits: MusicBrainz allows 1 req/s per client; the others are kept polite.
+HOST_LIMITS = {
+    "musicbrainz.org": HostLimit(1.0, label="MusicBrainz"),
+    "coverartarchive.org": HostLimit(5.0, 5, label="Cover Art"),
+    "api.spotify.com": HostLimit(3.0, 5, label="Spotify"),
+}
+DEFAULT_LIMIT = HostLimit(5.0, 5)
+
+
+class HostStats:
+    """Request counters for one host."""
+
+    def __init__(self):
+        self.requests = 0
+        self.throttled = 0
+        self.retries = 0
+        self.failures = 0
+        self._recent: deque[float] = deque()
+
+    def record(self, now: float) -> None:
+        self.requests += 1
+        self._recent.append(now)
+
+    def rate(self, now: float) -> float:
+        """Requests per second over the last THROUGHPUT_WINDOW seconds."""
+        while self._recent and self._recent[0] <= now - THROUGHPUT_WINDOW:
+            self._recent.popleft()
+        return len(self._recent) / THROUGHPUT_WINDOW
+
+
+class RateLimiter:
+    """Per-host token buckets plus retry with backoff for throttled requests.
+
+    Wrap each outbound request with call() (threads) or call_async() (asyncio). The
+    request function should raise ThrottledError on a 429/503; the host's bucket is then
+    paused for the backoff, so every other caller of that host slows down too, and the
+    request is retried up to the policy's attempt limit.
+    """
+
+    def __init__(
+        self,
+        limits: dict[str, HostLimit] = HOST_LIMITS,
+        default: HostLimit = DEFAULT_LIMIT,
+        policy: RetryPolicy | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        rand: Callable[[], float] = random.random,
+    ):
+        self.limits = limits
+        self.default = default
+        self.policy = policy or RetryPolicy()
+        self._clock = clock
+        self._rand = rand
+        self._buckets: dict[str, TokenBucket] = {}
+        self._stats: dict[str, HostStats] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, host: str) -> TokenBucket:
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                limit = self.limits.get(host, self.default)
+                bucket = TokenBucket(limit.rate, limit.capacity, self._clock)
+                self._buckets[host] = bucket
+                self._stats[host] = HostStats()
+            return bucket
+
+    def _record(self, host: str) -> None:
+        with self._lock:
+            self._stats[host].record(self._clock())
+
+    def _throttled(self, host: str, error: ThrottledError, attempt: int) -> None:
+        """Back off after a throttled attempt, or re-raise once retrying is pointless."""
+        with self._lock:
+            stats = self._stats[host]
+            stats.throttled += 1
+            give_up = attempt + 1 >= self.policy.attempts or (
+                error.retry_after is not None and error.retry_after > self.policy.max_delay
+            )
+            if give_up:
+                stats.failures += 1
+            else:
+                stats.retries += 1
+        if give_up:
+            raise error
+        self.bucket(host).pause(self.policy.backoff(attempt, error.retry_after, self._rand))
+
+    def call(self, host: str, func: Callable, *args, **kwargs):
+        """Call func once host's bucket allows it, retrying while it raises ThrottledError."""
+        bucket = self.bucket(host)
+        for attempt in itertools.count():
+            bucket.acquire()
+            self._record(host)
+            try:
+                return func(*args, **kwargs)
+            except ThrottledError as e:
+                self._throttled(host, e, attempt)
+
+    async def call_async(self, host: str, func: Callable, *args, executor=None):
+        """call() for asyncio: waits on the event loop and runs func in executor."""
+        bucket = self.bucket(host)
+        loop = asyncio.get_running_loop()
+        for attempt in itertools.count():
+            await bucket.acquire_async()
+            self._record(host)
+            try:
+                return await loop.run_in_executor(executor, functools.partial(func, *args))
+            except ThrottledError as e:
+                self._throttled(host, e, attempt)
+
+    def summary(self) -> str:
+        """Live per-host throughput, e.g. "MusicBrainz 1.0/s · Spotify 0.4/s (2 throttled)"."""
+        now = self._clock()
+        parts = []
+        with self._lock:
+            for host, stats in self._stats.items():
+                if not stats.requests:
+                    continue
+                label = self.limits.get(host, self.default).label or host
+                part = f"{label} {stats.rate(now):.1f}/s"
+                if stats.throttled:
+                    part += f" ({stats.throttled} throttled)"
+                parts.append(part)
+        return " · ".join(parts)
+
+    def stats(self, host: str) -> HostStats | None:
+        with self._lock:
+            return self._stats.get(host)
+
+
+# Shared by every outbound lookup and download in the app.
+LIMITER = RateLimiter()
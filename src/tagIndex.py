@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import NamedTuple
+
+from src.logging_config import setup_logging
+
+logger = setup_logging(__name__)
+
+SCHEMA_VERSION = 4
+
+HAS_COVER = "Has cover"
+NO_COVER = "No Cover"
+
+# (file offset, length) of the raw cover image inside the song file.
+CoverLocation = tuple[int, int]
+
+
+class StatSignature(NamedTuple):
+    """The parts of os.stat() that tell us whether a file changed since it was indexed."""
+
+    size: int
+    mtime_ns: int
+    inode: int
+
+    @classmethod
+    def from_stat(cls, st: os.stat_result) -> StatSignature:
+        return cls(st.st_size, st.st_mtime_ns, st.st_ino)
+
+
+class TagIndex:
+    """Persistent SQLite index of list metadata (title/album/artist/cover flag) per file.
+
+    Rows are only trusted while the file's (size, mtime_ns, inode) signature matches
+    the one recorded when it was indexed, so a changed file is simply re-read.
+    """
+
+    def __init__(self, db_path: str | Path | None = None):
+        if db_path is None:
+            cache_home = os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache"))
+            self.db_path = Path(cache_home) / "metadata_editor" / "tag_index.sqlite3"
+        else:
+            self.db_path = Path(db_path)
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._create_schema()
+        logger.info(f"Tag index database: {self.db_path}")
+
+    def _create_schema(self) -> None:
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            if version != SCHEMA_VERSION:
+                # The index is a cache; an old layout is cheaper to rebuild than migrate.
+                self._conn.execute("DROP TABLE IF EXISTS tags")
+                self._conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS tags (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    inode INTEGER NOT NULL,
+                    title TEXT NOT NULL,
+                    album TEXT NOT NULL,
+                    artist TEXT NOT NULL,
+                    has_cover INTEGER NOT NULL,
+                    cover_offset INTEGER,
+                    cover_size INTEGER,
+                    cover_hash TEXT
+                )
+                """
+            )
+            self._conn.commit()
+
+    def get(self, path: str, signature: StatSignature) -> tuple[str, str, str, str] | None:
+        """Return the indexed song info for path, or None if missing or stale."""
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT size, mtime_ns, inode, title, album, artist, has_cover "
+                    "FROM tags WHERE path = ?",
+                    (path,),
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"Error reading tag index: {e}")
+            return None
+
+        if row is None:
+            return None
+
+        if StatSignature(*row[:3]) != signature:
+            logger.debug(f"Tag index stale for: {path}")
+            return None
+
+        title, album, artist, has_cover = row[3:]
+        return title, album, artist, HAS_COVER if has_cover else NO_COVER
+
+    def get_cover_location(self, path: str, signature: StatSignature) -> CoverLocation | None:
+        """Return where the cover image sits in the file, or None if unknown or stale."""
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT size, mtime_ns, inode, cover_offset, cover_size "
+                    "FROM tags WHERE path = ?",
+                    (path,),
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"Error reading tag index: {e}")
+            return None
+
+        if row is None or StatSignature(*row[:3]) != signature or row[3] is None:
+            return None
+        return row[3], row[4]
+
+    def get_cover_hash(self, path: str, signature: StatSignature) -> str | None:
+        """Return the content hash of the file's cover, or None if unknown or stale."""
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT size, mtime_ns, inode, cover_hash FROM tags WHERE path = ?",
+                    (path,),
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"Error reading tag index: {e}")
+            return None
+
+        if row is None or StatSignature(*row[:3]) != signature:
+            return None
+        return row[3]
+
+    def set_cover_hash(self, path: str, signature: StatSignature, cover_hash: str) -> None:
+        """Record the cover's content hash on the file's row, if it is still current."""
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "UPDATE tags SET cover_hash = ? "
+                    "WHERE path = ? AND size = ? AND mtime_ns = ? AND inode = ?",
+                    (cover_hash, path, *signature),
+                )
+                self._conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Error writing tag index: {e}")
+
+    def put(
+        self,
+        path: str,
+        signature: StatSignature,
+        info: tuple[str, str, str, str],
+        cover_location: CoverLocation | None = None,
+    ) -> None:
+        """Record the song info for path together with its current stat signature."""
+        title, album, artist, album_art = info
+        cover_offset, cover_size = cover_location or (None, None)
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO tags "
+                    "(path, size, mtime_ns, inode, title, album, artist, has_cover, "
+                    "cover_offset, cover_size) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        path,
+                        *signature,
+                        title,
+                        album,
+                        artist,
+                        int(album_art == HAS_COVER),
+                        cover_offset,
+                        cover_size,
+                    ),
+                )
+                self._conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Error writing tag index: {e}")
+
+    def remove(self, path: str) -> None:
+        """Drop the entry for path so the next lookup re-reads the file."""
+        try:
+            with self._lock:
+                self._conn.execute("DELETE FROM tags WHERE path = ?", (path,))
+                self._conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Error removing from tag index: {e}")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM tags").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -1,62 +1,188 @@
+from collections.abc import Callable, Iterable
+from contextlib import contextmanager
 from io import BytesIO
 
-import requests
-from mutagen.id3 import APIC, ID3, TALB, TIT2, TPE1
+from mutagen import PaddingInfo
+from mutagen.id3 import APIC, ID3, TALB, TIT2, TPE1, TRCK, ID3NoHeaderError
 from PIL import Image
 
 import src.trackInfo as trackInfo
+from src.id3Reader import ID3ReadError, read_list_tags
+from src.logging_config import setup_logging
+
+logger = setup_logging(__name__)
+
+# Free space kept in a tag whenever the file has to be rewritten anyway, so the
+# following edits (a cover embed included) fit in place.
+TAG_PADDING_RESERVE = 64 * 1024
+
+
+def padding_policy(reserve: int = TAG_PADDING_RESERVE) -> Callable[[PaddingInfo], int]:
+    """mutagen padding callback that never triggers a rewrite just to resize padding.
+
+    If the new tag still fits, whatever padding is left is kept as is (mutagen's
+    default would trim generous padding, forcing a full rewrite). If it doesn't fit
+    the file is being rewritten regardless, so reserve bytes are left for next time.
+    """
+
+    def policy(info: PaddingInfo) -> int:
+        if info.padding >= 0:
+            return info.padding
+        return reserve
+
+    return policy
+
+
+def repad_file(path: str, reserve: int = TAG_PADDING_RESERVE) -> bool:
+    """Rewrite path once with at least reserve bytes of tag padding.
+
+    Returns:
+        True if the file was rewritten, False if it already had enough padding.
+    """
+    try:
+        if read_list_tags(path).padding >= reserve:
+            return False
+    except ID3ReadError:
+        pass  # let mutagen have a look
+
+    try:
+        audiofile = ID3(path)
+    except ID3NoHeaderError:
+        audiofile = ID3()
+
+    rewritten = False
+
+    def policy(info: PaddingInfo) -> int:
+        nonlocal rewritten
+        if info.padding >= reserve:
+            return info.padding
+        rewritten = True
+        return reserve
+
+    audiofile.save(path, padding=policy)
+    return rewritten
+
+
+def repad_library(
+    paths: Iterable[str],
+    reserve: int = TAG_PADDING_RESERVE,
+    on_progress: Callable[[str, bool], None] | None = None,
+) -> tuple[int, int]:
+    """Repad every file in paths. Returns (rewritten, failed) counts.
+
+    Args:
+        on_progress: Called with (path, rewritten) after each file.
+    """
+    rewritten = failed = 0
+    for path in paths:
+        try:
+            changed = repad_file(path, reserve)
+        except Exception as e:
+            logger.error(f"Error repadding {path}: {e}")
+            failed += 1
+            continue
+        rewritten += changed
+        if on_progress is not None:
+            on_progress(path, changed)
+    return rewritten, failed
 
 
 class MP3Editor:
-    def __init__(self, file_path):
+    def __init__(self, file_path, padding_reserve=TAG_PADDING_RESERVE):
         self.file_path = file_path
         self.audiofile = ID3(file_path)
+        self._padding = padding_policy(padding_reserve)
+        self._transaction_depth = 0
+        self._dirty = False
+
+    @contextmanager
+    def transaction(self):
+        """Batch tag changes (text frames and covers) into a single write.
+
+        Inside the block every change only edits the in-memory tag; the file is saved
+        once when the outermost block exits, and only if something changed. If the
+        block raises, the pending changes are dropped by reloading the tag from disk.
+        """
+        self._transaction_depth += 1
+        try:
+            yield self
+        except BaseException:
+            if self._transaction_depth == 1 and self._dirty:
+                self.audiofile = ID3(self.file_path)
+            raise
+        else:
+            if self._transaction_depth == 1 and self._dirty:
+                self.audiofile.save(padding=self._padding)
+        finally:
+            self._transaction_depth -= 1
+            if self._transaction_depth == 0:
+                self._dirty = False
+
+    def _changed(self, save=True):
+        """Write a change now, or leave it to the enclosing transaction."""
+        if self._transaction_depth:
+            self._dirty = True
+        elif save:
+            self.audiofile.save(padding=self._padding)
 
     def change_artist(self, text, save=True):
         """Change artist tag. Set save=False to batch multiple changes."""
         self.audiofile.add(TPE1(encoding=3, text=text))
-        if save:
-            self.audiofile.save()
+        self._changed(save)
 
     def change_title(self, text, save=True):
         """Change title tag. Set save=False to batch multiple changes."""
         self.audiofile.add(TIT2(encoding=3, text=text))
-        if save:
-            self.audiofile.save()
+        self._changed(save)
 
     def change_album(self, text, save=True):
         """Change album tag. Set save=False to batch multiple changes."""
         self.audiofile.add(TALB(encoding=3, text=text))
-        if save:
-            self.audiofile.save()
+        self._changed(save)
+
+    def change_track_number(self, text, save=True):
+        """Change track number tag ("3" or "3/12"). Set save=False to batch multiple changes."""
+        self.audiofile.add(TRCK(encoding=3, text=text))
+        self._changed(save)
+
+    def track_number(self):
+        """The track number tag as written ("3/12"), or "" if there is none."""
+        return self.audiofile.get("TRCK").text[0] if self.audiofile.get("TRCK") else ""
 
     def save(self):
         """Explicitly save all pending changes to the file."""
-        self.audiofile.save()
+        self._changed()
 
-    def add_album_cover(self, image_link, show=False):
+    def add_album_cover(self, cover_urls, show=False):
+        """Download and embed a cover from a URL, or the first available of several
+        candidate URLs, unless the song already has one."""
+        if isinstance(cover_urls, str):
+            cover_urls = (cover_urls,)
         try:
-            resp = requests.get(image_link, stream=True, timeout=10)
-            resp.raise_for_status()
-
-            image_data = resp.content
-
-            if not self.audiofile.get("APIC:Cover"):
-                self.audiofile.add(
-                    APIC(
-                        encoding=3,
-                        mime="image/jpeg",
-                        type=3,
-                        desc="Cover",
-                        data=image_data,
-                    )
-                )
-                self.audiofile.save()
-        except requests.RequestException as e:
-            print(f"Error downloading album cover: {e}")
+            if self.audiofile.get("APIC:Cover"):
+                return
+            image_data = trackInfo.fetch_cover(cover_urls)
+            if image_data:
+                self.set_album_cover(image_data)
+            else:
+                print(f"No album cover available for {self.file_path}")
         except Exception as e:
             print(f"Error adding album cover: {e}")
 
+    def set_album_cover(self, image_data):
+        """Embed image_data as the cover unless the song already has one."""
+        if not self.audiofile.get("APIC:Cover"):
+            self.audiofile.add(
+                APIC(
+                    encoding=3,
+                    mime="image/jpeg",
+                    type=3,
+                    desc="Cover",
+                    data=image_data,
+                )
+            )
+            self._changed()
+
     def show_album_cover(self):
         """Show album cover - disabled to prevent external viewer popup."""
 
@@ -70,14 +196,13 @@ class MP3Editor:
 
     def remove_album_cover(self):
         self.audiofile.delall("APIC:Cover")
-        self.audiofile.save()
+        self._changed()
 
     def song_info(self):
         title = self.audiofile.get("TIT2").text[0] if self.audiofile.get("TIT2") else ""
         album = self.audiofile.get("TALB").text[0] if self.audiofile.get("TALB") else ""
         artist = self.audiofile.get("TPE1").text[0] if self.audiofile.get("TPE1") else ""
-        album_art = False if self.audiofile.get("APIC:Cover") == "" else True
-        album_art = "Has cover" if album_art else "No Cover"
+        album_art = "Has cover" if self.audiofile.get("APIC:Cover") else "No Cover"
         return title, album, artist, album_art
 
     def has_metadata(self):
@@ -90,33 +215,42 @@ class MP3Editor:
         return bool(title and artist and album and cover)
 
     def fill_metadata(self):
-        """Fill metadata from Spotify. Batches all ID3 changes into single save (2-3x faster)."""
+        """Fill metadata from Spotify, writing text frames and cover in a single save."""
         try:
-            title, artist, album, _ = self.song_info()
-            title, artist, album, cover = trackInfo.get_track_features(
+            title, album, artist, _ = self.song_info()
+            title, artist, album, cover_urls = trackInfo.get_track_features(
                 title, artist, album, self.file_path
             )
+            cover = None
+            if cover_urls and not self.audiofile.get("APIC:Cover"):
+                cover = trackInfo.fetch_cover(cover_urls)
+            self.apply_metadata(title, artist, album, cover)
+        except Exception as e:
+            print(f"Error filling metadata from Spotify: {e}, {self.song_info()}, {self.file_path}")
 
+    def apply_metadata(self, title, artist, album, cover, track_number=None):
+        """Write a lookup result and downloaded cover image data, skipping empty fields,
+        with a single save."""
+        with self.transaction():
             if title:
-                self.audiofile.add(TIT2(encoding=3, text=title))
+                self.change_title(title)
             if artist:
-                self.audiofile.add(TPE1(encoding=3, text=artist))
+                self.change_artist(artist)
             if album:
-                self.audiofile.add(TALB(encoding=3, text=album))
-
-            self.audiofile.save()
-
+                self.change_album(album)
+            if track_number:
+                self.change_track_number(track_number)
             if cover:
-                self.add_album_cover(cover, show=False)
-        except Exception as e:
-            print(f"Error filling metadata from Spotify: {e}, {self.song_info()}, {self.file_path}")
+                self.set_album_cover(cover)
 
     def set_cover_from_spotify(self, show_cover=True):
         try:
             if not self.audiofile.get("APIC:Cover"):
-                title, artist, album, _ = self.song_info()
-                _, _, _, cover = trackInfo.get_track_features(title, artist, album, self.file_path)
-                if cover:
-                    self.add_album_cover(cover, show=show_cover)
+                title, album, artist, _ = self.song_info()
+                _, _, _, cover_urls = trackInfo.get_track_features(
+                    title, artist, album, self.file_path
+                )
+                if cover_urls:
+                    self.add_album_cover(cover_urls, show=show_cover)
         except Exception as e:
             print(f"Error setting cover from Spotify: {e}")
@@ -1,22 +1,46 @@
 import os
 import re
+from urllib.parse import urlsplit
 
-import musicbrainzngs
 import requests
 import spotipy
 from dotenv import load_dotenv
 from spotipy.oauth2 import SpotifyClientCredentials
 
+from src.albumLookup import Release, ReleaseTrack
+from src.coverNormalizer import CoverFormat, normalize_cover
+from src.coverStore import CoverStore
+from src.httpSession import get_session
+from src.lookupCache import NOT_FOUND, LookupCache
+from src.rateLimiter import (
+    LIMITER,
+    RETRY_STATUSES,
+    ThrottledError,
+    check_response,
+    parse_retry_after,
+)
+
 load_dotenv()
 CLIENT_ID = os.getenv("CLIENT_ID")
 CLIENT_SECRET = os.getenv("CLIENT_SECRET")
 
 
 _spotify_client = None
+_lookup_cache = None
+_cover_store = None
+
+
+MUSICBRAINZ_HOST = "musicbrainz.org"
+COVER_ART_HOST = "coverartarchive.org"
+SPOTIFY_HOST = "api.spotify.com"
 
+MUSICBRAINZ_SEARCH_URL = f"https://{MUSICBRAINZ_HOST}/ws/2/recording"
+MUSICBRAINZ_RELEASE_URL = f"https://{MUSICBRAINZ_HOST}/ws/2/release"
+USER_AGENT = "MetadataEditor/0.1 ( jpsas31@gmail.com )"
 
-musicbrainzngs.set_useragent("MetadataEditor", "0.1", "jpsas31@gmail.com")
-musicbrainzngs.set_rate_limit(limit_or_interval=1.0)
+# Releases of the matched recording whose front cover is tried, in order, when the
+# archive has none for the first.
+MAX_COVER_CANDIDATES = 5
 
 
 _REGEX_FILE_EXT = re.compile(r"\.(mp3|m4a|flac|wav|ogg|aac)$", re.IGNORECASE)
@@ -52,31 +76,82 @@ def _get_spotify_client():
         client_credentials_manager = SpotifyClientCredentials(
             client_id=CLIENT_ID, client_secret=CLIENT_SECRET
         )
-        _spotify_client = spotipy.Spotify(client_credentials_manager=client_credentials_manager)
+        # On the shared session spotipy doesn't retry by itself: throttling is handled
+        # by LIMITER, which honours Retry-After without holding a thread.
+        _spotify_client = spotipy.Spotify(
+            client_credentials_manager=client_credentials_manager,
+            requests_session=get_session(),
+        )
     return _spotify_client
 
 
+class ProviderError(Exception):
+    """A provider couldn't be asked (network error, bad response). Unlike no match, this
+    says nothing about the query, so the lookup isn't cached."""
+
+
+def get_lookup_cache():
+    """Get or create the shared persistent lookup cache."""
+    global _lookup_cache
+    if _lookup_cache is None:
+        _lookup_cache = LookupCache()
+    return _lookup_cache
+
+
+def get_cover_store():
+    """Get or create the shared store of downloaded covers."""
+    global _cover_store
+    if _cover_store is None:
+        _cover_store = CoverStore()
+    return _cover_store
+
+
+def remember_lookup(cache, query, result, failures):
+    """Cache a finished lookup unless one of its steps failed, since then a miss might
+    only be the failure."""
+    if not failures:
+        cache.put(query, result)
+
+
 def get_track_features(title, artist, album, file_path):
     """
     Robustly search for track metadata using MusicBrainz and Spotify.
 
+    Results, including misses, are cached by query, so repeated lookups skip the network.
+
     Args:
         query: Search query string (filename or "artist - title" format)
 
     Returns:
-        tuple: (name, artist, album, cover_url) or (None, None, None, None) if not found
+        tuple: (name, artist, album, cover_urls) or (None, None, None, ()) if not found.
+            cover_urls are candidates for fetch_cover, best first; they aren't checked.
     """
     query = _clean_query(title, artist, album, file_path)
+    cache = get_lookup_cache()
+    cached = cache.get(query)
+    if cached is not None:
+        return cached
+
+    failures = []
+    found = (
+        _limited(failures, MUSICBRAINZ_HOST, _search_musicbrainz, query)
+        or _limited(failures, SPOTIFY_HOST, _search_spotify, query)
+        or NOT_FOUND
+    )
 
-    result = _search_musicbrainz(query)
-    if result:
-        return result
+    remember_lookup(cache, query, found, failures)
+    return found
 
-    result = _search_spotify(query)
-    if result:
-        return result
 
-    return None, None, None, None
+def _limited(failures, host, func, *args):
+    """Run a lookup step under host's rate limit. A failure (including a host that stays
+    throttled) counts as no match and is appended to failures."""
+    try:
+        return LIMITER.call(host, func, *args)
+    except (ThrottledError, ProviderError) as e:
+        print(f"Lookup on {host} failed: {e}")
+        failures.append(e)
+        return None
 
 
 def _search_musicbrainz(query):
@@ -87,18 +162,16 @@ def _search_musicbrainz(query):
         query: Search query string
 
     Returns:
-        tuple: (name, artist, album, cover_url) or None
-    """
+        tuple: (name, artist, album, cover_urls) or None
 
-    try:
-        result = musicbrainzngs.search_recordings(query=query, limit=5)
-        metadata = _extract_musicbrainz_metadata(result)
-        if metadata:
-            return metadata
-    except Exception as e:
-        print(f"MusicBrainz cleaned search failed: {e}")
-
-    return None
+    Raises:
+        ThrottledError: MusicBrainz answered 429/503
+        ProviderError: The search failed
+    """
+    result = _musicbrainz_get(
+        MUSICBRAINZ_SEARCH_URL, {"query": query, "limit": 5}, "cleaned search"
+    )
+    return _extract_musicbrainz_metadata(result)
 
 
 def _extract_musicbrainz_metadata(result):
@@ -106,15 +179,16 @@ def _extract_musicbrainz_metadata(result):
     Extract metadata from MusicBrainz search result.
 
     Args:
-        result: MusicBrainz search result dictionary
+        result: MusicBrainz JSON search result
 
     Returns:
-        tuple: (name, artist, album, cover_url) or None
+        tuple: (name, artist, album, cover_urls) or None, with the front cover of each
+            release of the recording as cover candidates
     """
-    if not result or "recording-list" not in result:
+    if not result or "recordings" not in result:
         return None
 
-    recordings = result["recording-list"]
+    recordings = result["recordings"]
     if not recordings:
         return None
 
@@ -123,31 +197,207 @@ def _extract_musicbrainz_metadata(result):
     name = recording.get("title")
     artist = None
     album = None
-    cover_url = None
+    cover_urls = ()
 
     if recording.get("artist-credit"):
         artist = recording["artist-credit"][0]["artist"]["name"]
 
-    if recording.get("release-list"):
-        album = recording["release-list"][0].get("title")
-        release_id = recording["release-list"][0].get("id")
+    releases = recording.get("releases") or []
+    if releases:
+        album = releases[0].get("title")
+        cover_urls = tuple(
+            release_cover_url(release["id"])
+            for release in releases[:MAX_COVER_CANDIDATES]
+            if release.get("id")
+        )
+
+    if name and artist:
+        return name, artist, album, cover_urls
 
-        if release_id:
-            try:
-                cover_url = f"https://coverartarchive.org/release/{release_id}/front-250"
+    return None
 
-                response = requests.head(cover_url, timeout=2)
-                if response.status_code != 200:
-                    cover_url = None
-            except Exception:
-                cover_url = None
 
-    if name and artist:
-        return name, artist, album, cover_url
+def release_cover_url(release_id):
+    return f"https://{COVER_ART_HOST}/release/{release_id}/front-250"
+
+
+def _musicbrainz_get(url, params, what):
+    """GET a MusicBrainz JSON resource, raising ThrottledError or ProviderError."""
+    try:
+        response = get_session().get(
+            url,
+            params={**params, "fmt": "json"},
+            headers={"User-Agent": USER_AGENT},
+            timeout=10,
+        )
+        check_response(MUSICBRAINZ_HOST, response)
+        response.raise_for_status()
+        return response.json()
+    except ThrottledError:
+        raise
+    except Exception as e:
+        raise ProviderError(f"MusicBrainz {what} failed: {e}") from e
+
 
+def _lucene_phrase(text):
+    return '"' + re.sub(r'["\\]', " ", text) + '"'
+
+
+def _search_musicbrainz_release(album, artist, track_count):
+    """
+    Search MusicBrainz for the release an album folder holds.
+
+    Args:
+        album: Album title
+        artist: Album artist, or "" if unknown
+        track_count: Number of files in the folder
+
+    Returns:
+        str: The best scoring release with exactly track_count tracks, else the best
+            one with more; None if no release has room for every file
+
+    Raises:
+        ThrottledError: MusicBrainz answered 429/503
+        ProviderError: The search failed
+    """
+    query = f"release:{_lucene_phrase(album)}"
+    if artist:
+        query += f" AND artist:{_lucene_phrase(artist)}"
+    result = _musicbrainz_get(MUSICBRAINZ_RELEASE_URL, {"query": query, "limit": 10}, "search")
+
+    releases = [r for r in result.get("releases") or [] if r.get("id")]
+    for fits in (
+        lambda count: count == track_count,
+        lambda count: count > track_count,
+    ):
+        for release in releases:
+            if fits(release.get("track-count") or 0):
+                return release["id"]
     return None
 
 
+def _lookup_musicbrainz_release(release_id):
+    """
+    Fetch a release with its tracklist.
+
+    Returns:
+        Release: or None if MusicBrainz returned no tracks
+
+    Raises:
+        ThrottledError: MusicBrainz answered 429/503
+        ProviderError: The lookup failed
+    """
+    result = _musicbrainz_get(
+        f"{MUSICBRAINZ_RELEASE_URL}/{release_id}",
+        {"inc": "recordings artist-credits"},
+        "release lookup",
+    )
+    return _extract_musicbrainz_release(result)
+
+
+def _credited_artist(entity):
+    credits = entity.get("artist-credit") or []
+    return credits[0]["artist"]["name"] if credits else None
+
+
+def _extract_musicbrainz_release(result):
+    """
+    Extract a Release from a MusicBrainz release lookup, numbering tracks across discs.
+
+    Returns:
+        Release: or None if the result has no tracks
+    """
+    if not result or not result.get("id"):
+        return None
+
+    tracks = []
+    number = 0
+    for medium in result.get("media") or []:
+        for track in medium.get("tracks") or []:
+            number += 1
+            title = track.get("title") or (track.get("recording") or {}).get("title")
+            if title:
+                tracks.append(ReleaseTrack(number, title, _credited_artist(track)))
+
+    if not tracks:
+        return None
+
+    # The tracklist is numbered across discs, so TRCK totals count every disc.
+    return Release(
+        id=result["id"],
+        title=result.get("title"),
+        artist=_credited_artist(result),
+        tracks=tracks,
+        cover_urls=(release_cover_url(result["id"]),),
+    )
+
+
+def fetch_cover(cover_urls, cover_format=CoverFormat()):
+    """
+    Download the first cover image available among the candidates, reusing covers
+    already downloaded for other tracks.
+
+    Args:
+        cover_urls: Candidate image URLs, best first
+        cover_format: Size new downloads are normalized to, or None to keep them as is
+
+    Returns:
+        bytes: Image data, or None if no candidate has one
+    """
+    store = get_cover_store()
+    for url in cover_urls:
+        data = store.get_by_url(url)
+        if data is None and not store.is_missing(url):
+            failures = []
+            host = urlsplit(url).hostname or ""
+            data = _limited(failures, host, _download_cover, host, url)
+            if data and cover_format is not None:
+                data = normalize_cover(data, cover_format)
+            remember_cover(store, url, data, failures)
+        if data:
+            return data
+    return None
+
+
+def remember_cover(store, url, data, failures):
+    """Store a downloaded cover, or note that url has none unless the download failed."""
+    if data:
+        store.put(url, data)
+    elif not failures:
+        store.mark_missing(url)
+
+
+def _download_cover(host, url):
+    """
+    Fetch a cover image with a single streamed GET; the body is only read once the
+    status and content type show it's an image.
+
+    Args:
+        host: Host the request is rate limited under
+        url: Image URL (the Cover Art Archive redirects to its image host)
+
+    Returns:
+        bytes: Image data, or None if there is no image at url
+
+    Raises:
+        ThrottledError: The host answered 429/503
+        ProviderError: The download failed
+    """
+    try:
+        with get_session().get(url, stream=True, timeout=10) as response:
+            check_response(host, response)
+            if response.status_code == 404:
+                return None
+            response.raise_for_status()
+            if not response.headers.get("Content-Type", "").startswith("image/"):
+                return None
+            return response.content
+    except ThrottledError:
+        raise
+    except requests.RequestException as e:
+        raise ProviderError(f"Cover download from {host} failed: {e}") from e
+
+
 def _search_spotify(query):
     """
     Search Spotify for track metadata (fallback).
@@ -156,22 +406,27 @@ def _search_spotify(query):
         query: Search query string
 
     Returns:
-        tuple: (name, artist, album, cover_url) or None
+        tuple: (name, artist, album, cover_urls) or None
+
+    Raises:
+        ThrottledError: Spotify answered 429/503
+        ProviderError: The client couldn't be set up or the search failed
     """
     try:
         sp = _get_spotify_client()
     except Exception as e:
-        print(f"Spotify client initialization failed: {e}")
-        return None
+        raise ProviderError(f"Spotify client initialization failed: {e}") from e
 
     try:
-        result = _search_and_extract(sp, query)
-        if result:
-            return result
+        return _search_and_extract(sp, query)
+    except spotipy.SpotifyException as e:
+        if e.http_status in RETRY_STATUSES:
+            raise ThrottledError(
+                SPOTIFY_HOST, e.http_status, parse_retry_after(e.headers.get("Retry-After"))
+            ) from e
+        raise ProviderError(f"Spotify cleaned search failed: {e}") from e
     except Exception as e:
-        print(f"Spotify cleaned search failed: {e}")
-
-    return None
+        raise ProviderError(f"Spotify cleaned search failed: {e}") from e
 
 
 def _search_and_extract(sp, query, limit=5):
@@ -184,7 +439,7 @@ def _search_and_extract(sp, query, limit=5):
         limit: Number of results to fetch
 
     Returns:
-        tuple: (name, artist, album, cover_url) or None if no results
+        tuple: (name, artist, album, cover_urls) or None if no results
     """
     search = sp.search(q=query, limit=limit, type="track")
 
@@ -207,7 +462,7 @@ def _search_and_extract(sp, query, limit=5):
     cover = images[0].get("url") if images else None
 
     if name and artist:
-        return name, artist, album, cover
+        return name, artist, album, (cover,) if cover else ()
 
     return None
 
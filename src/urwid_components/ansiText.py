@@ -1,9 +1,17 @@
 from collections.abc import Hashable
+from functools import lru_cache
 from typing import Literal
 
 import urwid
 
-from ansiParser import ansi_attr_parser
+from src.ansiParser import ansi_attr_parser, half_block_attr_parser
+from src.coverRenderer import CoverRuns
+
+
+@lru_cache(maxsize=4096)
+def attr_spec(fg: str, bg: str) -> urwid.AttrSpec:
+    """One shared AttrSpec per color pair; a cover repeats the same few hundred."""
+    return urwid.AttrSpec(fg, bg, 16777216)
 
 
 class ANSIText(urwid.Text):
@@ -21,11 +29,17 @@ class ANSIText(urwid.Text):
             super().set_text(text)
             return
 
-        ansi_text = ansi_attr_parser(text)
+        ansi_text = half_block_attr_parser(text)
+        if ansi_text is None:
+            ansi_text = ansi_attr_parser(text)
 
         markup = self.ansi_markup_parser(ansi_text)
         super().set_text(markup)
 
+    def set_runs(self, runs: CoverRuns) -> None:
+        """Show colored segments that are already parsed, e.g. a rendered cover."""
+        super().set_text(self.ansi_markup_parser(runs))
+
     def ansi_markup_parser(self, ansi_markup: list[tuple[str, str]]) -> list[tuple[str, str]]:
         markup = []
 
@@ -33,13 +47,12 @@ class ANSIText(urwid.Text):
             fg = c[0][0] if c[0][0] is not None and c[0][0] != "" else "default"
             bg = c[0][1] if c[0][1] is not None and c[0][1] != "" else "default"
 
-            markup.append((urwid.AttrSpec(fg, bg, 16777216), c[1]))
+            markup.append((attr_spec(fg, bg), c[1]))
         return markup
 
 
 def _test_parse_album_art_from_cache():
     """Read one album art from AlbumArtCache and parse with ANSIText.set_text."""
-    import pickle
     from pathlib import Path
 
     try:
@@ -52,19 +65,20 @@ def _test_parse_album_art_from_cache():
 
     cache = AlbumArtCache()
     album_art_size = (80, 40)
-    pkl_files = list(cache.cache_dir.glob("*.pkl"))
-    if not pkl_files:
+    ascii_art = cache.get("__test_album_art__", album_art_size)
+    if ascii_art is None:
         sample_ascii = "\x1b[31m#\x1b[0m\x1b[32m@\x1b[0m"
-        cache.set("__test_album_art__", b"dummy", sample_ascii, album_art_size)
-        ascii_art = cache.get("__test_album_art__", b"dummy", album_art_size)
-    else:
-        with open(pkl_files[0], "rb") as f:
-            ascii_art = pickle.load(f)
+        cache.set("__test_album_art__", sample_ascii, album_art_size)
+        ascii_art = cache.get("__test_album_art__", album_art_size)
     if ascii_art is None:
         print("ansiText cache test: no album art from cache, skip")
         return
     try:
-        widget = ANSIText(ascii_art)
+        if isinstance(ascii_art, str):
+            widget = ANSIText(ascii_art)
+        else:
+            widget = ANSIText("")
+            widget.set_runs(ascii_art)
         # widget.set_text(ascii_art)
         # cover_widget = ANSIWidget(ascii_art)
 
@@ -0,0 +1,68 @@
+from collections import OrderedDict
+
+import urwid
+
+from src.coverRenderer import CoverRuns
+from src.urwid_components.ansiText import ANSIText
+
+# Covers whose laid-out canvas is kept: a few albums' worth of back and forth.
+CANVAS_CACHE_SIZE = 32
+
+
+def cover_canvas(runs: CoverRuns) -> urwid.Canvas:
+    """Lay a rendered cover out once into a canvas CoverArt can show at no cost."""
+    text = ANSIText("", wrap=urwid.WrapMode.CLIP)
+    text.set_runs(runs)
+    cols, _ = text.pack()
+    return text.render((cols,))
+
+
+class CoverCanvasCache:
+    """LRU of laid-out cover canvases, keyed by (cover hash, size, color depth).
+
+    AlbumArtCache spares the decode and render of a cover; this spares turning the
+    result into urwid markup and laying it out again when a track is revisited.
+    """
+
+    def __init__(self, max_items: int = CANVAS_CACHE_SIZE):
+        self.max_items = max_items
+        self._canvases: OrderedDict[tuple[str, int, int], urwid.Canvas] = OrderedDict()
+
+    def get(self, key: tuple[str, int, int]) -> urwid.Canvas | None:
+        canvas = self._canvases.get(key)
+        if canvas is not None:
+            self._canvases.move_to_end(key)
+        return canvas
+
+    def set(self, key: tuple[str, int, int], canvas: urwid.Canvas) -> None:
+        self._canvases[key] = canvas
+        self._canvases.move_to_end(key)
+        if len(self._canvases) > self.max_items:
+            self._canvases.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._canvases)
+
+
+class CoverArt(urwid.Widget):
+    """Flow widget showing a prebuilt cover canvas, padded or clipped to the width."""
+
+    _sizing = frozenset([urwid.Sizing.FLOW])
+
+    def __init__(self, canvas: urwid.Canvas) -> None:
+        super().__init__()
+        self._canvas = canvas
+
+    def rows(self, size: tuple[int], focus: bool = False) -> int:
+        return self._canvas.rows()
+
+    def pack(self, size: tuple[int] | None = None, focus: bool = False) -> tuple[int, int]:
+        return self._canvas.cols(), self._canvas.rows()
+
+    def render(self, size: tuple[int], focus: bool = False) -> urwid.Canvas:
+        (maxcol,) = size
+        # The shared canvas is finalized; a composite over it is cheap and ours to size.
+        canvas = urwid.CompositeCanvas(self._canvas)
+        if maxcol != canvas.cols():
+            canvas.pad_trim_left_right(0, maxcol - canvas.cols())
+        return canvas
@@ -14,7 +14,7 @@ class EditorBox(urwid.Edit):
         layout=None,
         mask=None,
         tag="",
-        modifier=None,
+        on_save=None,
     ):
         super().__init__(
             caption,
@@ -28,23 +28,16 @@ class EditorBox(urwid.Edit):
             mask,
         )
         self.tag = tag
-        self.modifier = modifier
+        self.on_save = on_save
 
     def keypress(
         self,
         size: tuple[int],
         key: str,
     ) -> str | None:
-        texto_info = super().get_text()[0]
-        modifier = self.modifier()
-
         if key == "enter":
-            if self.tag == "title":
-                modifier.change_title(texto_info)
-            elif self.tag == "album":
-                modifier.change_album(texto_info)
-            elif self.tag == "artist":
-                modifier.change_artist(texto_info)
+            if self.on_save is not None:
+                self.on_save()
             return None
 
         return super().keypress(size, key)
@@ -1,5 +1,3 @@
-import os
-
 import urwid
 
 from src.logging_config import setup_logging
@@ -19,13 +17,10 @@ class EditorView(View):
         footer=None,
         header=None,
         song_list=None,
-        widget_map=None,
         view_info=None,
     ):
-        super().__init__(audio_player, footer, header, song_list, widget_map, view_info)
-        self._widget_map = widget_map
+        super().__init__(audio_player, footer, header, song_list, view_info)
         self.song_list.set_view(self)
-        self.should_update_song_list = False
         self.youtube = Youtube(self)
         self.view_info = view_info
 
@@ -70,50 +65,12 @@ class EditorView(View):
         )
         self.frame = urwid.Frame(self.columns, header=self.header, footer=self.footer)
 
-    def _update_song_list(self, *_args):
-        """Update the song list based on the current directory."""
-        current_songs = os.listdir(self.view_info.get_dir())
-        current_songs = [song for song in current_songs if song.endswith(".mp3")]
-
-        new_songs = sorted(set(current_songs) - set(self.view_info.canciones))
-        for song in new_songs:
-            self.view_info.add_song(song)
-            button = urwid.Button(song)
-            urwid.connect_signal(button, "click", self.change_focus, user_args=[song])
-            widget = urwid.AttrMap(button, None, focus_map="reversed")
-            self.song_list.walker.append(widget)
-
-            self._widget_map[song] = widget
-
-        removed_songs = [song for song in self.view_info.canciones if song not in current_songs]
-        for song in removed_songs:
-            self.view_info.delete_song(song)
-
-            if song in self._widget_map:
-                self.song_list.walker.remove(self._widget_map[song])
-                del self._widget_map[song]
-
-    def _generate_menu(self):
-        """Generate the initial menu of songs."""
-        body = []
-        for i in range(self.view_info.songs_len()):
-            song_name = self.view_info.song_file_name(i)
-            button = urwid.Button(song_name)
-            urwid.connect_signal(button, "click", self.change_focus, user_args=[song_name])
-            widget = urwid.AttrMap(button, None, focus_map="reversed")
-            body.append(widget)
-
-            self._widget_map[song_name] = widget
-        return body
-
     def change_focus(self, button, song_name):
         """Change focus between the song list and the main panel."""
-
-        for i in range(self.view_info.songs_len()):
-            if self.view_info.song_file_name(i) == song_name:
-                title, album, artist, album_art = self.view_info.song_info(i)
-                self.song_list._update_metadata_panel(i, title, album, artist, album_art)
-                break
+        index = self.view_info.index_of(song_name)
+        if index is not None:
+            title, album, artist, album_art = self.view_info.song_info(index)
+            self.song_list._update_metadata_panel(index, title, album, artist, album_art)
 
         self.columns.focus_col = 1 if self.columns.focus_col == 0 else 0
 
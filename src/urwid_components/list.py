@@ -11,9 +11,12 @@ logger = setup_logging(__name__)
 
 
 class ListMod(urwid.ListBox):
-    def __init__(self, walker, audio_player=None, key_handler=None, view_info=None):
+    def __init__(
+        self, walker, audio_player=None, key_handler=None, view_info=None, prefetcher=None
+    ):
         super().__init__(walker)
         self.view_info = view_info
+        self.prefetcher = prefetcher
         self.walker = walker
         self.view = None
         self.audio_player = audio_player
@@ -74,14 +77,25 @@ class ListMod(urwid.ListBox):
         if self.key_handler and self.key_handler.handle_key(key, CTX_LIST, context):
             return
 
-        return super().keypress(size, key)
+        # Keys the ListBox handles itself (page up/down) jump the focus.
+        result = super().keypress(size, key)
+        if self.body.focus != cursor_pos:
+            self.cancel_prefetch()
+        return result
+
+    def mouse_event(self, size, event, button, col, row, focus):
+        cursor_pos = self.body.focus
+        handled = super().mouse_event(size, event, button, col, row, focus)
+        if self.body.focus != cursor_pos:
+            self.cancel_prefetch()
+        return handled
 
     def _handle_navigation_up(self, context):
         """Handle up navigation with wrap-around."""
         new_pos = context.get("cursor_pos", 0) - 1
         if new_pos < 0:
             new_pos = len(self.body) - 1
-        self._move_focus(new_pos)
+        self._move_focus(new_pos, direction=-1)
 
     def _handle_navigation_down(self, context):
         """Handle down navigation with wrap-around."""
@@ -108,7 +122,7 @@ class ListMod(urwid.ListBox):
         if os.path.isfile(file_name):
             os.remove(file_name)
             if self.view:
-                self.view._update_song_list()
+                self.view._apply_library_delta(self.view_info.refresh([file_name]))
 
     def _handle_playback_toggle(self):
         """Toggle play/pause."""
@@ -189,8 +203,11 @@ class ListMod(urwid.ListBox):
 
             threading.Thread(target=clear_status, daemon=True).start()
 
-    def _move_focus(self, new_pos):
-        """Move focus to new position and update metadata."""
+    def _move_focus(self, new_pos, direction=1):
+        """Move focus to new position and update metadata.
+
+        direction (1 down, -1 up) tells the prefetcher which rows to read ahead.
+        """
         logger.debug(f"Moving focus to new position: {new_pos}")
         logger.debug(f"Length of body: {len(self.body)}")
         logger.debug(f"Max position: {len(self.body) - 1}")
@@ -204,9 +221,19 @@ class ListMod(urwid.ListBox):
             new_pos = max_pos
         if 0 <= new_pos <= max_pos:
             self.set_focus(new_pos)
+            self._prefetch(new_pos, direction)
             title, album, artist, album_art = self.view_info.song_info(new_pos)
             self.view.update(new_pos, title, album, artist, album_art)
 
+    def _prefetch(self, pos, direction):
+        if self.prefetcher:
+            self.prefetcher.request(pos, direction)
+
+    def cancel_prefetch(self):
+        """Drop the read-ahead for the old position after a jump or a list change."""
+        if self.prefetcher:
+            self.prefetcher.cancel()
+
     def _play_song(self, pos):
         """Play song at the given position and update footer."""
         file_name = self.view_info.song_file_name(pos)
@@ -236,6 +263,7 @@ class ListMod(urwid.ListBox):
             next_pos = 0
 
         self.set_focus(next_pos)
+        self._prefetch(next_pos, 1)
         title, album, artist, album_art = self.view_info.song_info(next_pos)
         self.view.update(next_pos, title, album, artist, album_art)
         self._play_song(next_pos)
@@ -250,6 +278,7 @@ class ListMod(urwid.ListBox):
             prev_pos = max_pos
 
         self.set_focus(prev_pos)
+        self._prefetch(prev_pos, -1)
         title, album, artist, album_art = self.view_info.song_info(prev_pos)
         self.view.update(prev_pos, title, album, artist, album_art)
         self._play_song(prev_pos)
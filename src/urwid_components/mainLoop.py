@@ -1,3 +1,4 @@
+import os
 import queue
 import threading
 from typing import Literal
@@ -5,11 +6,14 @@ from typing import Literal
 import urwid
 
 from src.keybindsConfig import load_keybinds_config
+from src.libraryWatcher import start_library_watcher
 from src.logging_config import setup_logging
 from src.media import AudioPlayer
+from src.metadataPrefetcher import MetadataPrefetcher
 
 # from src.keyHandler import KeyHandler
 from src.newkeyhandler import CTX_GLOBAL, KeyHandler
+from src.tagIndex import TagIndex
 from src.urwid_components.help import HelpDialog
 from src.urwid_components.viewManager import ViewManager
 from src.viewInfo import ViewInfo
@@ -29,13 +33,17 @@ class MainLoopManager:
         ("main shadow", "dark gray", "black"),
     ]
 
-    def __init__(self, dir):
-        self.view_info = ViewInfo(dir)
+    def __init__(self, dirs, recursive=False):
+        self.view_info = ViewInfo(dirs, tag_index=TagIndex(), recursive=recursive)
         self.keybinds_config = load_keybinds_config()
         self.key_handler = KeyHandler(config=self.keybinds_config)
         self.audio_player = AudioPlayer()
         self.initialize_key_handler()
-        self.view_manager = ViewManager(self.audio_player, self.key_handler, self.view_info)
+        self.prefetcher = MetadataPrefetcher(self.view_info)
+        self.prefetcher.start()
+        self.view_manager = ViewManager(
+            self.audio_player, self.key_handler, self.view_info, self.prefetcher
+        )
 
         self.view_manager.current_view_frame = self.view_manager.get_view("music").frame
         self.loop = urwid.MainLoop(
@@ -49,6 +57,14 @@ class MainLoopManager:
             args=[self.view_manager.current_view_frame.footer.music_bar.update_position],
         ).start()
 
+        self._library_changes = queue.SimpleQueue()
+        self._library_pipe = self.loop.watch_pipe(self._apply_library_changes)
+        self.library_watcher = start_library_watcher(
+            self.view_info.roots, self._queue_library_changes, recursive=recursive
+        )
+        if recursive:
+            self._start_library_scan()
+
         self._schedule_message_check()
 
     def initialize_key_handler(self):
@@ -74,10 +90,56 @@ class MainLoopManager:
     def _schedule_message_check(self):
         self.loop.set_alarm_in(0.5, self._check_messages)
 
+    def _queue_library_changes(self, songs):
+        """Called on the watcher thread; hands the changes to the UI thread via the pipe."""
+        self._library_changes.put(songs)
+        self._wake_library_pipe()
+
+    def _wake_library_pipe(self):
+        try:
+            os.write(self._library_pipe, b"\n")
+        except OSError:
+            pass
+
+    def _start_library_scan(self):
+        """Walk the library off the UI thread; results arrive through the library pipe."""
+        self.view_info.start_background_scan(
+            self._wake_library_pipe, on_directory=self._watch_directory
+        )
+
+    def _watch_directory(self, path, prefix):
+        """Called from the scan workers for every directory found in a recursive library."""
+        try:
+            self.library_watcher.add_directory(path, prefix)
+        except OSError as e:
+            logger.error(f"Error watching {path}: {e}")
+
+    def _apply_library_changes(self, _data):
+        """Drain queued watcher events and apply them to the song list (UI thread)."""
+        songs = set()
+        full_rescan = False
+        while True:
+            try:
+                changed = self._library_changes.get_nowait()
+            except queue.Empty:
+                break
+            if changed is None:
+                full_rescan = True
+            else:
+                songs |= changed
+
+        main_display = self.view_manager.get_view("edit")
+        scanned = self.view_info.take_scanned_songs()
+        if scanned:
+            main_display._apply_library_delta(scanned)
+        if full_rescan:
+            self._start_library_scan()
+        if songs:
+            main_display._apply_library_delta(self.view_info.refresh(songs))
+        return True
+
     def _check_messages(self, loop, *_args):
         main_display = self.view_manager.get_view("edit")
-        if main_display.should_update_song_list:
-            loop.set_alarm_in(5, main_display._update_song_list)
         try:
             msg = main_display.youtube.message_queue.get_nowait()
             if msg and main_display.text_info:
@@ -95,6 +157,11 @@ class MainLoopManager:
     def _handle_exit(self):
         """Handle exit key."""
         self.audio_player.stop_event.set()
+        self.view_info.stop_background_scan()
+        self.prefetcher.stop()
+        self.library_watcher.stop()
+        self.loop.remove_watch_pipe(self._library_pipe)
+        os.close(self._library_pipe)
         raise urwid.ExitMainLoop()
 
     def _handle_help(self):
@@ -1,19 +1,18 @@
+import asyncio
 import os
 import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from threading import Semaphore
 
 import urwid
 
 import src.tagModifier as tagModifier
+from src.autofillJob import AutofillJob
+from src.httpSession import connection_summary
 from src.logging_config import setup_logging
+from src.rateLimiter import LIMITER
 from src.urwid_components.editorBox import EditorBox
 
 # from src.urwid_components.header import EDIT_MODE, VIEW_MODE
 
-MUSICBRAINZ_RATE_LIMIT = Semaphore(4)
-PARALLEL_WORKERS = 10
-
 logger = setup_logging(__name__)
 
 
@@ -25,6 +24,8 @@ class MetadataEditor(urwid.WidgetPlaceholder):
         self.footer = footer
         self.header = header
         self.fill_progress = urwid.ProgressBar("normal", "complete")
+        self._job = None
+        self._job_running = False
         self._update_modifier()
         self._initialize_ui()
         self.original_widget = urwid.ListBox(urwid.SimpleFocusListWalker(self.contents))
@@ -45,6 +46,10 @@ class MetadataEditor(urwid.WidgetPlaceholder):
             self._create_button("Set Cover", self.set_cover),
             self._create_button("Auto-fill Fields", self.fill_fields),
             self._create_button("Auto-fill for All Songs", self.automatic_cover),
+            self._create_button("Auto-fill by Album", self.automatic_album_fill),
+            self._create_button("Pause/Resume Auto-fill", self.toggle_autofill_pause),
+            self._create_button("Cancel Auto-fill", self.cancel_autofill),
+            self._create_button("Retry Failed Auto-fills", self.retry_failed_autofill),
         ]
 
     def _create_title_widget(self, text):
@@ -62,13 +67,9 @@ class MetadataEditor(urwid.WidgetPlaceholder):
             wrap="space",
             allow_tab=False,
             tag=tag,
-            modifier=self.get_modifier,
+            on_save=self.save_fields,
         )
 
-    def get_modifier(self):
-        self._update_modifier()
-        return self.modifier
-
     def _create_button(self, label, callback):
         return urwid.AttrMap(urwid.Button(label, on_press=callback), None, focus_map="reversed")
 
@@ -79,6 +80,8 @@ class MetadataEditor(urwid.WidgetPlaceholder):
 
     def _update_modifier(self, file_name=None):
         if file_name is None:
+            if self.view_info.songs_len() == 0:
+                return
             file_name = self.view_info.song_file_name(self.song_list.focus_position)
         if not self.modifier or self.modifier.file_path != file_name:
             self.modifier = tagModifier.MP3Editor(file_name)
@@ -96,6 +99,27 @@ class MetadataEditor(urwid.WidgetPlaceholder):
             self.contents[7].set_edit_text(artist or "")
             self.contents[8].original_widget.set_label(album_art)
 
+    def save_fields(self):
+        """Write every edited field of the focused song with a single tag save."""
+        self._update_modifier()
+        if self.modifier is None or len(self.contents) <= 8:
+            return
+
+        title, album, artist, _ = self.modifier.song_info()
+        new_title = self.contents[3].get_edit_text()
+        new_album = self.contents[5].get_edit_text()
+        new_artist = self.contents[7].get_edit_text()
+
+        with self.modifier.transaction():
+            if new_title != title:
+                self.modifier.change_title(new_title)
+            if new_album != album:
+                self.modifier.change_album(new_album)
+            if new_artist != artist:
+                self.modifier.change_artist(new_artist)
+
+        self.view_info.invalidate_cache(self.modifier.file_path)
+
     def view_cover(self, _widget=None):
         try:
             self._update_modifier()
@@ -157,85 +181,106 @@ class MetadataEditor(urwid.WidgetPlaceholder):
             pass
 
     def automatic_cover(self, _widget=None):
-        threading.Thread(target=self._automatic_cover, daemon=True).start()
+        self._start_autofill()
 
-    def _process_single_track(self, index, file_name):
-        """Process a single track. Returns (success, skipped, error_msg)."""
-        try:
-            modifier = tagModifier.MP3Editor(file_name)
+    def automatic_album_fill(self, _widget=None):
+        self._start_autofill(by_album=True)
+
+    def retry_failed_autofill(self, _widget=None):
+        self._start_autofill(only_failed=True)
 
-            if modifier.has_metadata():
-                return False, True, None
+    def _start_autofill(self, by_album=False, only_failed=False):
+        if self._job_running:
+            if self.footer:
+                self.footer.set_status("Auto-fill: Already running")
+            return
+        self._job_running = True
+        threading.Thread(
+            target=self._automatic_cover, args=(by_album, only_failed), daemon=True
+        ).start()
 
-            with MUSICBRAINZ_RATE_LIMIT:
-                modifier.fill_metadata()
+    def toggle_autofill_pause(self, _widget=None):
+        if not (self._job_running and self._job):
+            return
+        if self._job.paused:
+            self._job.resume()
+            status = "Auto-fill: Resumed"
+        else:
+            self._job.pause()
+            status = "Auto-fill: Paused (tracks in flight will finish)"
+        if self.footer:
+            self.footer.set_status(status)
+
+    def cancel_autofill(self, _widget=None):
+        if self._job_running and self._job:
+            self._job.cancel()
+            if self.footer:
+                self.footer.set_status("Auto-fill: Cancelling after tracks in flight...")
 
-            self.view_info.invalidate_cache(file_name)
+    def _report_fill_progress(self, progress):
+        if progress.last_outcome == "updated":
+            self.view_info.invalidate_cache(progress.last_file)
 
-            return True, False, None
-        except Exception as e:
-            return False, False, str(e)
+        self.fill_progress.set_completion((progress.completed * 100) / progress.total)
 
-    def _automatic_cover(self):
-        """Process all songs with parallel API requests (5-10x faster for bulk operations)."""
+        if self.footer:
+            if progress.last_error:
+                self.footer.set_status(
+                    f"Auto-fill: Error on '{progress.last_file}' - "
+                    f"continuing... ({progress.completed}/{progress.total})"
+                )
+            else:
+                status = (
+                    f"Auto-fill: {progress.completed}/{progress.total} | "
+                    f"Updated: {progress.updated} | Skipped: {progress.skipped}"
+                )
+                throughput = LIMITER.summary()
+                if throughput:
+                    status += f" | {throughput}"
+                self.footer.set_status(status)
+
+    def _automatic_cover(self, by_album=False, only_failed=False):
+        """Auto-fill every song, with lookups pipelined across tracks up to each
+        provider's rate limit. With by_album, album folders are tagged from a single
+        release lookup each. Files finished by an earlier run, even one that was
+        interrupted, are left out; with only_failed just the failed ones run again."""
         import time
 
         try:
             size = self.view_info.songs_len()
-            processed = 0
-            skipped = 0
-            completed = 0
-
+            paths = [self.view_info.song_file_name(i) for i in range(size)]
+            self._job = AutofillJob(paths, by_album=by_album)
+            pending = len(self._job.failed() if only_failed else self._job.pending())
             if self.footer:
-                self.footer.set_status(f"Auto-fill: Starting... (0/{size})")
+                status = f"Auto-fill: Starting... (0/{pending})"
+                if only_failed:
+                    status = f"Auto-fill: Retrying {pending} failed... (0/{pending})"
+                elif pending < size:
+                    status += f" | {size - pending} already done"
+                self.footer.set_status(status)
 
-            tasks = [(i, self.view_info.song_file_name(i)) for i in range(size)]
+            progress = asyncio.run(
+                self._job.run(on_progress=self._report_fill_progress, only_failed=only_failed)
+            )
 
-            with ThreadPoolExecutor(max_workers=PARALLEL_WORKERS) as executor:
-                future_to_task = {
-                    executor.submit(self._process_single_track, idx, fname): (
-                        idx,
-                        fname,
-                    )
-                    for idx, fname in tasks
-                }
-
-                for future in as_completed(future_to_task):
-                    idx, file_name = future_to_task[future]
-                    completed += 1
-
-                    try:
-                        success, was_skipped, error_msg = future.result()
-
-                        if success:
-                            processed += 1
-                        elif was_skipped:
-                            skipped += 1
-                        elif error_msg:
-                            print(f"Error processing {file_name}: {error_msg}")
-
-                        progress = (completed * 100) / size
-                        self.fill_progress.set_completion(progress)
-
-                        if self.footer:
-                            if error_msg:
-                                self.footer.set_status(
-                                    f"Auto-fill: Error on '{file_name}' - "
-                                    f"continuing... ({completed}/{size})"
-                                )
-                            else:
-                                self.footer.set_status(
-                                    f"Auto-fill: {completed}/{size} | "
-                                    f"Updated: {processed} | Skipped: {skipped}"
-                                )
-                    except Exception as e:
-                        print(f"Error processing future for {file_name}: {e}")
-                        continue
+            connections = connection_summary()
+            if connections:
+                logger.info(f"Auto-fill connections: {connections}")
 
             if self.footer:
-                self.footer.set_status(
-                    f"✓ Auto-fill Complete: {processed} updated, {skipped} skipped"
+                status = (
+                    f"✓ Auto-fill Complete: {progress.updated} updated, {progress.skipped} skipped"
                 )
+                if progress.cancelled:
+                    status = (
+                        f"Auto-fill Cancelled: {progress.updated} updated, "
+                        f"{progress.total - progress.completed} left for next run"
+                    )
+                if progress.failed:
+                    status += f", {progress.failed} failed (retry available)"
+                if connections:
+                    status += f" | {connections}"
+                self.footer.set_status(status)
 
                 time.sleep(5)
                 self.footer.clear_status()
@@ -244,3 +289,5 @@ class MetadataEditor(urwid.WidgetPlaceholder):
             print(f"Error in automatic cover processing: {e}")
             if self.footer:
                 self.footer.set_status(f"✗ Auto-fill Error: {e}")
+        finally:
+            self._job_running = False
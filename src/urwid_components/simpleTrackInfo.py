@@ -1,12 +1,16 @@
+import os
 from io import BytesIO
 
 import urwid
-from climage import convert_pil
 from mutagen.id3 import ID3
 from PIL import Image, ImageFile
 
 from src.albumArtCache import AlbumArtCache
-from src.urwid_components.ansiText import ANSIText
+from src.coverRenderer import render_half_blocks, terminal_colors
+from src.coverStore import cover_hash
+from src.id3Reader import map_cover, open_cover_image
+from src.tagIndex import HAS_COVER
+from src.urwid_components.coverArt import CoverArt, CoverCanvasCache, cover_canvas
 
 
 class SimpleTrackInfo(urwid.Pile):
@@ -20,6 +24,7 @@ class SimpleTrackInfo(urwid.Pile):
         self.title_text = urwid.Text("", align="center")
         self.album_text = urwid.Text("", align="center")
         self._album_art_cache = AlbumArtCache()
+        self._cover_canvases = CoverCanvasCache()
         self.artist_text = urwid.Text("", align="center")
 
         metadata_pile = urwid.Pile(
@@ -81,12 +86,7 @@ class SimpleTrackInfo(urwid.Pile):
         self.filename_text.set_text(song_filename)
 
         try:
-            song_index = None
-            for i in range(self.view_info.songs_len()):
-                if self.view_info.song_file_name(i) == song_filename:
-                    song_index = i
-                    break
-
+            song_index = self.view_info.index_of(song_filename)
             if song_index is not None:
                 title, album, artist, album_art = self.view_info.song_info(song_index)
                 self.title_text.set_text(title)
@@ -106,33 +106,55 @@ class SimpleTrackInfo(urwid.Pile):
 
         self._update_album_art(song_filename)
 
+    def _render_album_art(self, image_hash, image_data, open_image):
+        """Laid-out canvas of the cover, from the canvas cache or else from the album art
+        cache if possible. Both are keyed by content, so tracks sharing a cover decode
+        and render it only once."""
+        album_art_size = 20 + int(min(self.size[0], self.size[1]))
+        colors = terminal_colors()
+        key = (image_hash, album_art_size, colors)
+        canvas = self._cover_canvases.get(key)
+        if canvas is not None:
+            return canvas
+
+        runs = self._album_art_cache.get(image_hash, album_art_size, colors)
+        if not runs:
+            ImageFile.LOAD_TRUNCATED_IMAGES = True
+            runs = render_half_blocks(open_image(image_data), album_art_size, colors)
+            self._album_art_cache.set(image_hash, runs, album_art_size, colors)
+        canvas = cover_canvas(runs)
+        self._cover_canvases.set(key, canvas)
+        return canvas
+
     def _update_album_art(self, song_filename):
         """Update album art for the given track."""
         if self.size is None:
             return
         try:
-            full_path = f"{self.view_info.get_dir()}/{song_filename}"
+            full_path = os.path.join(self.view_info.get_dir(), song_filename)
 
-            apic_frame = ID3(full_path).get("APIC:Cover")
-            if not apic_frame:
+            if self.view_info.song_info_by_name(song_filename)[3] != HAS_COVER:
                 self._show_placeholder()
                 return
 
-            image_data = apic_frame.data
-
-            album_art_size = 20 + int(min(self.size[0], self.size[1]))
-            cached_ascii_art = self._album_art_cache.get(full_path, image_data, album_art_size)
-
-            if cached_ascii_art:
-                ascii_art = cached_ascii_art
+            location = self.view_info.cover_location(song_filename)
+            if location is not None:
+                # Decode straight out of the page cache: no tag parse, no copies.
+                with map_cover(full_path, location) as image_data:
+                    image_hash = self.view_info.cover_hash(song_filename, image_data)
+                    canvas = self._render_album_art(image_hash, image_data, open_cover_image)
             else:
-                img = Image.open(BytesIO(image_data))
-                ImageFile.LOAD_TRUNCATED_IMAGES = True
-                ascii_art = convert_pil(img, is_unicode=True, width=album_art_size)
-
-                self._album_art_cache.set(full_path, image_data, ascii_art, album_art_size)
-
-            cover_widget = ANSIText(ascii_art, wrap=urwid.WrapMode.CLIP)
+                apic_frame = ID3(full_path).get("APIC:Cover")
+                if not apic_frame:
+                    self._show_placeholder()
+                    return
+                canvas = self._render_album_art(
+                    cover_hash(apic_frame.data),
+                    apic_frame.data,
+                    lambda data: Image.open(BytesIO(data)),
+                )
+
+            cover_widget = CoverArt(canvas)
 
             self.album_art_container = cover_widget
 
@@ -0,0 +1,80 @@
+import bisect
+from collections import OrderedDict
+
+import urwid
+
+# Enough rows for a few screens of scrolling back and forth.
+ROW_CACHE_SIZE = 256
+
+
+class SongListWalker(urwid.ListWalker):
+    """List walker backed directly by ViewInfo.canciones.
+
+    Row widgets are only built when the ListBox asks for a position (i.e. when it is
+    about to be drawn), and the most recently used ones are kept in a small LRU, so
+    startup time and memory don't grow with the size of the library.
+    """
+
+    def __init__(self, view_info, cache_size=ROW_CACHE_SIZE):
+        self.view_info = view_info
+        self.cache_size = cache_size
+        self.focus = 0
+        self._focus_song = view_info.canciones[0] if view_info.canciones else None
+        self._rows = OrderedDict()
+
+    def __len__(self):
+        return self.view_info.songs_len()
+
+    def __getitem__(self, position):
+        songs = self.view_info.canciones
+        if not 0 <= position < len(songs):
+            raise IndexError(position)
+
+        song = songs[position]
+        row = self._rows.get(song)
+        if row is None:
+            row = urwid.AttrMap(urwid.Text(song), None, focus_map="reversed")
+            self._rows[song] = row
+            if len(self._rows) > self.cache_size:
+                self._rows.popitem(last=False)
+        else:
+            self._rows.move_to_end(song)
+        return row
+
+    def next_position(self, position):
+        if position + 1 >= len(self):
+            raise IndexError(position)
+        return position + 1
+
+    def prev_position(self, position):
+        if position <= 0:
+            raise IndexError(position)
+        return position - 1
+
+    def positions(self, reverse=False):
+        if reverse:
+            return range(len(self) - 1, -1, -1)
+        return range(len(self))
+
+    def set_focus(self, position):
+        self.focus = position
+        if 0 <= position < len(self):
+            self._focus_song = self.view_info.canciones[position]
+        self._modified()
+
+    def apply_delta(self, delta):
+        """Catch up after view_info.canciones changed, keeping focus on the same song.
+
+        If the focused song itself went away, focus moves to the song that took its place.
+        """
+        for song in delta.removed:
+            self._rows.pop(song, None)
+
+        songs = self.view_info.canciones
+        if self._focus_song is not None and songs:
+            focus = bisect.bisect_left(songs, self._focus_song)
+            self.focus = min(focus, len(songs) - 1)
+        else:
+            self.focus = 0
+        self._focus_song = songs[self.focus] if songs else None
+        self._modified()
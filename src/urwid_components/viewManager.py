@@ -6,6 +6,7 @@ from src.urwid_components.footer import Footer
 from src.urwid_components.header import Header
 from src.urwid_components.list import ListMod
 from src.urwid_components.musicPlayerView import MusicPlayerView
+from src.urwid_components.songListWalker import SongListWalker
 
 logger = setup_logging(__name__)
 
@@ -13,9 +14,9 @@ logger = setup_logging(__name__)
 class ViewManager:
     """Manages different views in the application."""
 
-    def __init__(self, audio_player=None, key_handler=None, view_info=None):
+    def __init__(self, audio_player=None, key_handler=None, view_info=None, prefetcher=None):
         self.view_info = view_info
-        self._widget_map = {}
+        self.prefetcher = prefetcher
         self.audio_player = audio_player
         self.key_handler = key_handler
         self.views = {}
@@ -27,12 +28,13 @@ class ViewManager:
         """Initialize all application views."""
         shared_header = Header()
         shared_footer = Footer()
-        shared_walker = urwid.SimpleListWalker(self._generate_menu())
+        shared_walker = SongListWalker(self.view_info)
         self.shared_song_list = ListMod(
             shared_walker,
             self.audio_player,
             self.key_handler,
             self.view_info,
+            self.prefetcher,
         )
 
         if self.key_handler:
@@ -44,7 +46,6 @@ class ViewManager:
             footer=shared_footer,
             header=shared_header,
             song_list=self.shared_song_list,
-            widget_map=self._widget_map,
             view_info=self.view_info,
         )
 
@@ -53,7 +54,6 @@ class ViewManager:
             footer=shared_footer,
             header=shared_header,
             song_list=self.shared_song_list,
-            widget_map=self._widget_map,
             view_info=self.view_info,
         )
 
@@ -75,23 +75,11 @@ class ViewManager:
         """Get a view by key."""
         return self.views.get(key, {}).get("widget", None)
 
-    def _generate_menu(self):
-        """Generate the initial menu of songs."""
-        body = []
-        for i in range(self.view_info.songs_len()):
-            song_name = self.view_info.song_file_name(i)
-            text = urwid.Text(song_name)
-            widget = urwid.AttrMap(text, None, focus_map="reversed")
-            body.append(widget)
-
-            self._widget_map[song_name] = widget
-
-        return body
-
     def change_view(self, key):
         """Change the current view."""
         view = self.get_view(key)
         if view:
+            self.shared_song_list.cancel_prefetch()
             self.shared_song_list.set_view(view)
             self.current_view_frame = view.frame
         return self.current_view_frame
@@ -32,10 +32,8 @@ class CustomEdit(urwid.Edit):
         if text.endswith("\n"):
             logger.info(f"Downloading URL: {text.strip()}")
             self.toggle_read_only_text()
+            # The library watcher adds the song once yt-dlp has written it.
             self._download_url(text.strip())
-            logger.info("Updating song list")
-            self.parent._update_song_list()
-            logger.info("Song list updated")
             self.toggle_read_only_text()
         else:
             super().set_edit_text(text)
@@ -2,53 +2,264 @@ from __future__ import annotations
 
 import bisect
 import os
-from collections.abc import Mapping
+import queue
+import threading
+from collections.abc import Callable, Iterable, Mapping, Sequence
 
+from src.coverStore import cover_hash
+from src.id3Reader import read_tags
+from src.libraryScanner import LibraryScanner, ScanDelta
 from src.logging_config import setup_logging
+from src.tagIndex import CoverLocation, StatSignature, TagIndex
 
 logger = setup_logging(__name__)
 
+# Above this many new songs, one merge into canciones beats inserting each in turn.
+BATCH_ADD_THRESHOLD = 32
+
 
 class ViewInfo:
-    def __init__(self, dir: str) -> None:
-        self.dir = dir
-        os.chdir(dir)
-        self.canciones: list[str] = os.listdir(dir)
-        self.canciones = [x for x in self.canciones if "mp3" in x]
-        self.canciones.sort()
+    def __init__(
+        self,
+        dir: str | Sequence[str],
+        tag_index: TagIndex | None = None,
+        recursive: bool = False,
+    ) -> None:
+        """
+        Args:
+            dir: The music directory, or several. The app chdirs into the first one;
+                songs from the others are listed by absolute path.
+            tag_index: Persistent metadata index consulted before opening files.
+            recursive: Also list songs in subdirectories. The tree is walked by
+                start_background_scan() rather than here, so startup stays instant.
+        """
+        roots = [dir] if isinstance(dir, str) else list(dir)
+        self.dir = roots[0]
+        self.roots = [os.path.abspath(root) for root in roots]
+        self.recursive = recursive
+        self._abs_dir = self.roots[0]
+        self._tag_index = tag_index
+        os.chdir(self.dir)
+        self._scanner = LibraryScanner(self.roots, recursive=recursive)
+        self._scanned_songs: queue.SimpleQueue[ScanDelta] = queue.SimpleQueue()
+        self._scan_lock = threading.Lock()
+        self._scan_thread: threading.Thread | None = None
+        self._rescan_pending = False
+        # canciones stays sorted so positions can be found by bisection; the set
+        # answers membership without touching the list.
+        self.canciones: list[str] = [] if recursive else self._scanner.scan().added
+        self._song_set: set[str] = set(self.canciones)
         self._metadata_cache: dict[str, tuple[str, str, str, str]] = {}
+        self._invalidations = 0
 
     def get_dir(self) -> str:
         return self.dir
 
     def add_song(self, song: str) -> None:
+        if song in self._song_set:
+            return
         bisect.insort(self.canciones, song)
+        self._song_set.add(song)
+
+    def add_songs(self, songs: Iterable[str]) -> None:
+        """Add a batch of songs; cheaper than add_song() one by one for large batches."""
+        new_songs = [song for song in songs if song not in self._song_set]
+        self.canciones.extend(new_songs)
+        self._song_set.update(new_songs)
+        # Timsort merges the two sorted runs in linear time.
+        self.canciones.sort()
 
     def delete_song(self, song: str) -> None:
-        self.canciones.remove(song)
+        index = self.index_of(song)
+        if index is not None:
+            del self.canciones[index]
+            self._song_set.discard(song)
+        self.invalidate_cache(song)
+
+    def index_of(self, filename: str) -> int | None:
+        """Position of filename in canciones, or None if it isn't in the library."""
+        if filename not in self._song_set:
+            return None
+        return bisect.bisect_left(self.canciones, filename)
+
+    def start_background_scan(
+        self,
+        notify: Callable[[], None],
+        on_directory: Callable[[str, str], None] | None = None,
+    ) -> threading.Thread:
+        """Walk the library on a worker pool, streaming changes to take_scanned_songs().
+
+        New songs arrive as soon as their directory is read, removed and modified ones
+        once the walk is done. Calling this while a scan is running doesn't start a
+        second walk alongside it: the running one scans again when it finishes.
+
+        Args:
+            notify: Called from the scanning thread whenever a new batch is ready.
+            on_directory: Called with (path, key prefix) for each directory before it is read,
+                e.g. to register a filesystem watch on it.
+
+        Returns:
+            threading.Thread: The scanning thread
+        """
+        with self._scan_lock:
+            if self._scan_thread is not None:
+                self._rescan_pending = True
+                return self._scan_thread
+            self._scan_thread = threading.Thread(
+                target=self._run_scans,
+                args=(notify, on_directory),
+                name="library_scan",
+                daemon=True,
+            )
+            self._scan_thread.start()
+            return self._scan_thread
+
+    def _run_scans(
+        self,
+        notify: Callable[[], None],
+        on_directory: Callable[[str, str], None] | None,
+    ) -> None:
+        def on_added(songs: list[str]) -> None:
+            self._scanned_songs.put(ScanDelta(added=songs))
+            notify()
+
+        while True:
+            try:
+                delta = self._scanner.scan(on_added=on_added, on_directory=on_directory)
+            except OSError as e:
+                logger.error(f"Error scanning {self.roots}: {e}")
+                delta = ScanDelta()
+            if delta.removed or delta.modified:
+                self._scanned_songs.put(ScanDelta(removed=delta.removed, modified=delta.modified))
+                notify()
+
+            with self._scan_lock:
+                if not self._rescan_pending:
+                    self._scan_thread = None
+                    return
+                self._rescan_pending = False
 
-        if song in self._metadata_cache:
-            del self._metadata_cache[song]
+    def stop_background_scan(self) -> None:
+        self._scanner.cancel()
+
+    def take_scanned_songs(self) -> ScanDelta:
+        """Apply what the background scan found since the last call (UI thread only)."""
+        found: list[str] = []
+        gone: set[str] = set()
+        changed: set[str] = set()
+        while True:
+            try:
+                delta = self._scanned_songs.get_nowait()
+            except queue.Empty:
+                break
+            found.extend(delta.added)
+            gone.update(delta.removed)
+            changed.update(delta.modified)
+
+        # Watcher events may have changed some of them again since; the scanner's
+        # snapshot has the latest word on which songs exist.
+        removed = sorted(song for song in gone if song not in self._scanner)
+        for song in removed:
+            self.delete_song(song)
+        added = sorted(song for song in found if song in self._scanner)
+        self.add_songs(added)
+        modified = sorted(changed)
+        for song in modified:
+            self.invalidate_cache(song)
+        return ScanDelta(added=added, removed=removed, modified=modified)
+
+    def refresh(self, songs: Iterable[str] | None = None) -> ScanDelta:
+        """Rescan the directory and apply only the songs that changed since the last scan.
+
+        Args:
+            songs: If given, only these file names are re-checked (e.g. from watcher events).
+        """
+        delta = self._scanner.scan() if songs is None else self._scanner.rescan(songs)
+        for song in delta.removed:
+            self.delete_song(song)
+        if len(delta.added) > BATCH_ADD_THRESHOLD:
+            self.add_songs(delta.added)
+        else:
+            for song in delta.added:
+                self.add_song(song)
+        for song in delta.modified:
+            self.invalidate_cache(song)
+        return delta
 
     def song_info(self, index: int) -> tuple[str, str, str, str]:
         if len(self.canciones) == 0:
             return ("", "", "", "No Cover")
 
-        cancion = self.canciones[index]
+        return self.song_info_by_name(self.canciones[index])
+
+    def song_info_by_name(self, cancion: str) -> tuple[str, str, str, str]:
+        """Song info for a file name, loading and caching it if needed. Safe from any thread."""
+        metadata = self._metadata_cache.get(cancion)
+        if metadata is not None:
+            return metadata
+
+        invalidations = self._invalidations
+        metadata = self._load_metadata(cancion)
+        # An edit invalidated the cache while we were reading: the result may be stale.
+        if invalidations == self._invalidations:
+            self._metadata_cache[cancion] = metadata
+        return metadata
 
-        if cancion in self._metadata_cache:
-            return self._metadata_cache[cancion]
+    def _load_metadata(self, cancion: str) -> tuple[str, str, str, str]:
+        """Read song info from the tag index if the file is unchanged, else from the file."""
+        if self._tag_index is None:
+            return read_tags(cancion).song_info()
 
-        from src.tagModifier import MP3Editor
+        path = os.path.join(self._abs_dir, cancion)
+        try:
+            signature = StatSignature.from_stat(os.stat(path))
+        except OSError:
+            return read_tags(cancion).song_info()
 
-        metadata = MP3Editor(cancion).song_info()
-        self._metadata_cache[cancion] = metadata
+        metadata = self._tag_index.get(path, signature)
+        if metadata is None:
+            tags = read_tags(cancion)
+            metadata = tags.song_info()
+            self._tag_index.put(path, signature, metadata, tags.cover_location)
         return metadata
 
+    def cover_location(self, cancion: str) -> CoverLocation | None:
+        """Where the cover image of a song sits in its file, or None if there is no cover
+        or it can't be read in place (then the caller has to go through mutagen)."""
+        path = os.path.join(self._abs_dir, cancion)
+        signature = StatSignature.from_stat(os.stat(path))
+        if self._tag_index is not None:
+            location = self._tag_index.get_cover_location(path, signature)
+            if location is not None:
+                return location
+
+        tags = read_tags(cancion)
+        if self._tag_index is not None:
+            self._tag_index.put(path, signature, tags.song_info(), tags.cover_location)
+        return tags.cover_location
+
+    def cover_hash(self, cancion: str, image_data: bytes | memoryview) -> str:
+        """Content hash of a song's cover image, hashed once per file version."""
+        path = os.path.join(self._abs_dir, cancion)
+        signature = StatSignature.from_stat(os.stat(path))
+        if self._tag_index is not None:
+            digest = self._tag_index.get_cover_hash(path, signature)
+            if digest is not None:
+                return digest
+
+        digest = cover_hash(image_data)
+        if self._tag_index is not None:
+            self._tag_index.set_cover_hash(path, signature, digest)
+        return digest
+
     def invalidate_cache(self, filename: str) -> None:
         """Invalidate cache when metadata is edited."""
-        if filename in self._metadata_cache:
-            del self._metadata_cache[filename]
+        self._invalidations += 1
+        self._metadata_cache.pop(filename, None)
+
+        # mtime can be too coarse to notice an in-place edit, so drop the row explicitly.
+        if self._tag_index is not None:
+            self._tag_index.remove(os.path.join(self._abs_dir, filename))
 
     def song_file_name(self, index: int) -> str:
         if len(self.canciones) > 0:
@@ -59,12 +270,12 @@ class ViewInfo:
         return len(self.canciones)
 
     def is_song(self, filename: str) -> bool:
-        return filename in self.canciones
+        return filename in self._song_set
 
     def get_current_song(self) -> str | None:
         """Get the full path of the current/first song."""
         if len(self.canciones) > 0:
-            return f"{self.dir}/{self.canciones[0]}"
+            return os.path.join(self.dir, self.canciones[0])
         return None
 
     def get_metadata_cache(self) -> Mapping[str, tuple[str, str, str, str]]:
@@ -58,14 +58,11 @@ class Youtube:
         with yt_dlp.YoutubeDL(download_options) as ydl:
             ydl.cache.remove()
             try:
-                self.parent.should_update_song_list = True
                 logger.info(f"Downloading URL: {link}")
                 ydl.download([link])
                 logger.info("Download is Done")
-                self.parent.should_update_song_list = False
                 self.message_queue.put("Done")
                 logger.info("Done")
             except yt_dlp.utils.DownloadError as error:
-                self.parent.should_update_song_list = False
                 logger.info(f"Unable to download video with error: {error}")
                 raise yt_dlp.utils.DownloadError(f"Unable to download video with error: {error}")
@@ -1,3 +1,6 @@
+import os
+import pickle
+
 import pytest
 
 from src.albumArtCache import AlbumArtCache
@@ -8,9 +11,11 @@ class TestAlbumArtCache:
     def cache(self, tmp_path):
         return AlbumArtCache(cache_dir=tmp_path, max_memory_cache_size=3)
 
-    def test_default_cache_dir(self):
+    def test_default_cache_dir(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
         cache = AlbumArtCache()
-        assert cache.cache_dir.name == "album_art"
+        assert cache.cache_dir == tmp_path / "metadata_editor" / "album_art"
+        cache.close()
 
     def test_custom_cache_dir(self, tmp_path):
         cache = AlbumArtCache(cache_dir=tmp_path)
@@ -21,72 +26,83 @@ class TestAlbumArtCache:
         assert cache.cache_dir.exists()
 
     def test_get_cache_key(self, cache):
-        key1 = cache._get_cache_key("/path/song.mp3", b"imagedata", (80, 40))
-        key2 = cache._get_cache_key("/path/song.mp3", b"imagedata", (80, 40))
-        key3 = cache._get_cache_key("/path/song.mp3", b"differentdata", (80, 40))
-        key4 = cache._get_cache_key("/path/other.mp3", b"imagedata", (80, 40))
+        key1 = cache._get_cache_key("abc123", (80, 40))
+        key2 = cache._get_cache_key("abc123", (80, 40))
+        key3 = cache._get_cache_key("def456", (80, 40))
 
         assert key1 == key2
         assert key1 != key3
-        assert key1 != key4
 
     def test_cache_key_includes_size(self, cache):
-        key1 = cache._get_cache_key("/path/song.mp3", b"data", (80, 40))
-        key2 = cache._get_cache_key("/path/song.mp3", b"data", (80, 80))
+        key1 = cache._get_cache_key("abc123", (80, 40))
+        key2 = cache._get_cache_key("abc123", (80, 80))
 
         assert key1 != key2
 
+    def test_cache_key_includes_colors(self, cache):
+        cache.set("abc123", "art", (80, 40), colors=256)
+
+        assert cache.get("abc123", (80, 40), colors=2**24) is None
+        assert cache.get("abc123", (80, 40), colors=256) == "art"
+
+    def test_shared_cover_rendered_once(self, cache):
+        cache.set("abc123", "art", (80, 40))
+
+        cache.clear(clear_disk=False)
+
+        assert cache.get("abc123", (80, 40)) == "art"
+
     def test_set_and_get(self, cache):
         ascii_art = "test ascii art"
-        cache.set("/path/song.mp3", b"imagedata", ascii_art, (80, 40))
+        cache.set("cover", ascii_art, (80, 40))
 
-        result = cache.get("/path/song.mp3", b"imagedata", (80, 40))
+        result = cache.get("cover", (80, 40))
         assert result == ascii_art
 
     def test_get_returns_none_on_miss(self, cache):
-        result = cache.get("/path/nonexistent.mp3", b"data", (80, 40))
+        result = cache.get("nonexistent", (80, 40))
         assert result is None
 
     def test_lru_eviction(self, cache):
-        cache.set("/path/song1.mp3", b"data1", "art1", (80, 40))
-        cache.set("/path/song2.mp3", b"data2", "art2", (80, 40))
-        cache.set("/path/song3.mp3", b"data3", "art3", (80, 40))
+        cache.set("cover1", "art1", (80, 40))
+        cache.set("cover2", "art2", (80, 40))
+        cache.set("cover3", "art3", (80, 40))
 
         assert len(cache._memory_cache) == 3
 
-        cache.set("/path/song4.mp3", b"data4", "art4", (80, 40))
+        cache.set("cover4", "art4", (80, 40))
 
         assert len(cache._memory_cache) == 3
-        assert "/path/song1.mp3" not in cache._cache_access_order
+        assert "cover1" not in cache._cache_access_order
 
     def test_lru_order_preserved_on_access(self, cache):
-        cache.set("/path/song1.mp3", b"data1", "art1", (80, 40))
-        cache.set("/path/song2.mp3", b"data2", "art2", (80, 40))
+        cache.set("cover1", "art1", (80, 40))
+        cache.set("cover2", "art2", (80, 40))
 
-        cache.get("/path/song1.mp3", b"data1", (80, 40))
+        cache.get("cover1", (80, 40))
 
-        cache.set("/path/song3.mp3", b"data3", "art3", (80, 40))
-        cache.set("/path/song4.mp3", b"data4", "art4", (80, 40))
+        cache.set("cover3", "art3", (80, 40))
+        cache.set("cover4", "art4", (80, 40))
 
-        assert "/path/song2.mp3" not in cache._memory_cache
+        assert "cover2" not in cache._memory_cache
 
     def test_clear_memory_only(self, cache):
-        cache.set("/path/song1.mp3", b"data1", "art1", (80, 40))
+        cache.set("cover1", "art1", (80, 40))
         cache.clear(clear_disk=False)
 
         assert len(cache._memory_cache) == 0
         assert len(cache._cache_access_order) == 0
 
     def test_clear_disk(self, cache):
-        cache.set("/path/song1.mp3", b"data1", "art1", (80, 40))
+        cache.set("cover1", "art1", (80, 40))
 
         cache.clear(clear_disk=True)
 
         assert len(cache._memory_cache) == 0
 
     def test_get_cache_stats(self, cache):
-        cache.set("/path/song1.mp3", b"data1", "art1", (80, 40))
-        cache.set("/path/song2.mp3", b"data2", "art2", (80, 40))
+        cache.set("cover1", "art1", (80, 40))
+        cache.set("cover2", "art2", (80, 40))
 
         stats = cache.get_cache_stats()
 
@@ -99,3 +115,78 @@ class TestAlbumArtCache:
     def test_get_cache_size(self, cache):
         size = cache.get_cache_size()
         assert size >= 0
+
+    def test_disk_entry_survives_new_instance(self, cache, tmp_path):
+        runs = [(("h21", "h196"), "▄▄"), ((None, None), "\n")]
+        cache.set("a" * 64, runs, 40)
+        cache.close()
+
+        reopened = AlbumArtCache(cache_dir=tmp_path)
+        assert reopened.get("a" * 64, 40) == runs
+
+    def test_stats_track_disk_entries(self, cache):
+        cache.set("cover1", "art1", (80, 40))
+        cache.set("cover2", "art2" * 100, (80, 40))
+        size = cache.get_cache_size()
+
+        cache.set("cover1", "replaced" * 10, (80, 40))
+        stats = cache.get_cache_stats()
+
+        assert stats.disk_items == 2
+        assert stats.disk_size_bytes > size
+        blobs = cache._conn.execute("SELECT SUM(length(data)) FROM renders").fetchone()[0]
+        assert stats.disk_size_bytes == blobs
+
+    def test_clear_disk_resets_stats(self, cache):
+        cache.set("cover1", "art1", (80, 40))
+
+        cache.clear(clear_disk=True)
+
+        assert cache.get("cover1", (80, 40)) is None
+        assert cache.get_cache_stats().disk_items == 0
+        assert cache.get_cache_size() == 0
+
+
+class TestPickleMigration:
+    def _write(self, path, value):
+        with open(path, "wb") as f:
+            pickle.dump(value, f)
+
+    def test_old_renderings_migrated(self, tmp_path):
+        image_hash = "b" * 64
+        ansi = "\x1b[48;5;196m\x1b[38;5;21m▄\x1b[48;5;196m\x1b[38;5;21m▄\x1b[0m\n"
+        runs = [(("h1", "h2"), "▄"), ((None, None), "\n")]
+        self._write(tmp_path / f"{image_hash}_40.pkl", ansi)
+        self._write(tmp_path / f"{image_hash}_60_16777216.pkl", runs)
+
+        cache = AlbumArtCache(cache_dir=tmp_path)
+
+        assert cache.get(image_hash, 40, colors=256) == [
+            (("h21", "h196"), "▄▄"),
+            ((None, None), "\n"),
+        ]
+        assert cache.get(image_hash, 60, colors=2**24) == runs
+        assert cache.get_cache_stats().disk_items == 2
+        assert not list(tmp_path.glob("*.pkl"))
+
+    def test_path_keyed_files_dropped(self, tmp_path):
+        self._write(tmp_path / f"{'c' * 32}_{'d' * 32}_40.pkl", "art")
+
+        cache = AlbumArtCache(cache_dir=tmp_path)
+
+        assert cache.get_cache_stats().disk_items == 0
+        assert not list(tmp_path.glob("*.pkl"))
+
+    def test_pickled_objects_not_loaded(self, tmp_path):
+        marker = tmp_path / "ran"
+
+        class Exploit:
+            def __reduce__(self):
+                return os.system, (f"touch {marker}",)
+
+        self._write(tmp_path / f"{'e' * 64}_40.pkl", Exploit())
+
+        cache = AlbumArtCache(cache_dir=tmp_path)
+
+        assert not marker.exists()
+        assert cache.get("e" * 64, 40) is None
@@ -0,0 +1,100 @@
+from src.albumLookup import (
+    AlbumMember,
+    Release,
+    ReleaseTrack,
+    group_albums,
+    match_tracks,
+    parse_track_number,
+)
+
+
+def make_release(*titles):
+    tracks = [ReleaseTrack(n, title) for n, title in enumerate(titles, 1)]
+    return Release("rel-1", "Album", "Artist", tracks)
+
+
+class TestParseTrackNumber:
+    def test_from_tag(self):
+        assert parse_track_number("3/12", "song.mp3") == 3
+        assert parse_track_number("7") == 7
+
+    def test_from_file_name(self):
+        assert parse_track_number("", "/music/03 - Song.mp3") == 3
+        assert parse_track_number(None, "1-05 Song.mp3") == 5
+
+    def test_none(self):
+        assert parse_track_number("", "Song.mp3") is None
+        assert parse_track_number("0", "00.mp3") is None
+
+
+class TestGroupAlbums:
+    def test_groups_by_directory_and_album(self):
+        tracks = [
+            (AlbumMember("/music/a/1.mp3"), "Album", "Artist"),
+            (AlbumMember("/music/a/2.mp3"), "album", "Artist"),
+            (AlbumMember("/music/a/3.mp3"), "Album", "Guest"),
+            (AlbumMember("/music/b/1.mp3"), "Album", "Artist"),
+        ]
+
+        groups, singles = group_albums(tracks)
+
+        assert len(groups) == 1
+        assert [m.path for m in groups[0].members] == [
+            "/music/a/1.mp3",
+            "/music/a/2.mp3",
+            "/music/a/3.mp3",
+        ]
+        assert groups[0].artist == "Artist"
+        assert singles == ["/music/b/1.mp3"]
+
+    def test_untagged_folder_searched_by_name(self):
+        tracks = [(AlbumMember(f"/music/Some Album/{i}.mp3"), "", "") for i in range(3)]
+
+        groups, _ = group_albums(tracks)
+
+        assert groups[0].query_album == "Some Album"
+        assert groups[0].artist == ""
+
+
+class TestMatchTracks:
+    def test_matches_by_title(self):
+        release = make_release("First Song", "Second Song", "Third Song")
+        members = [
+            AlbumMember("b.mp3", "second song"),
+            AlbumMember("a.mp3", "First Song (Remastered)"),
+        ]
+
+        matches = match_tracks(release, members)
+
+        assert matches["b.mp3"].number == 2
+        assert matches["a.mp3"].number == 1
+
+    def test_matches_by_file_name(self):
+        release = make_release("Intro", "Hello World")
+
+        matches = match_tracks(release, [AlbumMember("/x/02 - Artist - Hello World.mp3")])
+
+        assert matches["/x/02 - Artist - Hello World.mp3"].title == "Hello World"
+
+    def test_track_number_alone(self):
+        release = make_release("Intro", "Hello World")
+
+        matches = match_tracks(release, [AlbumMember("/x/02.mp3", track_number=2)])
+
+        assert matches["/x/02.mp3"].title == "Hello World"
+
+    def test_each_track_used_once(self):
+        release = make_release("Song")
+        members = [AlbumMember("a.mp3", "Song"), AlbumMember("b.mp3", "Song")]
+
+        assert len(match_tracks(release, members)) == 1
+
+    def test_unrelated_file_unmatched(self):
+        release = make_release("Song One", "Song Two")
+
+        assert match_tracks(release, [AlbumMember("x.mp3", "Completely Different")]) == {}
+
+    def test_track_number_value(self):
+        release = make_release("A", "B", "C")
+
+        assert release.track_number(release.tracks[1]) == "2/3"
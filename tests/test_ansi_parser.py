@@ -1,8 +1,37 @@
+import urwid
+from PIL import Image
+
 from src.ansiParser import (
     ansi_attr_parser,
     get_urwid_color_code,
+    half_block_attr_parser,
     rgb_to_hex,
 )
+from src.coverRenderer import TRUE_COLORS, render_half_blocks
+from src.urwid_components.ansiText import ANSIText
+
+
+def _climage_art(rows=((196, 196, 21, 21), (21, 46, 46, 46))):
+    """Half-block text the way climage writes it: background (top pixel) and
+    foreground (bottom pixel) escapes before every cell, a reset after every row."""
+    art = ""
+    for row in rows:
+        for top, bottom in zip(row, row[1:] + row[:1], strict=True):
+            art += f"\x1b[48;5;{top}m\x1b[38;5;{bottom}m▄"
+        art += "\x1b[0m\n"
+    return art
+
+
+def _merged(segments):
+    """Join neighbouring segments with the same colors, treating "" as no color."""
+    merged = []
+    for (fg, bg), text in segments:
+        attr = (fg or None, bg or None)
+        if merged and merged[-1][0] == attr:
+            merged[-1] = (attr, merged[-1][1] + text)
+        else:
+            merged.append((attr, text))
+    return merged
 
 
 class TestRgbToHex:
@@ -127,3 +156,51 @@ class TestAnsiAttrParser:
     def test_strikethrough(self):
         result = ansi_attr_parser("\x1b[9mStrikethrough\x1b[0m")
         assert result[0][0][0] == "strikethrough"
+
+
+class TestHalfBlockAttrParser:
+    def test_matches_general_parser(self):
+        art = _climage_art()
+        assert half_block_attr_parser(art) == _merged(ansi_attr_parser(art))
+
+    def test_runs_of_same_colors_are_one_segment(self):
+        cell = "\x1b[48;5;196m\x1b[38;5;21m▄"
+        result = half_block_attr_parser(cell * 3 + "\x1b[48;5;196m\x1b[38;5;196m▄\x1b[0m\n")
+        assert result == [
+            (("h21", "h196"), "▄▄▄"),
+            (("h196", "h196"), "▄"),
+            ((None, None), "\n"),
+        ]
+
+    def test_other_text_falls_back(self):
+        assert half_block_attr_parser("\x1b[31mRed\x1b[0m") is None
+        assert half_block_attr_parser("plain \x1b[48;5;1m\x1b[38;5;2m▄") is None
+        assert half_block_attr_parser("") is None
+
+
+class TestANSIText:
+    def test_half_block_text_renders_like_general_parser(self):
+        art = _climage_art()
+        widget = ANSIText(art)
+        expected = urwid.Text(widget.ansi_markup_parser(ansi_attr_parser(art)))
+        assert widget.get_text() == expected.get_text()
+
+    def test_attr_specs_are_shared(self):
+        widget = ANSIText(_climage_art())
+        specs = [attr for attr, _ in widget.get_text()[1]]
+        other = [attr for attr, _ in ANSIText(_climage_art()).get_text()[1]]
+        assert all(a is b for a, b in zip(specs, other, strict=True))
+
+    def test_set_runs_renders_like_set_text(self):
+        art = _climage_art()
+        widget = ANSIText("")
+        widget.set_runs(half_block_attr_parser(art))
+        assert widget.get_text() == ANSIText(art).get_text()
+
+    def test_set_runs_of_rendered_cover(self):
+        runs = render_half_blocks(Image.new("RGB", (4, 4), (255, 0, 0)), 4, TRUE_COLORS)
+        widget = ANSIText("")
+        widget.set_runs(runs)
+        text, attrs = widget.get_text()
+        assert text == "▄▄▄▄\n▄▄▄▄\n"
+        assert attrs[0][0] == urwid.AttrSpec("#ff0000", "#ff0000", 2**24)
@@ -0,0 +1,236 @@
+import asyncio
+import json
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.autofillJob import AutofillJob, JobJournal
+from src.lookupCache import NOT_FOUND_TTL
+from src.lookupEngine import FillProgress, JobControl, LookupEngine
+from src.rateLimiter import HostLimit, RateLimiter, RetryPolicy
+from src.trackInfo import ProviderError
+
+
+@pytest.fixture
+def music(tmp_path):
+    music = tmp_path / "music"
+    music.mkdir()
+    paths = []
+    for name in ("a.mp3", "b.mp3", "c.mp3"):
+        (music / name).write_bytes(b"audio")
+        paths.append(str(music / name))
+    return paths
+
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = JobJournal(tmp_path / "journal.jsonl")
+    yield journal
+    journal.close()
+
+
+class FakeEngine:
+    """Stands in for LookupEngine, reporting a fixed outcome per file."""
+
+    def __init__(self, outcomes):
+        self.outcomes = outcomes
+        self.calls = []
+
+    async def fill_tracks(self, paths, on_progress=None, by_album=False, control=None):
+        self.calls.append(list(paths))
+        progress = FillProgress(total=len(paths))
+        for path in paths:
+            progress.completed += 1
+            progress.last_file = path
+            progress.last_outcome = self.outcomes.get(path, "updated")
+            on_progress(progress)
+        return progress
+
+
+class TestJobJournal:
+    def test_default_path(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+        journal = JobJournal()
+        assert journal.journal_path == tmp_path / "metadata_editor" / "autofill_journal.jsonl"
+        journal.close()
+
+    def test_done_outcomes(self, journal, music):
+        journal.record(music[0], "updated")
+        journal.record(music[1], "failed", "timeout")
+
+        assert journal.is_done(music[0])
+        assert not journal.is_done(music[1])
+        assert journal.is_failed(music[1])
+        assert not journal.is_done(music[2])
+
+    def test_changed_file_not_done(self, journal, music):
+        journal.record(music[0], "not_found")
+
+        with open(music[0], "ab") as f:
+            f.write(b"more")
+
+        assert not journal.is_done(music[0])
+
+    def test_not_found_goes_stale(self, tmp_path, music):
+        now = [1000.0]
+        journal = JobJournal(tmp_path / "journal.jsonl", clock=lambda: now[0])
+        journal.record(music[0], "not_found")
+        assert journal.is_done(music[0])
+
+        now[0] += NOT_FOUND_TTL + 1
+
+        assert not journal.is_done(music[0])
+        journal.close()
+
+    def test_survives_restart_and_torn_line(self, tmp_path, music):
+        path = tmp_path / "journal.jsonl"
+        first = JobJournal(path)
+        first.record(music[0], "updated")
+        first.close()
+        with open(path, "a") as f:
+            f.write('{"path": "/x", "outc')
+
+        second = JobJournal(path)
+
+        assert second.is_done(music[0])
+        assert len(second) == 1
+        second.close()
+
+    def test_compacts_repeated_entries(self, tmp_path, music):
+        path = tmp_path / "journal.jsonl"
+        first = JobJournal(path)
+        for _ in range(10):
+            first.record(music[0], "failed")
+        first.record(music[0], "updated")
+        first.close()
+
+        second = JobJournal(path)
+
+        lines = path.read_text().splitlines()
+        assert len(lines) == 1
+        assert json.loads(lines[0])["outcome"] == "updated"
+        assert second.is_done(music[0])
+        second.close()
+
+    def test_clear(self, journal, music):
+        journal.record(music[0], "updated")
+        journal.clear()
+
+        assert not journal.is_done(music[0])
+        assert journal.journal_path.read_text() == ""
+
+
+class TestAutofillJob:
+    def test_resumes_from_checkpoint(self, journal, music):
+        journal.record(music[0], "updated")
+        engine = FakeEngine({})
+
+        job = AutofillJob(music, journal=journal, engine=engine)
+        progress = asyncio.run(job.run())
+
+        assert engine.calls == [music[1:]]
+        assert job.resumed == 1
+        assert progress.completed == 2
+        assert all(journal.is_done(path) for path in music)
+
+    def test_retry_failed_only(self, journal, music):
+        engine = FakeEngine({music[1]: "failed"})
+        job = AutofillJob(music, journal=journal, engine=engine)
+        asyncio.run(job.run())
+
+        engine.outcomes = {}
+        asyncio.run(job.retry_failed())
+
+        assert engine.calls[1] == [music[1]]
+        assert job.failed() == []
+
+    def test_reports_progress(self, journal, music):
+        on_progress = MagicMock()
+        job = AutofillJob(music, journal=journal, engine=FakeEngine({}))
+
+        asyncio.run(job.run(on_progress=on_progress))
+
+        assert on_progress.call_count == 3
+
+    def test_cancelled_control_replaced_on_next_run(self, journal, music):
+        job = AutofillJob(music, journal=journal, engine=FakeEngine({}))
+        job.cancel()
+
+        asyncio.run(job.run())
+
+        assert not job.control.cancelled
+
+    @patch("src.trackInfo._search_spotify", return_value=None)
+    @patch("src.trackInfo._search_musicbrainz")
+    @patch("src.lookupEngine.tagModifier.MP3Editor")
+    def test_network_outage_retried_next_run(
+        self, mock_editor_class, mock_mb, mock_spotify, journal, music
+    ):
+        editor = MagicMock()
+        editor.has_metadata.return_value = False
+        editor.song_info.return_value = ("Title", "Album", "Artist", "No Cover")
+        mock_editor_class.return_value = editor
+        limiter = RateLimiter(
+            limits={}, default=HostLimit(1e9, 1e9), policy=RetryPolicy(base_delay=0)
+        )
+        engine = LookupEngine(
+            limiter=limiter, cache=MagicMock(get=lambda query: None), cover_store=MagicMock()
+        )
+        job = AutofillJob(music[:1], journal=journal, engine=engine)
+
+        mock_mb.side_effect = ProviderError("network unreachable")
+        first = asyncio.run(job.run())
+
+        assert first.failed == 1
+        assert job.pending() == music[:1]
+        assert job.failed() == music[:1]
+
+        mock_mb.side_effect = None
+        mock_mb.return_value = ("N", "A", "B", ())
+        second = asyncio.run(job.run())
+
+        assert second.updated == 1
+        assert job.pending() == []
+        editor.apply_metadata.assert_called_once_with("N", "A", "B", None)
+
+
+class TestJobControl:
+    def test_pause_and_resume_from_another_thread(self, journal, music):
+        control = JobControl()
+        control.pause()
+        engine = LookupEngine(cache=MagicMock(), cover_store=MagicMock())
+        started = []
+        started_while_paused = []
+
+        async def fake_fill(path, semaphore):
+            started.append(path)
+            return "updated"
+
+        def resume():
+            started_while_paused.extend(started)
+            control.resume()
+
+        engine._fill_track = fake_fill
+        threading.Timer(0.05, resume).start()
+
+        progress = asyncio.run(engine.fill_tracks(music, control=control))
+
+        assert started_while_paused == []
+        assert started == music
+        assert not progress.cancelled
+
+    def test_cancel_stops_submitting(self, music):
+        control = JobControl()
+        engine = LookupEngine(max_in_flight=1, cache=MagicMock(), cover_store=MagicMock())
+
+        async def fake_fill(path, semaphore):
+            control.cancel()
+            return "updated"
+
+        engine._fill_track = fake_fill
+
+        progress = asyncio.run(engine.fill_tracks(music, control=control))
+
+        assert progress.cancelled
+        assert progress.completed == 1
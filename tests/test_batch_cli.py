@@ -0,0 +1,197 @@
+import json
+import subprocess
+import sys
+from functools import partial
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+try:
+    from mutagen.id3 import ID3, TIT2
+
+    from src.autofillJob import JobJournal
+    from src.batchCli import EXIT_FAILURES, EXIT_INTERRUPTED, EXIT_OK, build_parser, main
+    from src.coverNormalizer import CoverFormat
+    from src.id3Reader import ID3ReadError
+    from src.lookupEngine import FillProgress, LookupEngine
+    from src.rateLimiter import HostLimit, RateLimiter, RetryPolicy
+    from src.trackInfo import ProviderError
+except ImportError:
+    pytest.skip("batchCli dependencies not available", allow_module_level=True)
+
+
+def events(capsys):
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+
+@pytest.fixture
+def library(tmp_path):
+    music = tmp_path / "music"
+    music.mkdir()
+    for name in ("a.mp3", "b.mp3"):
+        path = music / name
+        path.write_bytes(b"\xff\xfb" + b"\0" * 1024)
+        tags = ID3()
+        tags.add(TIT2(encoding=3, text=name.upper()))
+        tags.save(path)
+    return music
+
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = JobJournal(tmp_path / "journal.jsonl")
+    with patch("src.batchCli.get_journal", return_value=journal):
+        yield journal
+    journal.close()
+
+
+engines = []
+
+
+def fake_engine(outcomes, cancelled=False):
+    class FakeEngine:
+        def __init__(self, max_in_flight, executor, cover_format):
+            self.max_in_flight = max_in_flight
+            self.cover_format = cover_format
+            engines.append(self)
+
+        async def fill_tracks(self, paths, on_progress=None, by_album=False, control=None):
+            print("stray output from a provider client")
+            progress = FillProgress(total=len(paths), cancelled=cancelled)
+            for path in paths:
+                outcome = outcomes.get(path.rsplit("/", 1)[-1], "updated")
+                progress.completed += 1
+                progress.last_file = path
+                progress.last_outcome = outcome
+                progress.updated += outcome == "updated"
+                progress.failed += outcome == "failed"
+                on_progress(progress)
+            return progress
+
+    return FakeEngine
+
+
+class TestBatchCli:
+    def test_parser_defaults(self):
+        args = build_parser().parse_args(["autofill", "/music"])
+
+        assert args.dirs == ["/music"]
+        assert (args.jobs, args.workers) == (16, 8)
+        assert not (args.by_album or args.retry_failed or args.fresh or args.recursive)
+
+    def test_rejects_bad_parallelism(self):
+        with pytest.raises(SystemExit) as exc_info:
+            main(["autofill", "--jobs", "0", "/music"])
+
+        assert exc_info.value.code == 2
+
+    def test_tags(self, library, capsys):
+        assert main(["tags", str(library)]) == EXIT_OK
+
+        lines = events(capsys)
+        assert [(e["title"], e["has_cover"]) for e in lines] == [("A.MP3", False), ("B.MP3", False)]
+
+    def test_tags_fall_back_to_mutagen(self, library, capsys):
+        with patch("src.id3Reader.read_list_tags", side_effect=ID3ReadError("unsynchronised")):
+            assert main(["tags", str(library)]) == EXIT_OK
+
+        assert [e["title"] for e in events(capsys)] == ["A.MP3", "B.MP3"]
+
+    def test_tags_unreadable_file(self, library, capsys):
+        (library / "c.mp3").write_bytes(b"not an mp3")
+
+        assert main(["tags", str(library)]) == EXIT_FAILURES
+
+        lines = events(capsys)
+        assert lines[-1]["path"].endswith("c.mp3")
+        assert "error" in lines[-1]
+
+    def test_autofill_json_lines(self, library, journal, capsys):
+        with patch("src.batchCli.LookupEngine", fake_engine({})):
+            assert main(["autofill", "-j", "4", str(library)]) == EXIT_OK
+
+        captured = capsys.readouterr()
+        lines = [json.loads(line) for line in captured.out.splitlines()]
+        assert [e["event"] for e in lines] == ["start", "track", "track", "summary"]
+        assert lines[0]["pending"] == 2
+        assert lines[-1]["updated"] == 2
+        assert "stray output" in captured.err
+
+    def test_cover_format_flags(self, library, journal, capsys):
+        with patch("src.batchCli.LookupEngine", fake_engine({})):
+            main(["autofill", "--cover-size", "300", "--cover-kib", "40", str(library)])
+            main(["autofill", "--fresh", "--keep-covers", str(library)])
+
+        assert engines[-2].cover_format == CoverFormat(300, 40 * 1024)
+        assert engines[-1].cover_format is None
+
+    def test_autofill_resumes(self, library, journal, capsys):
+        journal.record(str(library / "a.mp3"), "updated")
+
+        with patch("src.batchCli.LookupEngine", fake_engine({})):
+            main(["autofill", str(library)])
+
+        summary = events(capsys)[-1]
+        assert (summary["total"], summary["resumed"]) == (1, 1)
+
+    def test_autofill_failures_exit_code(self, library, journal, capsys):
+        with patch("src.batchCli.LookupEngine", fake_engine({"b.mp3": "failed"})):
+            assert main(["autofill", str(library)]) == EXIT_FAILURES
+
+        with patch("src.batchCli.LookupEngine", fake_engine({})):
+            assert main(["autofill", "--retry-failed", str(library)]) == EXIT_OK
+
+        last = events(capsys)
+        assert [e["path"] for e in last if e["event"] == "track"][-1].endswith("b.mp3")
+
+    @patch("src.trackInfo._search_spotify", side_effect=ProviderError("network unreachable"))
+    @patch("src.trackInfo._search_musicbrainz", side_effect=ProviderError("network unreachable"))
+    def test_autofill_outage_exit_code(self, mock_mb, mock_spotify, library, journal, capsys):
+        limiter = RateLimiter(
+            limits={}, default=HostLimit(1e9, 1e9), policy=RetryPolicy(base_delay=0)
+        )
+        engine = partial(
+            LookupEngine,
+            limiter=limiter,
+            cache=MagicMock(get=lambda query: None),
+            cover_store=MagicMock(),
+        )
+
+        with patch("src.batchCli.LookupEngine", engine):
+            assert main(["autofill", str(library)]) == EXIT_FAILURES
+
+        summary = events(capsys)[-1]
+        assert (summary["failed"], summary["not_found"]) == (2, 0)
+
+    def test_autofill_cancelled_exit_code(self, library, journal, capsys):
+        with patch("src.batchCli.LookupEngine", fake_engine({}, cancelled=True)):
+            assert main(["autofill", str(library)]) == EXIT_INTERRUPTED
+
+    def test_repad(self, library, capsys):
+        assert main(["repad", "--padding-kib", "8", str(library)]) == EXIT_OK
+
+        summary = events(capsys)[-1]
+        assert (summary["total"], summary["rewritten"], summary["failed"]) == (2, 2, 0)
+
+    def test_main_repad_delegates_to_batch(self, library, capsys):
+        import main as app
+
+        argv = ["main.py", "--repad", "--padding-kib", "8", str(library)]
+        with patch.object(sys, "argv", argv), pytest.raises(SystemExit) as exc_info:
+            app.main()
+
+        assert exc_info.value.code == EXIT_OK
+        lines = events(capsys)
+        assert lines[0] == {"event": "start", "command": "repad", "files": 2}
+        assert lines[-1]["event"] == "summary"
+
+    def test_does_not_import_ui(self):
+        code = (
+            "import sys, src.batchCli; "
+            "print(sorted({m.split('.')[0] for m in sys.modules} & {'urwid', 'miniaudio'}))"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        )
+
+        assert result.stdout.strip() == "[]"
@@ -0,0 +1,65 @@
+import urwid
+from PIL import Image
+
+from src.coverRenderer import TRUE_COLORS, render_half_blocks
+from src.urwid_components.coverArt import CoverArt, CoverCanvasCache, cover_canvas
+
+
+def _canvas(color=(255, 0, 0), width=4):
+    return cover_canvas(render_half_blocks(Image.new("RGB", (width, width), color), width))
+
+
+def _text(canvas):
+    return [line.decode() for line in canvas.text]
+
+
+class TestCoverCanvas:
+    def test_laid_out_like_text(self):
+        runs = render_half_blocks(Image.new("RGB", (4, 4), (255, 0, 0)), 4, TRUE_COLORS)
+        canvas = cover_canvas(runs)
+        assert (canvas.cols(), canvas.rows()) == (4, 3)
+        assert _text(canvas) == ["▄▄▄▄", "▄▄▄▄", "    "]
+
+
+class TestCoverArt:
+    def test_renders_shared_canvas_repeatedly(self):
+        canvas = _canvas()
+        first = CoverArt(canvas).render((4,))
+        second = CoverArt(canvas).render((4,))
+        assert _text(first) == _text(second) == ["▄▄▄▄", "▄▄▄▄", "    "]
+
+    def test_pads_and_clips_to_width(self):
+        widget = CoverArt(_canvas())
+        assert _text(widget.render((6,))) == ["▄▄▄▄  ", "▄▄▄▄  ", "      "]
+        assert _text(widget.render((2,))) == ["▄▄", "▄▄", "  "]
+
+    def test_centered_in_padding_and_filler(self):
+        widget = urwid.Filler(
+            urwid.Padding(CoverArt(_canvas()), align="center", width="pack"), valign="middle"
+        )
+        rows = _text(widget.render((8, 5)))
+        assert rows[1:3] == ["  ▄▄▄▄  ", "  ▄▄▄▄  "]
+
+    def test_pack(self):
+        assert CoverArt(_canvas(width=6)).pack() == (6, 4)
+
+
+class TestCoverCanvasCache:
+    def test_get_and_set(self):
+        cache = CoverCanvasCache()
+        canvas = _canvas()
+        cache.set(("abc", 40, 256), canvas)
+        assert cache.get(("abc", 40, 256)) is canvas
+        assert cache.get(("abc", 40, TRUE_COLORS)) is None
+        assert cache.get(("abc", 60, 256)) is None
+
+    def test_evicts_least_recently_used(self):
+        cache = CoverCanvasCache(max_items=2)
+        cache.set(("a", 40, 256), _canvas())
+        cache.set(("b", 40, 256), _canvas())
+        cache.get(("a", 40, 256))
+        cache.set(("c", 40, 256), _canvas())
+
+        assert len(cache) == 2
+        assert cache.get(("a", 40, 256)) is not None
+        assert cache.get(("b", 40, 256)) is None
@@ -0,0 +1,77 @@
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+from src.coverNormalizer import CoverFormat, CoverPool, normalize_cover
+
+
+def encode(image, fmt="JPEG", **params):
+    buffer = BytesIO()
+    image.save(buffer, fmt, **params)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def photo():
+    return Image.effect_noise((640, 640), 60).convert("RGB")
+
+
+class TestNormalizeCover:
+    def test_resizes_and_fits_budget(self, photo):
+        data = encode(photo, quality=95)
+
+        result = normalize_cover(data, CoverFormat(max_dimension=300, max_bytes=40 * 1024))
+
+        image = Image.open(BytesIO(result))
+        assert image.format == "JPEG"
+        assert image.size == (300, 300)
+        assert len(result) <= 40 * 1024
+
+    def test_keeps_fitting_jpeg(self):
+        data = encode(Image.new("RGB", (200, 200), "red"))
+
+        assert normalize_cover(data) is data
+
+    def test_strips_exif(self):
+        exif = Image.Exif()
+        exif[0x010F] = "Camera maker"
+        data = encode(Image.new("RGB", (200, 200), "red"), exif=exif)
+
+        result = normalize_cover(data)
+
+        assert "exif" not in Image.open(BytesIO(result)).info
+
+    def test_applies_exif_orientation(self):
+        exif = Image.Exif()
+        exif[0x0112] = 6  # rotate 90 degrees clockwise
+        data = encode(Image.new("RGB", (200, 100), "red"), exif=exif)
+
+        assert Image.open(BytesIO(normalize_cover(data))).size == (100, 200)
+
+    def test_transparent_png_on_white(self):
+        data = encode(Image.new("RGBA", (100, 100), (255, 0, 0, 0)), "PNG")
+
+        image = Image.open(BytesIO(normalize_cover(data)))
+
+        assert image.format == "JPEG"
+        assert image.getpixel((50, 50)) == (255, 255, 255)
+
+    def test_lowers_quality_until_it_fits(self, photo):
+        data = encode(photo, quality=95)
+        budget = len(normalize_cover(data, CoverFormat(640, 10**9))) // 2
+
+        assert len(normalize_cover(data, CoverFormat(640, budget))) <= budget
+
+    def test_undecodable_data_unchanged(self):
+        assert normalize_cover(b"not an image") == b"not an image"
+
+
+class TestCoverPool:
+    def test_runs_in_worker_process(self, photo):
+        pool = CoverPool(workers=1)
+        try:
+            future = pool.submit(encode(photo), CoverFormat(max_dimension=100))
+            assert Image.open(BytesIO(future.result(timeout=60))).size == (100, 100)
+        finally:
+            pool.shutdown()
@@ -0,0 +1,68 @@
+import pytest
+from PIL import Image
+
+from src.coverRenderer import (
+    COLORS_256,
+    HALF_BLOCK,
+    TRUE_COLORS,
+    render_half_blocks,
+    terminal_colors,
+)
+
+
+def _split(runs):
+    """The rendered rows, without colors."""
+    return "".join(text for _, text in runs).split("\n")[:-1]
+
+
+def _two_tone(size=(16, 16)):
+    image = Image.new("RGB", size, (255, 0, 0))
+    image.paste((0, 0, 255), (0, size[1] // 2, size[0], size[1]))
+    return image
+
+
+class TestRenderHalfBlocks:
+    def test_size(self):
+        rows = _split(render_half_blocks(Image.new("RGB", (16, 32)), 8))
+        assert len(rows) == 8
+        assert all(row == HALF_BLOCK * 8 for row in rows)
+
+    def test_foreground_is_bottom_pixel_and_background_top(self):
+        runs = render_half_blocks(_two_tone((2, 2)), 2, TRUE_COLORS)
+        assert runs == [(("#0000ff", "#ff0000"), HALF_BLOCK * 2), ((None, None), "\n")]
+
+    def test_256_colors_use_xterm_palette(self):
+        runs = render_half_blocks(_two_tone((2, 2)), 2, COLORS_256)
+        assert runs[0] == (("h21", "h196"), HALF_BLOCK * 2)
+
+    def test_gray_maps_to_gray_ramp(self):
+        runs = render_half_blocks(Image.new("RGB", (2, 2), (128, 128, 128)), 2)
+        assert runs[0][0] == ("h244", "h244")
+
+    def test_same_colors_merge_into_one_run(self):
+        runs = render_half_blocks(_two_tone(), 8, TRUE_COLORS)
+        assert runs[0] == (("#ff0000", "#ff0000"), HALF_BLOCK * 8)
+        assert len(runs) == 8
+
+    def test_odd_height_trimmed(self):
+        rows = _split(render_half_blocks(Image.new("RGB", (10, 5)), 10))
+        assert len(rows) == 2
+
+    def test_too_flat_to_render(self):
+        assert render_half_blocks(Image.new("RGB", (100, 1)), 10) == []
+
+    @pytest.mark.parametrize("mode", ["RGBA", "L", "P"])
+    def test_other_modes_converted(self, mode):
+        runs = render_half_blocks(Image.new(mode, (4, 4)), 4, TRUE_COLORS)
+        assert runs[0] == (("#000000", "#000000"), HALF_BLOCK * 4)
+
+
+class TestTerminalColors:
+    @pytest.mark.parametrize("value", ["truecolor", "24bit"])
+    def test_true_color_terminal(self, monkeypatch, value):
+        monkeypatch.setenv("COLORTERM", value)
+        assert terminal_colors() == TRUE_COLORS
+
+    def test_default(self, monkeypatch):
+        monkeypatch.delenv("COLORTERM", raising=False)
+        assert terminal_colors() == COLORS_256
@@ -0,0 +1,66 @@
+import os
+
+import pytest
+
+from src.coverStore import CoverStore, cover_hash
+
+
+class TestCoverStore:
+    @pytest.fixture
+    def store(self, tmp_path):
+        store = CoverStore(tmp_path)
+        yield store
+        store.close()
+
+    def test_default_store_dir(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+        store = CoverStore()
+        assert store.store_dir == tmp_path / "metadata_editor" / "covers"
+        assert store.store_dir.exists()
+        store.close()
+
+    def test_get_by_url_miss(self, store):
+        assert store.get_by_url("https://example.com/a") is None
+
+    def test_put_and_get_by_url(self, store):
+        digest = store.put("https://example.com/a", b"image")
+
+        assert digest == cover_hash(b"image")
+        assert store.get_by_url("https://example.com/a") == b"image"
+        assert store.get(digest) == b"image"
+
+    def test_same_image_stored_once(self, store):
+        store.put("https://example.com/a", b"image")
+        store.put("https://example.com/b", b"image")
+
+        assert len(list(store.store_dir.glob("*.img"))) == 1
+        assert store.get_by_url("https://example.com/b") == b"image"
+
+    def test_missing_urls(self, store):
+        store.mark_missing("https://example.com/a")
+
+        assert store.is_missing("https://example.com/a")
+        assert not store.is_missing("https://example.com/b")
+
+        store.put("https://example.com/a", b"image")
+        assert not store.is_missing("https://example.com/a")
+
+    def test_prunes_oldest_over_budget(self, tmp_path):
+        store = CoverStore(tmp_path, max_bytes=25)
+        for age, url in enumerate(["https://example.com/b", "https://example.com/a"], 1):
+            digest = store.put(url, url[-1].encode() * 10)
+            os.utime(store.store_dir / f"{digest}.img", (1000 / age, 1000 / age))
+        store.put("https://example.com/c", b"c" * 10)
+
+        assert store.get_by_url("https://example.com/a") is None
+        assert store.get_by_url("https://example.com/c") == b"c" * 10
+        store.close()
+
+    def test_persists_across_instances(self, tmp_path):
+        first = CoverStore(tmp_path)
+        first.put("https://example.com/a", b"image")
+        first.close()
+
+        second = CoverStore(tmp_path)
+        assert second.get_by_url("https://example.com/a") == b"image"
+        second.close()
@@ -0,0 +1,51 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.httpSession import DEFAULT_POOL_SIZE, connection_stats, connection_summary, create_session
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b"ok"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+class TestHttpSession:
+    def test_pool_size_per_host(self):
+        session = create_session(pool_sizes={"musicbrainz.org": 2})
+
+        assert session.get_adapter("https://musicbrainz.org/ws/2/")._pool_maxsize == 2
+        assert session.get_adapter("https://i.scdn.co/image")._pool_maxsize == DEFAULT_POOL_SIZE
+
+    def test_reuses_connection(self, server):
+        session = create_session()
+
+        for _ in range(3):
+            assert session.get(f"{server}/cover.jpg", timeout=5).content == b"ok"
+
+        [stats] = connection_stats(session)
+        assert (stats.requests, stats.connections, stats.reused) == (3, 1, 2)
+        assert connection_summary(session) == "3 requests over 1 connection (66% reused)"
+
+    def test_summary_before_any_request(self):
+        assert connection_summary(create_session()) == ""
@@ -0,0 +1,175 @@
+import io
+from unittest.mock import patch
+
+import pytest
+from mutagen.id3 import APIC, ID3, TALB, TIT2, TPE1
+from PIL import Image
+
+from src.id3Reader import ID3ReadError, map_cover, open_cover_image, read_list_tags, read_tags
+
+IMAGE = b"\xff\xd8\xff\xe0" + bytes(range(256)) * 64
+
+
+def write_tag(path, version=4, cover_desc="Cover", image=IMAGE, encoding=3):
+    tags = ID3()
+    tags.add(TIT2(encoding=encoding, text="Title"))
+    tags.add(TALB(encoding=encoding, text="Álbum"))
+    tags.add(TPE1(encoding=encoding, text=["Artist", "Second"]))
+    if cover_desc is not None:
+        tags.add(APIC(encoding=encoding, mime="image/jpeg", type=3, desc=cover_desc, data=image))
+    path.write_bytes(b"\xff\xfb" + b"\0" * 1024)
+    tags.save(path, v2_version=version)
+    return path
+
+
+class TestReadListTags:
+    @pytest.mark.parametrize("version", [3, 4])
+    @pytest.mark.parametrize("encoding", [0, 1, 3])
+    def test_matches_mutagen(self, tmp_path, version, encoding):
+        if encoding == 0:
+            song = tmp_path / "song.mp3"
+            tags = ID3()
+            tags.add(TIT2(encoding=0, text="Title"))
+            tags.add(TALB(encoding=0, text="Álbum"))
+            tags.add(TPE1(encoding=0, text="Artist"))
+            song.write_bytes(b"\0" * 16)
+            tags.save(song, v2_version=version)
+        else:
+            song = write_tag(tmp_path / "song.mp3", version=version, encoding=encoding)
+
+        audio = ID3(song)
+        tags = read_list_tags(str(song))
+
+        assert tags.title == audio["TIT2"].text[0]
+        assert tags.album == audio["TALB"].text[0]
+        assert tags.artist == audio["TPE1"].text[0]
+
+    @pytest.mark.parametrize("version", [3, 4])
+    def test_cover_location(self, tmp_path, version):
+        song = write_tag(tmp_path / "song.mp3", version=version)
+
+        tags = read_list_tags(str(song))
+
+        assert tags.has_cover
+        assert tags.cover_size == len(IMAGE)
+        with open(song, "rb") as f:
+            f.seek(tags.cover_offset)
+            assert f.read(tags.cover_size) == IMAGE
+
+    def test_only_cover_description_counts(self, tmp_path):
+        song = write_tag(tmp_path / "song.mp3", cover_desc="Back")
+
+        tags = read_list_tags(str(song))
+
+        assert not tags.has_cover
+        assert tags.cover_offset is None
+        assert tags.song_info() == ("Title", "Álbum", "Artist", "No Cover")
+
+    def test_no_cover(self, tmp_path):
+        song = write_tag(tmp_path / "song.mp3", cover_desc=None)
+
+        assert read_list_tags(str(song)).song_info()[3] == "No Cover"
+
+    def test_skips_picture_data(self, tmp_path):
+        song = write_tag(tmp_path / "song.mp3", image=b"\xff" * 4_000_000)
+        bytes_read = []
+
+        class CountingFile(io.FileIO):
+            def read(self, size=-1):
+                data = super().read(size)
+                bytes_read.append(len(data))
+                return data
+
+        with patch("src.id3Reader.open", lambda path, mode: CountingFile(path), create=True):
+            tags = read_list_tags(str(song))
+
+        assert tags.cover_size == 4_000_000
+        assert sum(bytes_read) < 4096
+
+    def test_id3v22(self, tmp_path):
+        def frame(frame_id, data):
+            return frame_id + len(data).to_bytes(3, "big") + data
+
+        frames = (
+            frame(b"TT2", b"\0Old title\0")
+            + frame(b"TP1", b"\0Old artist")
+            + frame(b"PIC", b"\0JPG\x03Cover\0" + IMAGE)
+        )
+        size = len(frames) + 32
+        syncsafe = bytes((size >> shift) & 0x7F for shift in (21, 14, 7, 0))
+        song = tmp_path / "old.mp3"
+        song.write_bytes(b"ID3\x02\x00\x00" + syncsafe + frames + b"\0" * 32)
+
+        tags = read_list_tags(str(song))
+
+        assert (tags.title, tags.album, tags.artist) == ("Old title", "", "Old artist")
+        assert tags.has_cover
+        assert tags.cover_size == len(IMAGE)
+
+    def test_no_header(self, tmp_path):
+        song = tmp_path / "song.mp3"
+        song.write_bytes(b"not really an mp3")
+
+        with pytest.raises(ID3ReadError):
+            read_list_tags(str(song))
+
+    def test_truncated_tag(self, tmp_path):
+        song = write_tag(tmp_path / "song.mp3")
+        song.write_bytes(song.read_bytes()[:40])
+
+        with pytest.raises(ID3ReadError):
+            read_list_tags(str(song))
+
+
+class TestReadTags:
+    def test_reads_without_mutagen(self, tmp_path):
+        song = write_tag(tmp_path / "song.mp3")
+
+        with patch("src.tagModifier.MP3Editor") as mock_class:
+            tags = read_tags(str(song))
+
+        mock_class.assert_not_called()
+        assert tags.song_info() == ("Title", "Álbum", "Artist", "Has cover")
+        assert tags.cover_location == (tags.cover_offset, len(IMAGE))
+
+    def test_falls_back_to_mutagen(self, tmp_path):
+        song = tmp_path / "song.mp3"
+        song.write_bytes(b"no tag")
+
+        with patch("src.tagModifier.MP3Editor") as mock_class:
+            mock_class.return_value.song_info.return_value = ("T", "A", "R", "Has cover")
+            tags = read_tags(str(song))
+
+        mock_class.assert_called_once_with(str(song))
+        assert tags.song_info() == ("T", "A", "R", "Has cover")
+        assert tags.cover_location is None
+
+
+class TestMapCover:
+    def test_maps_cover_bytes(self, tmp_path):
+        song = write_tag(tmp_path / "song.mp3")
+        location = read_list_tags(str(song)).cover_location
+
+        with map_cover(str(song), location) as cover:
+            assert isinstance(cover, memoryview)
+            assert cover == IMAGE
+
+    def test_pil_decodes_in_place(self, tmp_path):
+        buffer = io.BytesIO()
+        Image.new("RGB", (8, 6), (0, 0, 255)).save(buffer, "PNG")
+        song = write_tag(tmp_path / "song.mp3", image=buffer.getvalue())
+        location = read_list_tags(str(song)).cover_location
+
+        with map_cover(str(song), location) as cover:
+            image = open_cover_image(cover)
+            image.load()
+
+        assert image.size == (8, 6)
+        assert image.getpixel((0, 0)) == (0, 0, 255)
+
+    def test_location_past_end_of_file(self, tmp_path):
+        song = write_tag(tmp_path / "song.mp3")
+
+        with pytest.raises(ID3ReadError):
+            with map_cover(str(song), (10, 10_000_000)):
+                pass
@@ -0,0 +1,183 @@
+import os
+
+import pytest
+
+from src.libraryScanner import LibraryScanner, ScanDelta, is_song_file
+
+
+class TestIsSongFile:
+    def test_mp3(self):
+        assert is_song_file("song.mp3") is True
+
+    def test_uppercase_extension(self):
+        assert is_song_file("SONG.MP3") is True
+
+    def test_mp3_in_name_only(self):
+        assert is_song_file("mp3 collection.txt") is False
+
+    def test_partial_download(self):
+        assert is_song_file("song.mp3.part") is False
+
+
+class TestScanDelta:
+    def test_empty_is_falsy(self):
+        assert not ScanDelta()
+
+    def test_non_empty_is_truthy(self):
+        assert ScanDelta(added=["a.mp3"])
+        assert ScanDelta(removed=["a.mp3"])
+        assert ScanDelta(modified=["a.mp3"])
+
+
+class TestLibraryScanner:
+    @pytest.fixture
+    def music_dir(self, tmp_path):
+        (tmp_path / "b.mp3").write_bytes(b"b")
+        (tmp_path / "a.mp3").write_bytes(b"a")
+        (tmp_path / "cover.jpg").write_bytes(b"jpg")
+        (tmp_path / "folder.mp3").mkdir()
+        return tmp_path
+
+    def test_first_scan_reports_everything_added(self, music_dir):
+        delta = LibraryScanner(str(music_dir)).scan()
+
+        assert delta.added == ["a.mp3", "b.mp3"]
+        assert delta.removed == []
+        assert delta.modified == []
+
+    def test_rescan_without_changes(self, music_dir):
+        scanner = LibraryScanner(str(music_dir))
+        scanner.scan()
+
+        assert not scanner.scan()
+
+    def test_detects_added(self, music_dir):
+        scanner = LibraryScanner(str(music_dir))
+        scanner.scan()
+        (music_dir / "c.mp3").write_bytes(b"c")
+
+        assert scanner.scan() == ScanDelta(added=["c.mp3"])
+
+    def test_detects_removed(self, music_dir):
+        scanner = LibraryScanner(str(music_dir))
+        scanner.scan()
+        (music_dir / "a.mp3").unlink()
+
+        assert scanner.scan() == ScanDelta(removed=["a.mp3"])
+
+    def test_detects_modified(self, music_dir):
+        scanner = LibraryScanner(str(music_dir))
+        scanner.scan()
+        st = os.stat(music_dir / "a.mp3")
+        os.utime(music_dir / "a.mp3", ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+        assert scanner.scan() == ScanDelta(modified=["a.mp3"])
+
+    def test_rescan_only_checks_given_songs(self, music_dir):
+        scanner = LibraryScanner(str(music_dir))
+        scanner.scan()
+        (music_dir / "c.mp3").write_bytes(b"c")
+        (music_dir / "d.mp3").write_bytes(b"d")
+
+        assert scanner.rescan(["c.mp3"]) == ScanDelta(added=["c.mp3"])
+        assert scanner.scan() == ScanDelta(added=["d.mp3"])
+
+    def test_rescan_detects_removed_and_modified(self, music_dir):
+        scanner = LibraryScanner(str(music_dir))
+        scanner.scan()
+        (music_dir / "a.mp3").unlink()
+        (music_dir / "b.mp3").write_bytes(b"longer contents")
+
+        delta = scanner.rescan(["a.mp3", "b.mp3"])
+
+        assert delta == ScanDelta(removed=["a.mp3"], modified=["b.mp3"])
+
+    def test_rescan_ignores_unknown_missing_and_non_song_files(self, music_dir):
+        scanner = LibraryScanner(str(music_dir))
+        scanner.scan()
+
+        assert not scanner.rescan(["ghost.mp3", "cover.jpg", "folder.mp3"])
+
+
+class TestRecursiveLibraryScanner:
+    @pytest.fixture
+    def music_tree(self, tmp_path):
+        (tmp_path / "top.mp3").write_bytes(b"t")
+        album = tmp_path / "Artist" / "Album"
+        album.mkdir(parents=True)
+        (album / "01.mp3").write_bytes(b"1")
+        (album / "02.mp3").write_bytes(b"2")
+        (tmp_path / ".hidden").mkdir()
+        (tmp_path / ".hidden" / "skip.mp3").write_bytes(b"s")
+        return tmp_path
+
+    def test_non_recursive_ignores_subdirectories(self, music_tree):
+        delta = LibraryScanner(str(music_tree)).scan()
+
+        assert delta.added == ["top.mp3"]
+
+    def test_recursive_keys_are_relative_to_root(self, music_tree):
+        delta = LibraryScanner(str(music_tree), recursive=True).scan()
+
+        assert delta.added == [
+            os.path.join("Artist", "Album", "01.mp3"),
+            os.path.join("Artist", "Album", "02.mp3"),
+            "top.mp3",
+        ]
+
+    def test_streams_batches_per_directory(self, music_tree):
+        batches = []
+        LibraryScanner(str(music_tree), recursive=True).scan(on_added=batches.append)
+
+        assert sorted(map(tuple, batches)) == [
+            (os.path.join("Artist", "Album", "01.mp3"), os.path.join("Artist", "Album", "02.mp3")),
+            ("top.mp3",),
+        ]
+
+    def test_reports_directories_before_reading_them(self, music_tree):
+        directories = []
+        LibraryScanner(str(music_tree), recursive=True).scan(
+            on_directory=lambda path, prefix: directories.append(prefix)
+        )
+
+        assert sorted(directories) == ["", "Artist", os.path.join("Artist", "Album")]
+
+    def test_recursive_rescan_detects_removed_in_subdirectory(self, music_tree):
+        scanner = LibraryScanner(str(music_tree), recursive=True)
+        scanner.scan()
+        (music_tree / "Artist" / "Album" / "01.mp3").unlink()
+
+        assert scanner.scan() == ScanDelta(removed=[os.path.join("Artist", "Album", "01.mp3")])
+
+    def test_rescan_nested_key(self, music_tree):
+        scanner = LibraryScanner(str(music_tree), recursive=True)
+        scanner.scan()
+        (music_tree / "Artist" / "Album" / "03.mp3").write_bytes(b"3")
+
+        delta = scanner.rescan([os.path.join("Artist", "Album", "03.mp3")])
+
+        assert delta == ScanDelta(added=[os.path.join("Artist", "Album", "03.mp3")])
+
+    def test_cancelled_scan_does_not_report_removals(self, music_tree):
+        scanner = LibraryScanner(str(music_tree), recursive=True)
+        scanner.scan()
+        scanner.cancel()
+
+        assert scanner.scan().removed == []
+
+
+class TestMultipleRoots:
+    def test_extra_roots_are_keyed_by_absolute_path(self, tmp_path):
+        main = tmp_path / "main"
+        extra = tmp_path / "extra"
+        main.mkdir()
+        extra.mkdir()
+        (main / "a.mp3").write_bytes(b"a")
+        (extra / "b.mp3").write_bytes(b"b")
+
+        scanner = LibraryScanner([str(main), str(extra)])
+        delta = scanner.scan()
+
+        assert delta.added == [str(extra / "b.mp3"), "a.mp3"]
+        assert scanner.path_of(str(extra / "b.mp3")) == str(extra / "b.mp3")
+        assert scanner.path_of("a.mp3") == str(main / "a.mp3")
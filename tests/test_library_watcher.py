@@ -0,0 +1,190 @@
+import os
+import struct
+import threading
+import time
+
+import pytest
+
+from src.libraryWatcher import (
+    IN_CLOSE_WRITE,
+    IN_DELETE,
+    IN_Q_OVERFLOW,
+    InotifyWatcher,
+    PollingWatcher,
+    parse_events,
+    start_library_watcher,
+)
+
+
+def pack_event(wd, mask, name):
+    encoded = name.encode()
+    length = len(encoded) + (16 - len(encoded) % 16) if encoded else 0
+    return struct.pack("iIII", wd, mask, 0, length) + encoded.ljust(length, b"\0")
+
+
+class Collector:
+    def __init__(self):
+        self.changes = []
+        self.event = threading.Event()
+
+    def __call__(self, songs):
+        self.changes.append(songs)
+        self.event.set()
+
+    def wait(self):
+        assert self.event.wait(5), "watcher never reported a change"
+        self.event.clear()
+        return self.changes[-1]
+
+
+class TestParseEvents:
+    def test_single_event(self):
+        events = list(parse_events(pack_event(1, IN_CLOSE_WRITE, "song.mp3")))
+        assert events == [(1, IN_CLOSE_WRITE, "song.mp3")]
+
+    def test_multiple_events(self):
+        data = pack_event(1, IN_CLOSE_WRITE, "a.mp3") + pack_event(1, IN_DELETE, "b.mp3")
+        events = list(parse_events(data))
+        assert events == [(1, IN_CLOSE_WRITE, "a.mp3"), (1, IN_DELETE, "b.mp3")]
+
+    def test_event_without_name(self):
+        events = list(parse_events(pack_event(-1, IN_Q_OVERFLOW, "")))
+        assert events == [(-1, IN_Q_OVERFLOW, "")]
+
+    def test_empty_buffer(self):
+        assert list(parse_events(b"")) == []
+
+
+class TestInotifyWatcher:
+    @pytest.fixture
+    def watcher_factory(self, tmp_path):
+        watchers = []
+
+        def factory(on_change):
+            try:
+                watcher = InotifyWatcher([str(tmp_path)], on_change, debounce=0.05)
+            except OSError:
+                pytest.skip("inotify not available")
+            watcher.start()
+            watchers.append(watcher)
+            return watcher
+
+        yield factory
+        for watcher in watchers:
+            watcher.stop()
+
+    def test_reports_new_song(self, tmp_path, watcher_factory):
+        collector = Collector()
+        watcher_factory(collector)
+
+        (tmp_path / "song.mp3").write_bytes(b"data")
+
+        assert collector.wait() == {"song.mp3"}
+
+    def test_reports_rename_into_place(self, tmp_path, watcher_factory):
+        (tmp_path / "song.webm").write_bytes(b"data")
+        collector = Collector()
+        watcher_factory(collector)
+
+        os.rename(tmp_path / "song.webm", tmp_path / "song.mp3")
+
+        assert collector.wait() == {"song.mp3"}
+
+    def test_ignores_non_song_files(self, tmp_path, watcher_factory):
+        collector = Collector()
+        watcher_factory(collector)
+
+        (tmp_path / "song.mp3.part").write_bytes(b"data")
+        (tmp_path / "song.mp3").write_bytes(b"data")
+
+        assert collector.wait() == {"song.mp3"}
+
+    def test_stop_is_idempotent(self, watcher_factory):
+        watcher = watcher_factory(Collector())
+        watcher.stop()
+        watcher.stop()
+
+
+class TestPollingWatcher:
+    def test_reports_changes(self, tmp_path):
+        (tmp_path / "old.mp3").write_bytes(b"data")
+        collector = Collector()
+        watcher = PollingWatcher([str(tmp_path)], collector, interval=0.05)
+        watcher.start()
+        try:
+            while "old.mp3" not in watcher._scanner:
+                time.sleep(0.01)
+            (tmp_path / "new.mp3").write_bytes(b"data")
+            (tmp_path / "old.mp3").unlink()
+
+            assert collector.wait() == {"new.mp3", "old.mp3"}
+        finally:
+            watcher.stop()
+
+
+class TestStartLibraryWatcher:
+    def test_falls_back_to_polling(self, tmp_path, monkeypatch):
+        def unavailable(*_args, **_kwargs):
+            raise OSError("no inotify")
+
+        monkeypatch.setattr("src.libraryWatcher._load_libc", unavailable)
+
+        watcher = start_library_watcher([str(tmp_path)], Collector())
+        try:
+            assert isinstance(watcher, PollingWatcher)
+        finally:
+            watcher.stop()
+
+
+class TestRecursiveInotifyWatcher:
+    @pytest.fixture
+    def watcher_factory(self, tmp_path):
+        watchers = []
+
+        def factory(on_change):
+            try:
+                watcher = InotifyWatcher([str(tmp_path)], on_change, recursive=True, debounce=0.05)
+            except OSError:
+                pytest.skip("inotify not available")
+            watcher.start()
+            watchers.append(watcher)
+            return watcher
+
+        yield factory
+        for watcher in watchers:
+            watcher.stop()
+
+    def test_reports_songs_in_registered_subdirectory(self, tmp_path, watcher_factory):
+        album = tmp_path / "Artist" / "Album"
+        album.mkdir(parents=True)
+        collector = Collector()
+        watcher = watcher_factory(collector)
+        watcher.add_directory(str(album), os.path.join("Artist", "Album"))
+
+        (album / "01.mp3").write_bytes(b"data")
+
+        assert collector.wait() == {os.path.join("Artist", "Album", "01.mp3")}
+
+    def test_watches_new_subdirectories(self, tmp_path, watcher_factory):
+        collector = Collector()
+        watcher_factory(collector)
+
+        staging = tmp_path / ".staging"
+        (staging / "Album").mkdir(parents=True)
+        (staging / "Album" / "01.mp3").write_bytes(b"data")
+        os.rename(staging / "Album", tmp_path / "Album")
+
+        assert collector.wait() == {os.path.join("Album", "01.mp3")}
+
+        (tmp_path / "Album" / "02.mp3").write_bytes(b"data")
+
+        assert collector.wait() == {os.path.join("Album", "02.mp3")}
+
+    def test_moving_a_directory_out_requests_full_rescan(self, tmp_path, watcher_factory):
+        (tmp_path / "Album").mkdir()
+        collector = Collector()
+        watcher_factory(collector)
+
+        os.rename(tmp_path / "Album", tmp_path / ".trash")
+
+        assert collector.wait() is None
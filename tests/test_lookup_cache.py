@@ -0,0 +1,85 @@
+import pytest
+
+from src.lookupCache import FOUND_TTL, NOT_FOUND, NOT_FOUND_TTL, LookupCache
+
+RESULT = ("Song", "Artist", "Album", ("http://covers/1", "http://covers/2"))
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestLookupCache:
+    @pytest.fixture
+    def clock(self):
+        return FakeClock()
+
+    @pytest.fixture
+    def cache(self, tmp_path, clock):
+        cache = LookupCache(db_path=tmp_path / "lookups.sqlite3", clock=clock)
+        yield cache
+        cache.close()
+
+    def test_default_db_path(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+        cache = LookupCache()
+        assert cache.db_path == tmp_path / "metadata_editor" / "lookup_cache.sqlite3"
+        assert cache.db_path.exists()
+        cache.close()
+
+    def test_miss(self, cache):
+        assert cache.get("song artist") is None
+
+    def test_put_and_get(self, cache):
+        cache.put("song artist", RESULT)
+
+        assert cache.get("song artist") == RESULT
+
+    def test_no_cover_candidates(self, cache):
+        cache.put("song artist", ("Song", "Artist", "Album", ()))
+
+        assert cache.get("song artist") == ("Song", "Artist", "Album", ())
+
+    def test_negative_result(self, cache):
+        cache.put("unknown", NOT_FOUND)
+
+        assert cache.get("unknown") == NOT_FOUND
+
+    def test_found_expires(self, cache, clock):
+        cache.put("song artist", RESULT)
+
+        clock.now += FOUND_TTL - 1
+        assert cache.get("song artist") == RESULT
+        clock.now += 2
+        assert cache.get("song artist") is None
+
+    def test_not_found_expires_sooner(self, cache, clock):
+        cache.put("unknown", NOT_FOUND)
+
+        clock.now += NOT_FOUND_TTL + 1
+        assert cache.get("unknown") is None
+
+    def test_evicts_oldest(self, tmp_path, clock):
+        cache = LookupCache(db_path=tmp_path / "small.sqlite3", max_entries=2, clock=clock)
+        for i, query in enumerate(["a", "b", "c"]):
+            clock.now += i
+            cache.put(query, RESULT)
+
+        assert len(cache) == 2
+        assert cache.get("a") is None
+        assert cache.get("c") == RESULT
+        cache.close()
+
+    def test_persists_across_instances(self, tmp_path, clock):
+        db_path = tmp_path / "lookups.sqlite3"
+        cache = LookupCache(db_path=db_path, clock=clock)
+        cache.put("song artist", RESULT)
+        cache.close()
+
+        reopened = LookupCache(db_path=db_path, clock=clock)
+        assert reopened.get("song artist") == RESULT
+        reopened.close()
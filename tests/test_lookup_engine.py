@@ -0,0 +1,443 @@
+import asyncio
+import time
+from io import BytesIO
+from unittest.mock import MagicMock, patch
+
+import pytest
+from PIL import Image
+
+from src.albumLookup import Release, ReleaseTrack
+from src.coverNormalizer import CoverFormat, CoverPool
+from src.coverStore import CoverStore
+from src.lookupCache import NOT_FOUND, LookupCache
+from src.lookupEngine import LookupEngine
+from src.rateLimiter import HostLimit, RateLimiter, RetryPolicy, ThrottledError
+from src.trackInfo import ProviderError
+
+
+@pytest.fixture
+def limiter():
+    """A limiter fast enough that tests never wait on it."""
+    return RateLimiter(
+        limits={}, default=HostLimit(1e9, 1e9), policy=RetryPolicy(base_delay=0), rand=lambda: 0
+    )
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = LookupCache(db_path=tmp_path / "lookups.sqlite3")
+    yield cache
+    cache.close()
+
+
+@pytest.fixture(autouse=True)
+def cover_store(tmp_path):
+    store = CoverStore(tmp_path / "covers")
+    with patch("src.trackInfo.get_cover_store", return_value=store):
+        yield store
+    store.close()
+
+
+def make_editor(has_metadata=False):
+    editor = MagicMock()
+    editor.has_metadata.return_value = has_metadata
+    editor.song_info.return_value = ("Title", "Album", "Artist", "No Cover")
+    return editor
+
+
+COVERS = ("https://coverartarchive.org/release/r1/front-250",)
+
+
+class TestLookup:
+    @patch("src.trackInfo._search_spotify")
+    @patch("src.trackInfo._search_musicbrainz", return_value=("N", "A", "B", COVERS))
+    def test_musicbrainz(self, mock_mb, mock_spotify, limiter, cache):
+        result = asyncio.run(
+            LookupEngine(limiter=limiter, cache=cache).lookup(
+                "Title", "Artist", "Album", "song.mp3"
+            )
+        )
+
+        assert result == ("N", "A", "B", COVERS)
+        mock_spotify.assert_not_called()
+
+    @patch("src.trackInfo._search_spotify", return_value=("N", "A", "B", ("http://spotify",)))
+    @patch("src.trackInfo._search_musicbrainz", return_value=None)
+    def test_falls_back_to_spotify(self, mock_mb, mock_spotify, limiter, cache):
+        result = asyncio.run(
+            LookupEngine(limiter=limiter, cache=cache).lookup(
+                "Title", "Artist", "Album", "song.mp3"
+            )
+        )
+
+        assert result == ("N", "A", "B", ("http://spotify",))
+
+    @patch("src.trackInfo._search_spotify", return_value=None)
+    @patch("src.trackInfo._search_musicbrainz", return_value=None)
+    def test_nothing_found(self, mock_mb, mock_spotify, limiter, cache):
+        result = asyncio.run(
+            LookupEngine(limiter=limiter, cache=cache).lookup(
+                "Title", "Artist", "Album", "song.mp3"
+            )
+        )
+
+        assert result == NOT_FOUND
+
+    @patch("src.trackInfo._search_spotify", return_value=None)
+    @patch("src.trackInfo._search_musicbrainz", return_value=None)
+    def test_counts_requests_per_host(self, mock_mb, mock_spotify, limiter, cache):
+        engine = LookupEngine(limiter=limiter, cache=cache)
+        asyncio.run(engine.lookup("Title", "Artist", "Album", "song.mp3"))
+
+        assert limiter.stats("musicbrainz.org").requests == 1
+        assert limiter.stats("api.spotify.com").requests == 1
+        assert limiter.stats("coverartarchive.org") is None
+
+    @patch("src.trackInfo._search_spotify")
+    @patch("src.trackInfo._search_musicbrainz")
+    def test_retries_throttled_host(self, mock_mb, mock_spotify, limiter, cache):
+        mock_mb.side_effect = [ThrottledError("musicbrainz.org", 503), ("N", "A", "B", ())]
+
+        engine = LookupEngine(limiter=limiter, cache=cache)
+        result = asyncio.run(engine.lookup("Title", "Artist", "Album", "song.mp3"))
+
+        assert result == ("N", "A", "B", ())
+        assert limiter.stats("musicbrainz.org").retries == 1
+        mock_spotify.assert_not_called()
+
+    @patch("src.trackInfo._search_spotify", return_value=("N", "A", "B", ("http://spotify",)))
+    @patch("src.trackInfo._search_musicbrainz")
+    def test_stays_throttled_falls_back(self, mock_mb, mock_spotify, limiter, cache):
+        mock_mb.side_effect = ThrottledError("musicbrainz.org", 429)
+
+        engine = LookupEngine(limiter=limiter, cache=cache)
+        result = asyncio.run(engine.lookup("Title", "Artist", "Album", "song.mp3"))
+
+        assert result == ("N", "A", "B", ("http://spotify",))
+        assert mock_mb.call_count == limiter.policy.attempts
+
+    @patch("src.trackInfo._search_spotify", return_value=None)
+    @patch("src.trackInfo._search_musicbrainz", return_value=("N", "A", "B", COVERS))
+    def test_cached_result_skips_network(self, mock_mb, mock_spotify, limiter, cache):
+        engine = LookupEngine(limiter=limiter, cache=cache)
+
+        first = asyncio.run(engine.lookup("Title", "Artist", "Album", "song.mp3"))
+        second = asyncio.run(engine.lookup("Title", "Artist", "Album", "song.mp3"))
+
+        assert first == second == ("N", "A", "B", COVERS)
+        mock_mb.assert_called_once()
+
+    @patch("src.trackInfo._search_spotify", return_value=None)
+    @patch("src.trackInfo._search_musicbrainz", return_value=None)
+    def test_caches_misses(self, mock_mb, mock_spotify, limiter, cache):
+        engine = LookupEngine(limiter=limiter, cache=cache)
+
+        asyncio.run(engine.lookup("Title", "Artist", "Album", "song.mp3"))
+
+        assert cache.get("title artist album") == NOT_FOUND
+
+    @patch("src.trackInfo._search_spotify", return_value=None)
+    @patch("src.trackInfo._search_musicbrainz")
+    def test_failed_lookup_not_cached(self, mock_mb, mock_spotify, limiter, cache):
+        mock_mb.side_effect = ThrottledError("musicbrainz.org", 429)
+        engine = LookupEngine(limiter=limiter, cache=cache)
+
+        asyncio.run(engine.lookup("Title", "Artist", "Album", "song.mp3"))
+
+        assert cache.get("title artist album") is None
+
+
+class TestFetchCover:
+    @patch("src.trackInfo._download_cover")
+    def test_falls_back_to_next_release(self, mock_download, limiter, cache):
+        mock_download.side_effect = [None, b"image"]
+        urls = ("https://coverartarchive.org/a", "https://coverartarchive.org/b")
+
+        engine = LookupEngine(limiter=limiter, cache=cache)
+        data = asyncio.run(engine.fetch_cover(urls))
+
+        assert data == b"image"
+        assert [c.args for c in mock_download.call_args_list] == [
+            ("coverartarchive.org", urls[0]),
+            ("coverartarchive.org", urls[1]),
+        ]
+
+    @patch("src.trackInfo._download_cover", return_value=None)
+    def test_no_cover_anywhere(self, mock_download, limiter, cache):
+        engine = LookupEngine(limiter=limiter, cache=cache)
+
+        assert asyncio.run(engine.fetch_cover(("https://x.example/a",))) is None
+
+    @patch("src.trackInfo._download_cover")
+    def test_shared_cover_downloaded_once(self, mock_download, limiter, cache):
+        def slow_download(host, url):
+            time.sleep(0.05)
+            return b"image"
+
+        mock_download.side_effect = slow_download
+        engine = LookupEngine(limiter=limiter, cache=cache)
+
+        async def fetch_album():
+            return await asyncio.gather(*(engine.fetch_cover(COVERS) for _ in range(5)))
+
+        assert asyncio.run(fetch_album()) == [b"image"] * 5
+        mock_download.assert_called_once()
+        assert engine._downloads == {}
+
+    @patch("src.trackInfo._download_cover", return_value=b"image")
+    def test_stored_cover_skips_download(self, mock_download, limiter, cache, cover_store):
+        cover_store.put(COVERS[0], b"image")
+        engine = LookupEngine(limiter=limiter, cache=cache)
+
+        assert asyncio.run(engine.fetch_cover(COVERS)) == b"image"
+        mock_download.assert_not_called()
+
+    @patch("src.trackInfo._download_cover", return_value=None)
+    def test_missing_cover_not_retried(self, mock_download, limiter, cache):
+        engine = LookupEngine(limiter=limiter, cache=cache)
+
+        asyncio.run(engine.fetch_cover(COVERS))
+        asyncio.run(engine.fetch_cover(COVERS))
+
+        mock_download.assert_called_once()
+
+
+def jpeg(size):
+    buffer = BytesIO()
+    Image.new("RGB", size, "red").save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+class TestNormalizeCovers:
+    @pytest.mark.parametrize("use_pool", [False, True])
+    def test_downloads_stored_normalized(self, use_pool, limiter, cache, cover_store):
+        pool = CoverPool(workers=1) if use_pool else None
+        engine = LookupEngine(
+            limiter=limiter, cache=cache, cover_format=CoverFormat(100), cover_pool=pool
+        )
+        try:
+            with patch("src.trackInfo._download_cover", return_value=jpeg((640, 640))):
+                data = asyncio.run(engine.fetch_cover(COVERS))
+        finally:
+            if pool:
+                pool.shutdown()
+
+        assert Image.open(BytesIO(data)).size == (100, 100)
+        assert cover_store.get_by_url(COVERS[0]) == data
+
+    @patch("src.trackInfo._download_cover")
+    def test_disabled(self, mock_download, limiter, cache):
+        mock_download.return_value = jpeg((640, 640))
+        engine = LookupEngine(limiter=limiter, cache=cache, cover_format=None)
+
+        assert asyncio.run(engine.fetch_cover(COVERS)) == mock_download.return_value
+
+
+class TestFillTracks:
+    @patch("src.lookupEngine.tagModifier.MP3Editor")
+    def test_counts_outcomes(self, mock_editor_class, limiter, cache):
+        editors = {
+            "done.mp3": make_editor(has_metadata=True),
+            "new.mp3": make_editor(),
+            "unknown.mp3": make_editor(),
+            "broken.mp3": make_editor(),
+        }
+        editors["broken.mp3"].apply_metadata.side_effect = OSError("read-only")
+        mock_editor_class.side_effect = editors.__getitem__
+
+        async def fake_lookup(title, artist, album, file_path, failures=None):
+            if file_path == "unknown.mp3":
+                return NOT_FOUND
+            return "N", "A", "B", ()
+
+        engine = LookupEngine(limiter=limiter, cache=cache)
+        reports = []
+        with patch.object(engine, "lookup", fake_lookup):
+            progress = asyncio.run(
+                engine.fill_tracks(
+                    list(editors),
+                    on_progress=lambda p: reports.append((p.last_file, p.last_outcome)),
+                )
+            )
+
+        assert progress.completed == 4
+        assert (progress.updated, progress.skipped, progress.failed) == (1, 1, 1)
+        assert sorted(reports) == sorted(
+            [
+                ("done.mp3", "skipped"),
+                ("new.mp3", "updated"),
+                ("unknown.mp3", "not_found"),
+                ("broken.mp3", "failed"),
+            ]
+        )
+        editors["new.mp3"].apply_metadata.assert_called_once_with("N", "A", "B", None)
+        editors["done.mp3"].apply_metadata.assert_not_called()
+        editors["unknown.mp3"].apply_metadata.assert_not_called()
+
+    @patch("src.lookupEngine.tagModifier.MP3Editor")
+    def test_bounds_tracks_in_flight(self, mock_editor_class, limiter, cache):
+        mock_editor_class.side_effect = lambda path: make_editor()
+        in_flight = 0
+        peak = 0
+
+        async def fake_lookup(*args):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return "N", "A", "B", ()
+
+        engine = LookupEngine(max_in_flight=3, limiter=limiter, cache=cache)
+        with patch.object(engine, "lookup", fake_lookup):
+            progress = asyncio.run(engine.fill_tracks([f"{i}.mp3" for i in range(10)]))
+
+        assert progress.updated == 10
+        assert peak == 3
+
+    @patch("src.lookupEngine.tagModifier.MP3Editor")
+    def test_downloads_cover_only_when_missing(self, mock_editor_class, limiter, cache):
+        editors = {"bare.mp3": make_editor(), "covered.mp3": make_editor()}
+        editors["covered.mp3"].song_info.return_value = ("T", "B", "A", "Has cover")
+        mock_editor_class.side_effect = editors.__getitem__
+
+        async def fake_lookup(*args):
+            return "N", "A", "B", COVERS
+
+        async def fake_fetch(urls, failures=None):
+            return b"image"
+
+        engine = LookupEngine(limiter=limiter, cache=cache)
+        with (
+            patch.object(engine, "lookup", fake_lookup),
+            patch.object(engine, "fetch_cover", fake_fetch),
+        ):
+            asyncio.run(engine.fill_tracks(list(editors)))
+
+        editors["bare.mp3"].apply_metadata.assert_called_once_with("N", "A", "B", b"image")
+        editors["covered.mp3"].apply_metadata.assert_called_once_with("N", "A", "B", None)
+
+    @patch("src.trackInfo._search_spotify", side_effect=ProviderError("connection reset"))
+    @patch("src.trackInfo._search_musicbrainz", side_effect=ProviderError("connection reset"))
+    @patch("src.lookupEngine.tagModifier.MP3Editor")
+    def test_provider_outage_fails(self, mock_editor_class, mock_mb, mock_spotify, limiter, cache):
+        editor = make_editor()
+        mock_editor_class.return_value = editor
+        reports = []
+
+        engine = LookupEngine(limiter=limiter, cache=cache)
+        progress = asyncio.run(
+            engine.fill_tracks(
+                ["song.mp3"],
+                on_progress=lambda p: reports.append((p.last_outcome, p.last_error)),
+            )
+        )
+
+        assert progress.failed == 1
+        assert reports == [("failed", "connection reset")]
+        editor.apply_metadata.assert_not_called()
+
+    @patch("src.trackInfo._download_cover", side_effect=ProviderError("timed out"))
+    @patch("src.lookupEngine.tagModifier.MP3Editor")
+    def test_failed_cover_download_fails(self, mock_editor_class, mock_download, limiter, cache):
+        editor = make_editor()
+        mock_editor_class.return_value = editor
+
+        async def fake_lookup(*args):
+            return "N", "A", "B", COVERS
+
+        engine = LookupEngine(limiter=limiter, cache=cache)
+        with patch.object(engine, "lookup", fake_lookup):
+            progress = asyncio.run(engine.fill_tracks(["song.mp3"]))
+
+        assert (progress.updated, progress.failed) == (0, 1)
+        editor.apply_metadata.assert_called_once_with("N", "A", "B", None)
+
+
+class TestFillAlbums:
+    RELEASE = Release(
+        "rel-1",
+        "Album",
+        "Artist",
+        [ReleaseTrack(1, "First"), ReleaseTrack(2, "Second"), ReleaseTrack(3, "Third")],
+        cover_urls=COVERS,
+    )
+
+    def editors(self, titles):
+        editors = {}
+        for i, title in enumerate(titles, 1):
+            editor = make_editor()
+            editor.song_info.return_value = (title, "Album", "Artist", "No Cover")
+            editor.track_number.return_value = ""
+            editors[f"/music/album/{i:02d}.mp3"] = editor
+        return editors
+
+    @patch("src.trackInfo._download_cover", return_value=b"image")
+    @patch("src.trackInfo._lookup_musicbrainz_release")
+    @patch("src.trackInfo._search_musicbrainz_release", return_value="rel-1")
+    @patch("src.lookupEngine.tagModifier.MP3Editor")
+    def test_album_resolved_once(
+        self, mock_editor_class, mock_search, mock_lookup, mock_download, limiter, cache
+    ):
+        mock_lookup.return_value = self.RELEASE
+        editors = self.editors(["third", "first", "second"])
+        mock_editor_class.side_effect = editors.__getitem__
+
+        engine = LookupEngine(limiter=limiter, cache=cache, cover_format=None)
+        with patch.object(engine, "lookup") as mock_track_lookup:
+            progress = asyncio.run(engine.fill_tracks(list(editors), by_album=True))
+
+        assert progress.updated == 3
+        mock_search.assert_called_once_with("Album", "Artist", 3)
+        mock_lookup.assert_called_once_with("rel-1")
+        mock_download.assert_called_once()
+        mock_track_lookup.assert_not_called()
+        editors["/music/album/01.mp3"].apply_metadata.assert_called_once_with(
+            "Third", "Artist", "Album", b"image", "3/3"
+        )
+
+    @patch("src.trackInfo._lookup_musicbrainz_release")
+    @patch("src.trackInfo._search_musicbrainz_release", return_value="rel-1")
+    @patch("src.lookupEngine.tagModifier.MP3Editor")
+    def test_unmatched_tracks_fall_back(
+        self, mock_editor_class, mock_search, mock_lookup, limiter, cache
+    ):
+        mock_lookup.return_value = self.RELEASE
+        editors = self.editors(["First", "Second", "Something Else"])
+        mock_editor_class.side_effect = editors.__getitem__
+
+        async def fake_lookup(title, artist, album, file_path, failures=None):
+            return "N", "A", "B", ()
+
+        engine = LookupEngine(limiter=limiter, cache=cache)
+        with (
+            patch.object(engine, "lookup", side_effect=fake_lookup) as mock_track_lookup,
+            patch.object(engine, "fetch_cover", return_value=None),
+        ):
+            progress = asyncio.run(engine.fill_tracks(list(editors), by_album=True))
+
+        assert progress.updated == 3
+        mock_track_lookup.assert_called_once()
+        assert mock_track_lookup.call_args.args[3] == "/music/album/03.mp3"
+
+    @patch("src.trackInfo._search_musicbrainz_release", return_value=None)
+    @patch("src.lookupEngine.tagModifier.MP3Editor")
+    def test_no_release_and_small_groups_per_track(
+        self, mock_editor_class, mock_search, limiter, cache
+    ):
+        editors = self.editors(["First", "Second", "Third"])
+        editors["/music/other/single.mp3"] = make_editor()
+        editors["/music/other/single.mp3"].track_number.return_value = ""
+        editors["/music/done.mp3"] = make_editor(has_metadata=True)
+        mock_editor_class.side_effect = editors.__getitem__
+
+        async def fake_lookup(title, artist, album, file_path, failures=None):
+            return "N", "A", "B", ()
+
+        engine = LookupEngine(limiter=limiter, cache=cache)
+        with patch.object(engine, "lookup", side_effect=fake_lookup) as mock_track_lookup:
+            progress = asyncio.run(engine.fill_tracks(list(editors), by_album=True))
+
+        assert (progress.updated, progress.skipped) == (4, 1)
+        mock_search.assert_called_once()
+        assert mock_track_lookup.call_count == 4
@@ -0,0 +1,148 @@
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.metadataPrefetcher import MetadataPrefetcher
+
+
+class FakeViewInfo:
+    def __init__(self, songs, done_on=None, block=None):
+        self.canciones = songs
+        self.loaded = []
+        self.block = block
+        self.done_on = done_on
+        self.done = threading.Event()
+
+    def songs_len(self):
+        return len(self.canciones)
+
+    def song_file_name(self, index):
+        return self.canciones[index]
+
+    def song_info_by_name(self, song):
+        if self.block is not None:
+            self.block.wait()
+        self.loaded.append(song)
+        if song == self.done_on:
+            self.done.set()
+        if song == "boom.mp3":
+            raise ValueError("bad tag")
+        return (song, "", "", "No Cover")
+
+
+@pytest.fixture
+def songs():
+    return [f"{i}.mp3" for i in range(10)]
+
+
+class TestMetadataPrefetcher:
+    def test_prefetches_rows_below(self, songs):
+        view_info = FakeViewInfo(songs, done_on="9.mp3")
+        prefetcher = MetadataPrefetcher(view_info, depth=3)
+        prefetcher.start()
+
+        prefetcher.request(6, 1)
+        assert view_info.done.wait(2)
+        prefetcher.stop()
+
+        assert view_info.loaded == ["7.mp3", "8.mp3", "9.mp3"]
+
+    def test_prefetches_rows_above_with_wraparound(self, songs):
+        view_info = FakeViewInfo(songs, done_on="8.mp3")
+        prefetcher = MetadataPrefetcher(view_info, depth=3)
+        prefetcher.start()
+
+        prefetcher.request(1, -1)
+        assert view_info.done.wait(2)
+        prefetcher.stop()
+
+        assert view_info.loaded == ["0.mp3", "9.mp3", "8.mp3"]
+
+    def test_depth_capped_by_library_size(self):
+        view_info = FakeViewInfo(["a.mp3", "b.mp3"])
+        prefetcher = MetadataPrefetcher(view_info, depth=16)
+
+        prefetcher.request(0, 1)
+
+        assert prefetcher._pending == ["b.mp3"]
+
+    def test_empty_library(self):
+        prefetcher = MetadataPrefetcher(FakeViewInfo([]))
+
+        prefetcher.request(0, 1)
+
+        assert prefetcher._pending == []
+
+    def test_new_request_supersedes_old(self, songs):
+        block = threading.Event()
+        view_info = FakeViewInfo(songs, done_on="9.mp3", block=block)
+        prefetcher = MetadataPrefetcher(view_info, depth=5)
+        prefetcher.start()
+
+        prefetcher.request(0, 1)
+        prefetcher.request(4, 1)
+        block.set()
+        assert view_info.done.wait(2)
+        prefetcher.stop()
+
+        # At most the row already being loaded survives from the first request.
+        assert not {"2.mp3", "3.mp3", "4.mp3"} & set(view_info.loaded)
+        assert view_info.loaded[-5:] == ["5.mp3", "6.mp3", "7.mp3", "8.mp3", "9.mp3"]
+
+    def test_cancel(self, songs):
+        view_info = FakeViewInfo(songs)
+        prefetcher = MetadataPrefetcher(view_info, depth=3)
+
+        prefetcher.request(0, 1)
+        prefetcher.cancel()
+        prefetcher.start()
+        prefetcher.stop()
+
+        assert view_info.loaded == []
+
+    def test_errors_do_not_stop_worker(self):
+        view_info = FakeViewInfo(["a.mp3", "boom.mp3", "c.mp3"], done_on="c.mp3")
+        prefetcher = MetadataPrefetcher(view_info, depth=2)
+        prefetcher.start()
+
+        prefetcher.request(0, 1)
+        assert view_info.done.wait(2)
+        prefetcher.stop()
+
+        assert view_info.loaded == ["boom.mp3", "c.mp3"]
+
+
+class TestPrefetchCancellation:
+    @pytest.fixture
+    def song_list(self, songs):
+        from src.urwid_components.list import ListMod
+        from src.urwid_components.songListWalker import SongListWalker
+
+        view_info = FakeViewInfo(songs)
+        prefetcher = MagicMock()
+        return ListMod(SongListWalker(view_info), view_info=view_info, prefetcher=prefetcher)
+
+    def test_focus_jump_cancels(self, song_list):
+        song_list.keypress((20, 3), "page down")
+
+        assert song_list.focus_position > 0
+        song_list.prefetcher.cancel.assert_called_once()
+
+    def test_unhandled_key_keeps_prefetch(self, song_list):
+        song_list.keypress((20, 3), "x")
+
+        song_list.prefetcher.cancel.assert_not_called()
+
+    def test_library_change_cancels(self, song_list, songs):
+        from src.libraryScanner import ScanDelta
+        from src.urwid_components.view import View
+
+        view = View(song_list=song_list, view_info=song_list.view_info)
+
+        view._apply_library_delta(ScanDelta())
+        song_list.prefetcher.cancel.assert_not_called()
+
+        songs.remove("3.mp3")
+        view._apply_library_delta(ScanDelta(removed=["3.mp3"]))
+        song_list.prefetcher.cancel.assert_called_once()
@@ -0,0 +1,231 @@
+import asyncio
+import email.utils
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.rateLimiter import (
+    HostLimit,
+    RateLimiter,
+    RetryPolicy,
+    ThrottledError,
+    TokenBucket,
+    check_response,
+    parse_retry_after,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTokenBucket:
+    def test_burst_up_to_capacity(self):
+        bucket = TokenBucket(rate=2.0, capacity=3, clock=FakeClock())
+
+        assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+        assert bucket.reserve() == pytest.approx(0.5)
+
+    def test_waiters_queue_in_order(self):
+        bucket = TokenBucket(rate=1.0, clock=FakeClock())
+
+        delays = [bucket.reserve() for _ in range(4)]
+
+        assert delays == pytest.approx([0.0, 1.0, 2.0, 3.0])
+
+    def test_refills_over_time(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=4.0, capacity=2, clock=clock)
+        bucket.reserve()
+        bucket.reserve()
+
+        clock.now = 0.25
+        assert bucket.reserve() == 0.0
+        assert bucket.reserve() == pytest.approx(0.25)
+
+    def test_refill_capped_at_capacity(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=1.0, capacity=2, clock=clock)
+
+        clock.now = 100.0
+        delays = [bucket.reserve() for _ in range(3)]
+
+        assert delays == pytest.approx([0.0, 0.0, 1.0])
+
+    def test_pause_delays_next_caller(self):
+        bucket = TokenBucket(rate=2.0, capacity=4, clock=FakeClock())
+
+        bucket.pause(3.0)
+
+        assert bucket.reserve() == pytest.approx(3.0)
+        assert bucket.reserve() == pytest.approx(3.5)
+
+    def test_pause_counts_from_when_it_is_applied(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=1.0, capacity=1, clock=clock)
+        assert bucket.reserve() == 0.0
+
+        clock.now += 3.0
+        bucket.pause(5.0)
+
+        assert bucket.reserve() == pytest.approx(5.0)
+
+    def test_rejects_non_positive_rate(self):
+        with pytest.raises(ValueError):
+            TokenBucket(rate=0)
+
+    @patch("src.rateLimiter.time.sleep")
+    def test_acquire_sleeps_for_delay(self, mock_sleep):
+        bucket = TokenBucket(rate=2.0, clock=FakeClock())
+
+        bucket.acquire()
+        mock_sleep.assert_not_called()
+        bucket.acquire()
+        mock_sleep.assert_called_once_with(pytest.approx(0.5))
+
+    def test_acquire_async_awaits_delay(self):
+        bucket = TokenBucket(rate=2.0, clock=FakeClock())
+        slept = []
+
+        async def fake_sleep(delay):
+            slept.append(delay)
+
+        async def main():
+            await bucket.acquire_async()
+            await bucket.acquire_async()
+
+        with patch("src.rateLimiter.asyncio.sleep", fake_sleep):
+            asyncio.run(main())
+
+        assert slept == [pytest.approx(0.5)]
+
+
+class TestRetryAfter:
+    def test_seconds(self):
+        assert parse_retry_after("7") == 7.0
+
+    def test_http_date(self):
+        when = email.utils.formatdate(time.time() + 30, usegmt=True)
+
+        assert parse_retry_after(when) == pytest.approx(30, abs=2)
+
+    def test_missing_or_garbage(self):
+        assert parse_retry_after(None) is None
+        assert parse_retry_after("soon") is None
+
+    def test_check_response(self):
+        ok = MagicMock(status_code=200)
+        busy = MagicMock(status_code=503, headers={"Retry-After": "2"})
+
+        assert check_response("example.org", ok) is ok
+        with pytest.raises(ThrottledError) as exc_info:
+            check_response("example.org", busy)
+        assert (exc_info.value.status, exc_info.value.retry_after) == (503, 2.0)
+
+
+class TestRetryPolicy:
+    def test_exponential_with_full_jitter(self):
+        policy = RetryPolicy(base_delay=1.0, max_delay=60.0)
+
+        assert policy.backoff(0, None, rand=lambda: 1.0) == 1.0
+        assert policy.backoff(3, None, rand=lambda: 1.0) == 8.0
+        assert policy.backoff(3, None, rand=lambda: 0.5) == 4.0
+        assert policy.backoff(10, None, rand=lambda: 1.0) == 60.0
+
+    def test_retry_after_is_a_floor(self):
+        policy = RetryPolicy(base_delay=1.0)
+
+        assert policy.backoff(0, 5.0, rand=lambda: 1.0) == 5.0
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def limiter(clock):
+    return RateLimiter(
+        limits={"slow.example": HostLimit(1.0, label="Slow")},
+        default=HostLimit(10.0, 10),
+        policy=RetryPolicy(attempts=3, base_delay=1.0, max_delay=60.0),
+        clock=clock,
+        rand=lambda: 1.0,
+    )
+
+
+class TestRateLimiter:
+    def test_buckets_per_host(self, limiter):
+        assert limiter.bucket("slow.example").rate == 1.0
+        assert limiter.bucket("other.example").rate == 10.0
+        assert limiter.bucket("slow.example") is limiter.bucket("slow.example")
+        assert limiter.bucket("a.example") is not limiter.bucket("b.example")
+
+    @patch("src.rateLimiter.time.sleep")
+    def test_retries_honouring_retry_after(self, mock_sleep, limiter):
+        func = MagicMock(side_effect=[ThrottledError("slow.example", 429, 12.0), "ok"])
+
+        assert limiter.call("slow.example", func, "arg") == "ok"
+
+        func.assert_called_with("arg")
+        mock_sleep.assert_called_once_with(pytest.approx(12.0))
+        stats = limiter.stats("slow.example")
+        assert (stats.requests, stats.throttled, stats.retries) == (2, 1, 1)
+
+    @patch("src.rateLimiter.time.sleep")
+    def test_backoff_grows(self, mock_sleep, limiter):
+        func = MagicMock(side_effect=[ThrottledError("x.example", 503)] * 2 + ["ok"])
+
+        assert limiter.call("x.example", func) == "ok"
+
+        assert [c.args[0] for c in mock_sleep.call_args_list] == pytest.approx([1.0, 2.0])
+
+    @patch("src.rateLimiter.time.sleep")
+    def test_gives_up_after_attempts(self, mock_sleep, limiter):
+        func = MagicMock(side_effect=ThrottledError("x.example", 503))
+
+        with pytest.raises(ThrottledError):
+            limiter.call("x.example", func)
+
+        assert func.call_count == 3
+        assert limiter.stats("x.example").failures == 1
+
+    @patch("src.rateLimiter.time.sleep")
+    def test_gives_up_on_long_retry_after(self, mock_sleep, limiter):
+        func = MagicMock(side_effect=ThrottledError("x.example", 429, 3600.0))
+
+        with pytest.raises(ThrottledError):
+            limiter.call("x.example", func)
+
+        func.assert_called_once()
+        mock_sleep.assert_not_called()
+
+    def test_call_async(self, limiter):
+        slept = []
+
+        async def fake_sleep(delay):
+            slept.append(delay)
+
+        func = MagicMock(side_effect=[ThrottledError("slow.example", 503, 4.0), "ok"])
+
+        with patch("src.rateLimiter.asyncio.sleep", fake_sleep):
+            result = asyncio.run(limiter.call_async("slow.example", func, "arg"))
+
+        assert result == "ok"
+        assert slept == [pytest.approx(4.0)]
+
+    def test_summary(self, limiter, clock):
+        limiter.call("slow.example", lambda: None)
+        clock.now = 2.0
+        limiter.call("slow.example", lambda: None)
+        limiter.call("other.example", MagicMock(side_effect=["ok"]))
+
+        assert limiter.summary() == "Slow 0.2/s · other.example 0.1/s"
+
+        clock.now = 100.0
+        assert limiter.summary() == "Slow 0.0/s · other.example 0.0/s"
@@ -0,0 +1,126 @@
+import pytest
+import urwid
+
+from src.libraryScanner import ScanDelta
+from src.urwid_components.songListWalker import SongListWalker
+
+
+class FakeViewInfo:
+    def __init__(self, songs):
+        self.canciones = list(songs)
+
+    def songs_len(self):
+        return len(self.canciones)
+
+
+def songs(n):
+    return [f"song{i:05d}.mp3" for i in range(n)]
+
+
+class TestSongListWalker:
+    def test_no_rows_built_up_front(self):
+        walker = SongListWalker(FakeViewInfo(songs(50_000)))
+
+        assert len(walker) == 50_000
+        assert len(walker._rows) == 0
+
+    def test_getitem_builds_row(self):
+        walker = SongListWalker(FakeViewInfo(["a.mp3", "b.mp3"]))
+
+        row = walker[1]
+
+        assert row.original_widget.text == "b.mp3"
+        assert walker[1] is row
+
+    def test_getitem_out_of_range(self):
+        walker = SongListWalker(FakeViewInfo(["a.mp3"]))
+
+        with pytest.raises(IndexError):
+            walker[1]
+        with pytest.raises(IndexError):
+            walker[-1]
+
+    def test_row_cache_is_bounded(self):
+        walker = SongListWalker(FakeViewInfo(songs(10)), cache_size=3)
+
+        for i in range(10):
+            walker[i]
+
+        assert list(walker._rows) == songs(10)[-3:]
+
+    def test_positions(self):
+        walker = SongListWalker(FakeViewInfo(["a.mp3", "b.mp3"]))
+
+        assert walker.next_position(0) == 1
+        assert walker.prev_position(1) == 0
+        with pytest.raises(IndexError):
+            walker.next_position(1)
+        with pytest.raises(IndexError):
+            walker.prev_position(0)
+        assert list(walker.positions(reverse=True)) == [1, 0]
+
+    def test_empty_library(self):
+        walker = SongListWalker(FakeViewInfo([]))
+
+        assert walker.get_focus() == (None, None)
+
+    def test_render_only_builds_visible_rows(self):
+        walker = SongListWalker(FakeViewInfo(songs(50_000)))
+        listbox = urwid.ListBox(walker)
+
+        listbox.render((40, 10), focus=True)
+
+        assert 0 < len(walker._rows) <= 11
+
+
+class TestSongListWalkerDelta:
+    def test_focus_follows_song_when_songs_added_before_it(self):
+        view_info = FakeViewInfo(["b.mp3", "c.mp3"])
+        walker = SongListWalker(view_info)
+        walker.set_focus(1)
+
+        view_info.canciones = ["a.mp3", "b.mp3", "c.mp3"]
+        walker.apply_delta(ScanDelta(added=["a.mp3"]))
+
+        assert walker.focus == 2
+
+    def test_focus_moves_to_neighbour_when_focused_song_removed(self):
+        view_info = FakeViewInfo(["a.mp3", "b.mp3", "c.mp3"])
+        walker = SongListWalker(view_info)
+        walker.set_focus(1)
+        walker[1]
+
+        view_info.canciones = ["a.mp3", "c.mp3"]
+        walker.apply_delta(ScanDelta(removed=["b.mp3"]))
+
+        assert walker.focus == 1
+        assert "b.mp3" not in walker._rows
+
+    def test_focus_clamped_when_last_song_removed(self):
+        view_info = FakeViewInfo(["a.mp3", "b.mp3"])
+        walker = SongListWalker(view_info)
+        walker.set_focus(1)
+
+        view_info.canciones = ["a.mp3"]
+        walker.apply_delta(ScanDelta(removed=["b.mp3"]))
+
+        assert walker.focus == 0
+
+    def test_first_songs_of_empty_library(self):
+        view_info = FakeViewInfo([])
+        walker = SongListWalker(view_info)
+
+        view_info.canciones = ["a.mp3"]
+        walker.apply_delta(ScanDelta(added=["a.mp3"]))
+
+        assert walker.get_focus()[1] == 0
+
+    def test_emits_modified(self):
+        view_info = FakeViewInfo(["a.mp3"])
+        walker = SongListWalker(view_info)
+        calls = []
+        urwid.connect_signal(walker, "modified", lambda: calls.append(True))
+
+        walker.apply_delta(ScanDelta())
+
+        assert calls == [True]
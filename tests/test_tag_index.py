@@ -0,0 +1,109 @@
+import os
+
+import pytest
+
+from src.tagIndex import StatSignature, TagIndex
+
+
+class TestTagIndex:
+    @pytest.fixture
+    def index(self, tmp_path):
+        index = TagIndex(db_path=tmp_path / "index.sqlite3")
+        yield index
+        index.close()
+
+    @pytest.fixture
+    def signature(self):
+        return StatSignature(size=1024, mtime_ns=1_700_000_000_000_000_000, inode=42)
+
+    def test_default_db_path(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+        index = TagIndex()
+        assert index.db_path == tmp_path / "metadata_editor" / "tag_index.sqlite3"
+        assert index.db_path.exists()
+        index.close()
+
+    def test_get_returns_none_on_miss(self, index, signature):
+        assert index.get("/music/song.mp3", signature) is None
+
+    def test_put_and_get(self, index, signature):
+        index.put("/music/song.mp3", signature, ("Title", "Album", "Artist", "Has cover"))
+
+        result = index.get("/music/song.mp3", signature)
+        assert result == ("Title", "Album", "Artist", "Has cover")
+
+    def test_cover_flag_round_trip(self, index, signature):
+        index.put("/music/song.mp3", signature, ("Title", "Album", "Artist", "No Cover"))
+
+        assert index.get("/music/song.mp3", signature)[3] == "No Cover"
+
+    def test_get_returns_none_when_signature_changed(self, index, signature):
+        index.put("/music/song.mp3", signature, ("Title", "Album", "Artist", "Has cover"))
+
+        assert index.get("/music/song.mp3", signature._replace(size=2048)) is None
+        assert index.get("/music/song.mp3", signature._replace(mtime_ns=1)) is None
+        assert index.get("/music/song.mp3", signature._replace(inode=7)) is None
+
+    def test_put_replaces_existing_row(self, index, signature):
+        index.put("/music/song.mp3", signature, ("Old", "Album", "Artist", "No Cover"))
+        new_signature = signature._replace(size=2048)
+        index.put("/music/song.mp3", new_signature, ("New", "Album", "Artist", "No Cover"))
+
+        assert len(index) == 1
+        assert index.get("/music/song.mp3", new_signature)[0] == "New"
+
+    def test_remove(self, index, signature):
+        index.put("/music/song.mp3", signature, ("Title", "Album", "Artist", "Has cover"))
+        index.remove("/music/song.mp3")
+
+        assert index.get("/music/song.mp3", signature) is None
+
+    def test_cover_location_round_trip(self, index, signature):
+        info = ("Title", "Album", "Artist", "Has cover")
+        index.put("/music/song.mp3", signature, info, cover_location=(512, 40_000))
+
+        assert index.get_cover_location("/music/song.mp3", signature) == (512, 40_000)
+        assert index.get_cover_location("/music/song.mp3", signature._replace(size=1)) is None
+
+    def test_cover_location_unknown(self, index, signature):
+        index.put("/music/song.mp3", signature, ("Title", "Album", "Artist", "Has cover"))
+
+        assert index.get_cover_location("/music/song.mp3", signature) is None
+        assert index.get_cover_location("/music/other.mp3", signature) is None
+
+    def test_cover_hash_round_trip(self, index, signature):
+        index.put("/music/song.mp3", signature, ("Title", "Album", "Artist", "Has cover"))
+        assert index.get_cover_hash("/music/song.mp3", signature) is None
+
+        index.set_cover_hash("/music/song.mp3", signature, "abc123")
+
+        assert index.get_cover_hash("/music/song.mp3", signature) == "abc123"
+        assert index.get_cover_hash("/music/song.mp3", signature._replace(size=1)) is None
+
+    def test_cover_hash_ignored_for_stale_row(self, index, signature):
+        index.put("/music/song.mp3", signature, ("Title", "Album", "Artist", "Has cover"))
+
+        index.set_cover_hash("/music/song.mp3", signature._replace(size=1), "abc123")
+
+        assert index.get_cover_hash("/music/song.mp3", signature) is None
+
+    def test_persists_across_instances(self, tmp_path, signature):
+        db_path = tmp_path / "index.sqlite3"
+        first = TagIndex(db_path=db_path)
+        first.put("/music/song.mp3", signature, ("Title", "Album", "Artist", "Has cover"))
+        first.close()
+
+        second = TagIndex(db_path=db_path)
+        assert second.get("/music/song.mp3", signature) == ("Title", "Album", "Artist", "Has cover")
+        second.close()
+
+
+class TestStatSignature:
+    def test_from_stat(self, tmp_path):
+        song = tmp_path / "song.mp3"
+        song.write_bytes(b"abc")
+        st = os.stat(song)
+
+        signature = StatSignature.from_stat(st)
+
+        assert signature == (3, st.st_mtime_ns, st.st_ino)
@@ -3,7 +3,11 @@ from unittest.mock import MagicMock, patch
 import pytest
 
 try:
-    from src.tagModifier import MP3Editor
+    from mutagen import PaddingInfo
+    from mutagen.id3 import APIC, ID3, TIT2
+
+    from src.id3Reader import read_list_tags
+    from src.tagModifier import MP3Editor, padding_policy, repad_file, repad_library
 except ImportError:
     pytest.skip("tagModifier dependencies not available", allow_module_level=True)
 
@@ -45,39 +49,114 @@ class TestMP3Editor:
         mock_audiofile.add.assert_called()
         mock_audiofile.save.assert_called()
 
+    def test_transaction_saves_once(self, mock_audiofile):
+        editor = MP3Editor("/path/to/song.mp3")
+
+        with editor.transaction():
+            editor.change_title("Title")
+            editor.change_album("Album")
+            editor.change_artist("Artist")
+            editor.remove_album_cover()
+            mock_audiofile.save.assert_not_called()
+
+        assert mock_audiofile.add.call_count == 3
+        mock_audiofile.save.assert_called_once()
+
+    def test_transaction_without_changes_does_not_save(self, mock_audiofile):
+        editor = MP3Editor("/path/to/song.mp3")
+
+        with editor.transaction():
+            pass
+
+        mock_audiofile.save.assert_not_called()
+
+    def test_nested_transaction_saves_once(self, mock_audiofile):
+        editor = MP3Editor("/path/to/song.mp3")
+
+        with editor.transaction():
+            editor.change_title("Title")
+            with editor.transaction():
+                editor.change_album("Album")
+            mock_audiofile.save.assert_not_called()
+
+        mock_audiofile.save.assert_called_once()
+
+    def test_transaction_rolls_back_on_error(self, mock_audiofile):
+        editor = MP3Editor("/path/to/song.mp3")
+
+        with patch("src.tagModifier.ID3") as mock_id3:
+            reloaded = MagicMock()
+            mock_id3.return_value = reloaded
+            with pytest.raises(RuntimeError):
+                with editor.transaction():
+                    editor.change_title("Title")
+                    raise RuntimeError("boom")
+
+        mock_audiofile.save.assert_not_called()
+        mock_id3.assert_called_once_with("/path/to/song.mp3")
+        assert editor.audiofile is reloaded
+
+        editor.change_title("Again")
+        reloaded.save.assert_called_once()
+
+    @patch("src.tagModifier.trackInfo.fetch_cover", return_value=b"fake image data")
+    @patch("src.tagModifier.trackInfo.get_track_features")
+    def test_fill_metadata_saves_once(self, mock_features, mock_fetch, mock_audiofile):
+        mock_features.return_value = ("Title", "Artist", "Album", ("http://example.com/c.jpg",))
+        mock_audiofile.get.return_value = None
+
+        editor = MP3Editor("/path/to/song.mp3")
+        editor.fill_metadata()
+
+        mock_fetch.assert_called_once_with(("http://example.com/c.jpg",))
+        assert mock_audiofile.add.call_count == 4
+        mock_audiofile.save.assert_called_once()
+
+    def test_apply_metadata_with_track_number(self, mock_audiofile):
+        mock_audiofile.get.return_value = None
+
+        editor = MP3Editor("/path/to/song.mp3")
+        editor.apply_metadata("Title", "Artist", "Album", None, "3/12")
+
+        frames = [c.args[0] for c in mock_audiofile.add.call_args_list]
+        assert [type(f).__name__ for f in frames] == ["TIT2", "TPE1", "TALB", "TRCK"]
+        assert frames[3].text == ["3/12"]
+        mock_audiofile.save.assert_called_once()
+
     def test_save_calls_save_method(self, mock_audiofile):
         editor = MP3Editor("/path/to/song.mp3")
         editor.save()
         mock_audiofile.save.assert_called_once()
 
-    @patch("src.tagModifier.requests.get")
-    def test_add_album_cover_success(self, mock_get, mock_audiofile):
-        mock_response = MagicMock()
-        mock_response.content = b"fake image data"
-        mock_response.raise_for_status = MagicMock()
-        mock_get.return_value = mock_response
+    @patch("src.tagModifier.trackInfo.fetch_cover", return_value=b"fake image data")
+    def test_add_album_cover_success(self, mock_fetch, mock_audiofile):
         mock_audiofile.get.return_value = None
 
         editor = MP3Editor("/path/to/song.mp3")
         editor.add_album_cover("http://example.com/cover.jpg")
 
-        mock_get.assert_called_once()
+        mock_fetch.assert_called_once_with(("http://example.com/cover.jpg",))
         mock_audiofile.add.assert_called()
         mock_audiofile.save.assert_called()
 
-    @patch("src.tagModifier.requests.get")
-    def test_add_album_cover_when_already_exists(self, mock_get, mock_audiofile):
-        mock_response = MagicMock()
-        mock_response.content = b"fake image data"
-        mock_response.raise_for_status = MagicMock()
-        mock_get.return_value = mock_response
+    @patch("src.tagModifier.trackInfo.fetch_cover", return_value=None)
+    def test_add_album_cover_none_available(self, mock_fetch, mock_audiofile):
+        mock_audiofile.get.return_value = None
+
+        editor = MP3Editor("/path/to/song.mp3")
+        editor.add_album_cover(("http://example.com/a.jpg", "http://example.com/b.jpg"))
 
+        mock_audiofile.add.assert_not_called()
+        mock_audiofile.save.assert_not_called()
+
+    @patch("src.tagModifier.trackInfo.fetch_cover")
+    def test_add_album_cover_when_already_exists(self, mock_fetch, mock_audiofile):
         mock_audiofile.get.return_value = MagicMock()
 
         editor = MP3Editor("/path/to/song.mp3")
         editor.add_album_cover("http://example.com/cover.jpg")
 
-        mock_get.assert_called_once()
+        mock_fetch.assert_not_called()
         mock_audiofile.add.assert_not_called()
 
     def test_get_cover_returns_image(self, mock_audiofile):
@@ -129,6 +208,14 @@ class TestMP3Editor:
         assert title == "Test Title"
         assert album == "Test Album"
         assert artist == "Test Artist"
+        assert cover == "No Cover"
+
+    def test_song_info_reports_cover(self, mock_audiofile):
+        mock_audiofile.get.side_effect = lambda x: MagicMock() if x == "APIC:Cover" else None
+
+        editor = MP3Editor("/path/to/song.mp3")
+
+        assert editor.song_info() == ("", "", "", "Has cover")
 
     def test_has_metadata_true_when_complete(self, mock_audiofile):
         mock_audiofile.get.return_value = MagicMock()
@@ -145,3 +232,69 @@ class TestMP3Editor:
         result = editor.has_metadata()
 
         assert result is False
+
+
+class TestPadding:
+    @pytest.fixture
+    def song(self, tmp_path):
+        path = tmp_path / "song.mp3"
+        path.write_bytes(b"\xff\xfb" + b"\0" * 4096)
+        tags = ID3()
+        tags.add(TIT2(encoding=3, text="Title"))
+        tags.save(path, padding=lambda info: 16)
+        return path
+
+    def test_policy_keeps_existing_padding(self):
+        assert padding_policy(1000)(PaddingInfo(200_000, 5_000_000)) == 200_000
+
+    def test_policy_reserves_when_rewriting(self):
+        assert padding_policy(1000)(PaddingInfo(-50, 5_000_000)) == 1000
+
+    def test_repad_file(self, song):
+        assert repad_file(str(song), reserve=32 * 1024) is True
+        assert read_list_tags(str(song)).padding >= 32 * 1024
+
+        mtime = song.stat().st_mtime_ns
+        assert repad_file(str(song), reserve=32 * 1024) is False
+        assert song.stat().st_mtime_ns == mtime
+
+    def test_track_number_round_trip(self, song):
+        editor = MP3Editor(str(song))
+        assert editor.track_number() == ""
+
+        editor.change_track_number("3/12")
+
+        assert MP3Editor(str(song)).track_number() == "3/12"
+
+    def test_repad_untagged_file(self, tmp_path):
+        path = tmp_path / "bare.mp3"
+        path.write_bytes(b"\xff\xfb" + b"\0" * 4096)
+
+        assert repad_file(str(path), reserve=1024) is True
+        assert read_list_tags(str(path)).padding >= 1024
+
+    def test_cover_embed_after_repad_is_in_place(self, song):
+        repad_file(str(song), reserve=32 * 1024)
+        size = song.stat().st_size
+
+        editor = MP3Editor(str(song))
+        with editor.transaction():
+            editor.change_album("Album")
+            editor.audiofile.add(
+                APIC(encoding=3, mime="image/jpeg", type=3, desc="Cover", data=b"\xff" * 20_000)
+            )
+            editor.save()
+
+        assert song.stat().st_size == size
+        assert MP3Editor(str(song)).song_info() == ("Title", "Album", "", "Has cover")
+
+    def test_repad_library_counts(self, song, tmp_path):
+        missing = tmp_path / "missing.mp3"
+        progress = []
+
+        result = repad_library(
+            [str(song), str(missing)], reserve=1024, on_progress=lambda *a: progress.append(a)
+        )
+
+        assert result == (1, 1)
+        assert progress == [(str(song), True)]
@@ -1,8 +1,30 @@
+from io import BytesIO
+from unittest.mock import MagicMock, patch
+
+import pytest
+
 try:
-    from src.trackInfo import _REGEX_FILE_EXT, _clean_query
-except ImportError:
-    import pytest
+    import spotipy
+    from PIL import Image
 
+    from src.coverNormalizer import CoverFormat
+    from src.coverStore import CoverStore
+    from src.lookupCache import NOT_FOUND, LookupCache
+    from src.rateLimiter import HostLimit, RateLimiter, ThrottledError
+    from src.trackInfo import (
+        _REGEX_FILE_EXT,
+        ProviderError,
+        _clean_query,
+        _download_cover,
+        _extract_musicbrainz_metadata,
+        _extract_musicbrainz_release,
+        _search_musicbrainz,
+        _search_musicbrainz_release,
+        _search_spotify,
+        fetch_cover,
+        get_track_features,
+    )
+except ImportError:
     pytest.skip("Required dependencies not available", allow_module_level=True)
 
 
@@ -95,3 +117,233 @@ class TestRegexFileExt:
     def test_case_insensitive(self):
         assert _REGEX_FILE_EXT.search("song.MP3") is not None
         assert _REGEX_FILE_EXT.search("song.FLAC") is not None
+
+
+class TestMusicBrainz:
+    def test_extracts_first_recording(self):
+        result = {
+            "recordings": [
+                {
+                    "title": "Song",
+                    "artist-credit": [{"name": "Artist", "artist": {"name": "Artist"}}],
+                    "releases": [
+                        {"id": "rel-1", "title": "Album"},
+                        {"id": "rel-2", "title": "Album (Deluxe)"},
+                    ],
+                }
+            ]
+        }
+
+        assert _extract_musicbrainz_metadata(result) == (
+            "Song",
+            "Artist",
+            "Album",
+            (
+                "https://coverartarchive.org/release/rel-1/front-250",
+                "https://coverartarchive.org/release/rel-2/front-250",
+            ),
+        )
+
+    def test_no_recordings(self):
+        assert _extract_musicbrainz_metadata({"recordings": []}) is None
+
+    @patch("src.trackInfo.get_session")
+    def test_throttled(self, mock_session):
+        mock_session.return_value.get.return_value = MagicMock(
+            status_code=503, headers={"Retry-After": "3"}
+        )
+
+        with pytest.raises(ThrottledError) as exc_info:
+            _search_musicbrainz("song")
+
+        assert (exc_info.value.host, exc_info.value.retry_after) == ("musicbrainz.org", 3.0)
+
+
+def json_response(payload):
+    return MagicMock(status_code=200, headers={}, json=MagicMock(return_value=payload))
+
+
+class TestMusicBrainzRelease:
+    @patch("src.trackInfo.get_session")
+    def test_search_prefers_exact_track_count(self, mock_session):
+        mock_session.return_value.get.return_value = json_response(
+            {
+                "releases": [
+                    {"id": "short", "track-count": 8},
+                    {"id": "deluxe", "track-count": 14},
+                    {"id": "exact", "track-count": 10},
+                ]
+            }
+        )
+
+        assert _search_musicbrainz_release("Album", "Artist", 10) == "exact"
+        params = mock_session.return_value.get.call_args.kwargs["params"]
+        assert params["query"] == 'release:"Album" AND artist:"Artist"'
+
+    @patch("src.trackInfo.get_session")
+    def test_search_falls_back_to_larger_release(self, mock_session):
+        mock_session.return_value.get.return_value = json_response(
+            {"releases": [{"id": "short", "track-count": 8}, {"id": "deluxe", "track-count": 14}]}
+        )
+
+        assert _search_musicbrainz_release('Al"bum', "", 10) == "deluxe"
+        params = mock_session.return_value.get.call_args.kwargs["params"]
+        assert params["query"] == 'release:"Al bum"'
+
+    @patch("src.trackInfo.get_session")
+    def test_search_no_release_fits(self, mock_session):
+        mock_session.return_value.get.return_value = json_response(
+            {"releases": [{"id": "short", "track-count": 8}]}
+        )
+
+        assert _search_musicbrainz_release("Album", "Artist", 10) is None
+
+    def test_extract_numbers_tracks_across_discs(self):
+        artist = [{"name": "Artist", "artist": {"name": "Artist"}}]
+        result = {
+            "id": "rel-1",
+            "title": "Album",
+            "artist-credit": artist,
+            "media": [
+                {"tracks": [{"title": "One", "artist-credit": artist}, {"title": "Two"}]},
+                {"tracks": [{"recording": {"title": "Three"}}]},
+            ],
+        }
+
+        release = _extract_musicbrainz_release(result)
+
+        assert (release.id, release.title, release.artist) == ("rel-1", "Album", "Artist")
+        assert [(t.number, t.title, t.artist) for t in release.tracks] == [
+            (1, "One", "Artist"),
+            (2, "Two", None),
+            (3, "Three", None),
+        ]
+        assert release.cover_urls == ("https://coverartarchive.org/release/rel-1/front-250",)
+
+    def test_extract_without_tracks(self):
+        assert _extract_musicbrainz_release({"id": "rel-1", "media": []}) is None
+
+
+def cover_response(status_code, content_type="image/jpeg", content=b"image"):
+    response = MagicMock(status_code=status_code, headers={"Content-Type": content_type})
+    response.__enter__.return_value = response
+    response.content = content
+    return response
+
+
+class TestCovers:
+    @patch("src.trackInfo.get_session")
+    def test_download_reads_image(self, mock_session):
+        mock_session.return_value.get.return_value = cover_response(200)
+
+        assert _download_cover("coverartarchive.org", "https://coverartarchive.org/x") == b"image"
+        mock_session.return_value.get.assert_called_once_with(
+            "https://coverartarchive.org/x", stream=True, timeout=10
+        )
+
+    @patch("src.trackInfo.get_session")
+    def test_download_missing(self, mock_session):
+        mock_session.return_value.get.return_value = cover_response(404)
+
+        assert _download_cover("coverartarchive.org", "https://coverartarchive.org/x") is None
+
+    @patch("src.trackInfo.get_session")
+    def test_download_not_an_image(self, mock_session):
+        mock_session.return_value.get.return_value = cover_response(200, "text/html")
+
+        assert _download_cover("coverartarchive.org", "https://coverartarchive.org/x") is None
+
+    @patch("src.trackInfo.get_session")
+    def test_download_throttled(self, mock_session):
+        mock_session.return_value.get.return_value = cover_response(429)
+
+        with pytest.raises(ThrottledError):
+            _download_cover("coverartarchive.org", "https://coverartarchive.org/x")
+
+    @pytest.fixture
+    def cover_store(self, tmp_path):
+        store = CoverStore(tmp_path)
+        with patch("src.trackInfo.get_cover_store", return_value=store):
+            yield store
+        store.close()
+
+    @patch("src.trackInfo.LIMITER", RateLimiter(limits={}, default=HostLimit(1e9, 1e9)))
+    @patch("src.trackInfo._download_cover")
+    def test_fetch_falls_back_on_missing_or_failed(self, mock_download, cover_store):
+        mock_download.side_effect = [None, ProviderError("reset"), b"image"]
+        urls = ("https://a.example/1", "https://a.example/2", "https://b.example/3")
+
+        assert fetch_cover(urls) == b"image"
+        assert mock_download.call_count == 3
+        assert cover_store.is_missing(urls[0])
+        assert not cover_store.is_missing(urls[1])
+
+    @patch("src.trackInfo.LIMITER", RateLimiter(limits={}, default=HostLimit(1e9, 1e9)))
+    @patch("src.trackInfo._download_cover")
+    def test_fetch_normalizes_download(self, mock_download, cover_store):
+        buffer = BytesIO()
+        Image.new("RGB", (640, 640), "red").save(buffer, "PNG")
+        mock_download.return_value = buffer.getvalue()
+
+        data = fetch_cover(("https://a.example/1",), CoverFormat(max_dimension=200))
+
+        image = Image.open(BytesIO(data))
+        assert (image.format, image.size) == ("JPEG", (200, 200))
+
+    @patch("src.trackInfo.LIMITER", RateLimiter(limits={}, default=HostLimit(1e9, 1e9)))
+    @patch("src.trackInfo._download_cover", return_value=b"image")
+    def test_fetch_reuses_stored_cover(self, mock_download, cover_store):
+        urls = ("https://a.example/1",)
+
+        assert fetch_cover(urls) == b"image"
+        assert fetch_cover(urls) == b"image"
+        mock_download.assert_called_once()
+
+
+class TestSpotify:
+    @patch("src.trackInfo._get_spotify_client")
+    def test_throttled(self, mock_client):
+        mock_client.return_value.search.side_effect = spotipy.SpotifyException(
+            429, -1, "rate limited", headers={"Retry-After": "5"}
+        )
+
+        with pytest.raises(ThrottledError) as exc_info:
+            _search_spotify("song")
+
+        assert (exc_info.value.host, exc_info.value.retry_after) == ("api.spotify.com", 5.0)
+
+
+class TestGetTrackFeatures:
+    @pytest.fixture
+    def cache(self, tmp_path):
+        cache = LookupCache(db_path=tmp_path / "lookups.sqlite3")
+        limiter = RateLimiter(limits={}, default=HostLimit(1e9, 1e9))
+        with (
+            patch("src.trackInfo.get_lookup_cache", return_value=cache),
+            patch("src.trackInfo.LIMITER", limiter),
+        ):
+            yield cache
+        cache.close()
+
+    @patch("src.trackInfo._search_spotify", return_value=None)
+    @patch("src.trackInfo._search_musicbrainz", return_value=("N", "A", "B", ()))
+    def test_cached_after_first_lookup(self, mock_mb, mock_spotify, cache):
+        first = get_track_features("Title", "Artist", "Album", "song.mp3")
+        second = get_track_features("Title", "Artist", "Album", "song.mp3")
+
+        assert first == second == ("N", "A", "B", ())
+        mock_mb.assert_called_once()
+
+    @patch("src.trackInfo._search_spotify", return_value=None)
+    @patch("src.trackInfo._search_musicbrainz", return_value=None)
+    def test_caches_miss(self, mock_mb, mock_spotify, cache):
+        assert get_track_features("Title", "Artist", "Album", "song.mp3") == NOT_FOUND
+
+        assert cache.get("title artist album") == NOT_FOUND
+
+    @patch("src.trackInfo._search_spotify", return_value=None)
+    @patch("src.trackInfo._search_musicbrainz", side_effect=ProviderError("offline"))
+    def test_failure_not_cached(self, mock_mb, mock_spotify, cache):
+        assert get_track_features("Title", "Artist", "Album", "song.mp3") == NOT_FOUND
+
+        assert cache.get("title artist album") is None
@@ -1,27 +1,45 @@
+import os
+import threading
 from unittest.mock import MagicMock, patch
 
 import pytest
 
 try:
-    from src.viewInfo import ViewInfo
+    from src.id3Reader import ListTags
+    from src.tagIndex import StatSignature, TagIndex
+    from src.viewInfo import BATCH_ADD_THRESHOLD, ViewInfo
 except ImportError:
     pytest.skip("viewInfo dependencies not available", allow_module_level=True)
 
 
+def fake_scandir(names):
+    entries = []
+    for name in names:
+        entry = MagicMock()
+        entry.name = name
+        entry.is_file.return_value = True
+        entry.stat.return_value = MagicMock(st_size=0, st_mtime_ns=0, st_ino=0)
+        entries.append(entry)
+
+    scandir = MagicMock()
+    scandir.__enter__.return_value = iter(entries)
+    return scandir
+
+
 @pytest.fixture
-def mock_mp3_editor():
-    with patch("src.tagModifier.MP3Editor") as mock_class:
-        mock_editor = MagicMock()
-        mock_editor.song_info.return_value = ("Title", "Album", "Artist", "Has cover")
-        mock_class.return_value = mock_editor
-        yield mock_editor
+def mock_read_tags():
+    with patch("src.viewInfo.read_tags") as mock_read:
+        mock_read.return_value = ListTags("Title", "Album", "Artist", 100, 10, has_cover=True)
+        yield mock_read
 
 
 class TestViewInfo:
     @patch("src.viewInfo.os.chdir")
-    @patch("src.viewInfo.os.listdir")
-    def test_init_loads_mp3_files(self, mock_listdir, mock_chdir):
-        mock_listdir.return_value = ["song1.mp3", "song2.mp3", "song3.txt", "song4.mp3"]
+    @patch("src.libraryScanner.os.scandir")
+    def test_init_loads_mp3_files(self, mock_scandir, mock_chdir):
+        mock_scandir.return_value = fake_scandir(
+            ["song1.mp3", "song2.mp3", "song3.txt", "song4.mp3"]
+        )
 
         view = ViewInfo("/test/dir")
 
@@ -32,26 +50,26 @@ class TestViewInfo:
         assert "song3.txt" not in view.canciones
 
     @patch("src.viewInfo.os.chdir")
-    @patch("src.viewInfo.os.listdir")
-    def test_init_sorts_songs(self, mock_listdir, mock_chdir):
-        mock_listdir.return_value = ["z_song.mp3", "a_song.mp3", "m_song.mp3"]
+    @patch("src.libraryScanner.os.scandir")
+    def test_init_sorts_songs(self, mock_scandir, mock_chdir):
+        mock_scandir.return_value = fake_scandir(["z_song.mp3", "a_song.mp3", "m_song.mp3"])
 
         view = ViewInfo("/test/dir")
 
         assert view.canciones == ["a_song.mp3", "m_song.mp3", "z_song.mp3"]
 
     @patch("src.viewInfo.os.chdir")
-    @patch("src.viewInfo.os.listdir")
-    def test_get_dir(self, mock_listdir, mock_chdir):
-        mock_listdir.return_value = []
+    @patch("src.libraryScanner.os.scandir")
+    def test_get_dir(self, mock_scandir, mock_chdir):
+        mock_scandir.return_value = fake_scandir([])
 
         view = ViewInfo("/test/dir")
         assert view.get_dir() == "/test/dir"
 
     @patch("src.viewInfo.os.chdir")
-    @patch("src.viewInfo.os.listdir")
-    def test_add_song(self, mock_listdir, mock_chdir):
-        mock_listdir.return_value = ["a.mp3", "b.mp3"]
+    @patch("src.libraryScanner.os.scandir")
+    def test_add_song(self, mock_scandir, mock_chdir):
+        mock_scandir.return_value = fake_scandir(["a.mp3", "b.mp3"])
 
         view = ViewInfo("/test/dir")
         view.add_song("c.mp3")
@@ -59,9 +77,9 @@ class TestViewInfo:
         assert "c.mp3" in view.canciones
 
     @patch("src.viewInfo.os.chdir")
-    @patch("src.viewInfo.os.listdir")
-    def test_delete_song(self, mock_listdir, mock_chdir):
-        mock_listdir.return_value = ["a.mp3", "b.mp3"]
+    @patch("src.libraryScanner.os.scandir")
+    def test_delete_song(self, mock_scandir, mock_chdir):
+        mock_scandir.return_value = fake_scandir(["a.mp3", "b.mp3"])
 
         view = ViewInfo("/test/dir")
         view.delete_song("a.mp3")
@@ -69,9 +87,45 @@ class TestViewInfo:
         assert "a.mp3" not in view.canciones
 
     @patch("src.viewInfo.os.chdir")
-    @patch("src.viewInfo.os.listdir")
-    def test_delete_song_invalidates_cache(self, mock_listdir, mock_chdir):
-        mock_listdir.return_value = ["a.mp3", "b.mp3"]
+    @patch("src.libraryScanner.os.scandir")
+    def test_add_song_twice(self, mock_scandir, mock_chdir):
+        mock_scandir.return_value = fake_scandir(["a.mp3"])
+
+        view = ViewInfo("/test/dir")
+        view.add_song("a.mp3")
+        view.add_songs(["a.mp3", "b.mp3"])
+
+        assert view.canciones == ["a.mp3", "b.mp3"]
+
+    @patch("src.viewInfo.os.chdir")
+    @patch("src.libraryScanner.os.scandir")
+    def test_index_of(self, mock_scandir, mock_chdir):
+        mock_scandir.return_value = fake_scandir(["c.mp3", "a.mp3"])
+
+        view = ViewInfo("/test/dir")
+        view.add_song("b.mp3")
+
+        assert view.index_of("a.mp3") == 0
+        assert view.index_of("b.mp3") == 1
+        assert view.index_of("c.mp3") == 2
+        assert view.index_of("missing.mp3") is None
+
+    @patch("src.viewInfo.os.chdir")
+    @patch("src.libraryScanner.os.scandir")
+    def test_index_of_after_delete(self, mock_scandir, mock_chdir):
+        mock_scandir.return_value = fake_scandir(["a.mp3", "b.mp3", "c.mp3"])
+
+        view = ViewInfo("/test/dir")
+        view.delete_song("a.mp3")
+
+        assert view.index_of("a.mp3") is None
+        assert view.index_of("c.mp3") == 1
+        assert view.is_song("a.mp3") is False
+
+    @patch("src.viewInfo.os.chdir")
+    @patch("src.libraryScanner.os.scandir")
+    def test_delete_song_invalidates_cache(self, mock_scandir, mock_chdir):
+        mock_scandir.return_value = fake_scandir(["a.mp3", "b.mp3"])
 
         view = ViewInfo("/test/dir")
         view._metadata_cache["a.mp3"] = ("t", "a", "a", "c")
@@ -80,9 +134,9 @@ class TestViewInfo:
         assert "a.mp3" not in view._metadata_cache
 
     @patch("src.viewInfo.os.chdir")
-    @patch("src.viewInfo.os.listdir")
-    def test_song_info_empty_list(self, mock_listdir, mock_chdir):
-        mock_listdir.return_value = []
+    @patch("src.libraryScanner.os.scandir")
+    def test_song_info_empty_list(self, mock_scandir, mock_chdir):
+        mock_scandir.return_value = fake_scandir([])
 
         view = ViewInfo("/test/dir")
         result = view.song_info(0)
@@ -90,9 +144,9 @@ class TestViewInfo:
         assert result == ("", "", "", "No Cover")
 
     @patch("src.viewInfo.os.chdir")
-    @patch("src.viewInfo.os.listdir")
-    def test_song_info_returns_cached(self, mock_listdir, mock_chdir, mock_mp3_editor):
-        mock_listdir.return_value = ["song.mp3"]
+    @patch("src.libraryScanner.os.scandir")
+    def test_song_info_returns_cached(self, mock_scandir, mock_chdir, mock_read_tags):
+        mock_scandir.return_value = fake_scandir(["song.mp3"])
 
         view = ViewInfo("/test/dir")
         view._metadata_cache["song.mp3"] = (
@@ -107,9 +161,9 @@ class TestViewInfo:
         assert result == ("Cached Title", "Cached Album", "Cached Artist", "Cached Cover")
 
     @patch("src.viewInfo.os.chdir")
-    @patch("src.viewInfo.os.listdir")
-    def test_song_info_caches_result(self, mock_listdir, mock_chdir, mock_mp3_editor):
-        mock_listdir.return_value = ["song.mp3"]
+    @patch("src.libraryScanner.os.scandir")
+    def test_song_info_caches_result(self, mock_scandir, mock_chdir, mock_read_tags):
+        mock_scandir.return_value = fake_scandir(["song.mp3"])
 
         view = ViewInfo("/test/dir")
         view.song_info(0)
@@ -117,9 +171,36 @@ class TestViewInfo:
         assert "song.mp3" in view._metadata_cache
 
     @patch("src.viewInfo.os.chdir")
-    @patch("src.viewInfo.os.listdir")
-    def test_invalidate_cache(self, mock_listdir, mock_chdir):
-        mock_listdir.return_value = []
+    @patch("src.libraryScanner.os.scandir")
+    def test_song_info_by_name(self, mock_scandir, mock_chdir, mock_read_tags):
+        mock_scandir.return_value = fake_scandir(["song.mp3"])
+
+        view = ViewInfo("/test/dir")
+
+        assert view.song_info_by_name("song.mp3") == ("Title", "Album", "Artist", "Has cover")
+        assert "song.mp3" in view._metadata_cache
+
+    @patch("src.viewInfo.os.chdir")
+    @patch("src.libraryScanner.os.scandir")
+    def test_song_info_not_cached_if_invalidated_while_loading(
+        self, mock_scandir, mock_chdir, mock_read_tags
+    ):
+        mock_scandir.return_value = fake_scandir(["song.mp3"])
+        view = ViewInfo("/test/dir")
+
+        def edit_while_reading(_path):
+            view.invalidate_cache("song.mp3")
+            return ListTags("Old")
+
+        mock_read_tags.side_effect = edit_while_reading
+
+        assert view.song_info_by_name("song.mp3") == ("Old", "", "", "No Cover")
+        assert "song.mp3" not in view._metadata_cache
+
+    @patch("src.viewInfo.os.chdir")
+    @patch("src.libraryScanner.os.scandir")
+    def test_invalidate_cache(self, mock_scandir, mock_chdir):
+        mock_scandir.return_value = fake_scandir([])
 
         view = ViewInfo("/test/dir")
         view._metadata_cache["song.mp3"] = ("t", "a", "a", "c")
@@ -129,9 +210,9 @@ class TestViewInfo:
         assert "song.mp3" not in view._metadata_cache
 
     @patch("src.viewInfo.os.chdir")
-    @patch("src.viewInfo.os.listdir")
-    def test_song_file_name(self, mock_listdir, mock_chdir):
-        mock_listdir.return_value = ["song.mp3"]
+    @patch("src.libraryScanner.os.scandir")
+    def test_song_file_name(self, mock_scandir, mock_chdir):
+        mock_scandir.return_value = fake_scandir(["song.mp3"])
 
         view = ViewInfo("/test/dir")
         result = view.song_file_name(0)
@@ -139,9 +220,9 @@ class TestViewInfo:
         assert result == "song.mp3"
 
     @patch("src.viewInfo.os.chdir")
-    @patch("src.viewInfo.os.listdir")
-    def test_song_file_name_empty(self, mock_listdir, mock_chdir):
-        mock_listdir.return_value = []
+    @patch("src.libraryScanner.os.scandir")
+    def test_song_file_name_empty(self, mock_scandir, mock_chdir):
+        mock_scandir.return_value = fake_scandir([])
 
         view = ViewInfo("/test/dir")
         result = view.song_file_name(0)
@@ -149,33 +230,33 @@ class TestViewInfo:
         assert result == "None"
 
     @patch("src.viewInfo.os.chdir")
-    @patch("src.viewInfo.os.listdir")
-    def test_songs_len(self, mock_listdir, mock_chdir):
-        mock_listdir.return_value = ["a.mp3", "b.mp3", "c.mp3"]
+    @patch("src.libraryScanner.os.scandir")
+    def test_songs_len(self, mock_scandir, mock_chdir):
+        mock_scandir.return_value = fake_scandir(["a.mp3", "b.mp3", "c.mp3"])
 
         view = ViewInfo("/test/dir")
         assert view.songs_len() == 3
 
     @patch("src.viewInfo.os.chdir")
-    @patch("src.viewInfo.os.listdir")
-    def test_is_song_true(self, mock_listdir, mock_chdir):
-        mock_listdir.return_value = ["song.mp3"]
+    @patch("src.libraryScanner.os.scandir")
+    def test_is_song_true(self, mock_scandir, mock_chdir):
+        mock_scandir.return_value = fake_scandir(["song.mp3"])
 
         view = ViewInfo("/test/dir")
         assert view.is_song("song.mp3") is True
 
     @patch("src.viewInfo.os.chdir")
-    @patch("src.viewInfo.os.listdir")
-    def test_is_song_false(self, mock_listdir, mock_chdir):
-        mock_listdir.return_value = ["song.mp3"]
+    @patch("src.libraryScanner.os.scandir")
+    def test_is_song_false(self, mock_scandir, mock_chdir):
+        mock_scandir.return_value = fake_scandir(["song.mp3"])
 
         view = ViewInfo("/test/dir")
         assert view.is_song("other.mp3") is False
 
     @patch("src.viewInfo.os.chdir")
-    @patch("src.viewInfo.os.listdir")
-    def test_get_current_song(self, mock_listdir, mock_chdir):
-        mock_listdir.return_value = ["song.mp3"]
+    @patch("src.libraryScanner.os.scandir")
+    def test_get_current_song(self, mock_scandir, mock_chdir):
+        mock_scandir.return_value = fake_scandir(["song.mp3"])
 
         view = ViewInfo("/test/dir")
         result = view.get_current_song()
@@ -183,9 +264,9 @@ class TestViewInfo:
         assert result == "/test/dir/song.mp3"
 
     @patch("src.viewInfo.os.chdir")
-    @patch("src.viewInfo.os.listdir")
-    def test_get_current_song_empty(self, mock_listdir, mock_chdir):
-        mock_listdir.return_value = []
+    @patch("src.libraryScanner.os.scandir")
+    def test_get_current_song_empty(self, mock_scandir, mock_chdir):
+        mock_scandir.return_value = fake_scandir([])
 
         view = ViewInfo("/test/dir")
         result = view.get_current_song()
@@ -193,9 +274,9 @@ class TestViewInfo:
         assert result is None
 
     @patch("src.viewInfo.os.chdir")
-    @patch("src.viewInfo.os.listdir")
-    def test_get_metadata_cache_returns_copy(self, mock_listdir, mock_chdir):
-        mock_listdir.return_value = []
+    @patch("src.libraryScanner.os.scandir")
+    def test_get_metadata_cache_returns_copy(self, mock_scandir, mock_chdir):
+        mock_scandir.return_value = fake_scandir([])
 
         view = ViewInfo("/test/dir")
         view._metadata_cache["song.mp3"] = ("t", "a", "a", "c")
@@ -208,3 +289,227 @@ class TestViewInfo:
         # Ensure it's a copy, not the original
         view._metadata_cache["song.mp3"] = ("t2", "a2", "a2", "c2")
         assert cache["song.mp3"] == ("t", "a", "a", "c")
+
+
+class TestViewInfoRefresh:
+    @pytest.fixture
+    def music_dir(self, tmp_path):
+        (tmp_path / "a.mp3").write_bytes(b"a")
+        (tmp_path / "b.mp3").write_bytes(b"b")
+        cwd = os.getcwd()
+        yield tmp_path
+        os.chdir(cwd)
+
+    def test_refresh_without_changes_is_empty(self, music_dir):
+        view = ViewInfo(str(music_dir))
+
+        assert not view.refresh()
+        assert view.canciones == ["a.mp3", "b.mp3"]
+
+    def test_refresh_applies_added_and_removed(self, music_dir):
+        view = ViewInfo(str(music_dir))
+        (music_dir / "a.mp3").unlink()
+        (music_dir / "c.mp3").write_bytes(b"c")
+
+        delta = view.refresh()
+
+        assert delta.added == ["c.mp3"]
+        assert delta.removed == ["a.mp3"]
+        assert view.canciones == ["b.mp3", "c.mp3"]
+
+    def test_refresh_invalidates_modified(self, music_dir):
+        view = ViewInfo(str(music_dir))
+        view._metadata_cache["b.mp3"] = ("t", "a", "a", "c")
+        (music_dir / "b.mp3").write_bytes(b"longer contents")
+
+        delta = view.refresh()
+
+        assert delta.modified == ["b.mp3"]
+        assert "b.mp3" not in view._metadata_cache
+
+    def test_refresh_adds_large_batches_at_once(self, music_dir):
+        view = ViewInfo(str(music_dir))
+        names = [f"new{i:03d}.mp3" for i in range(BATCH_ADD_THRESHOLD + 1)]
+        for name in names:
+            (music_dir / name).write_bytes(b"n")
+
+        with patch.object(view, "add_song") as mock_add_song:
+            delta = view.refresh()
+
+        assert delta.added == names
+        mock_add_song.assert_not_called()
+        assert view.canciones == ["a.mp3", "b.mp3", *names]
+
+    def test_refresh_given_songs_only(self, music_dir):
+        view = ViewInfo(str(music_dir))
+        (music_dir / "c.mp3").write_bytes(b"c")
+        (music_dir / "d.mp3").write_bytes(b"d")
+
+        delta = view.refresh(["c.mp3"])
+
+        assert delta.added == ["c.mp3"]
+        assert view.canciones == ["a.mp3", "b.mp3", "c.mp3"]
+
+
+class TestViewInfoRecursive:
+    @pytest.fixture
+    def music_tree(self, tmp_path):
+        (tmp_path / "top.mp3").write_bytes(b"t")
+        (tmp_path / "Album").mkdir()
+        (tmp_path / "Album" / "01.mp3").write_bytes(b"1")
+        cwd = os.getcwd()
+        yield tmp_path
+        os.chdir(cwd)
+
+    def test_recursive_starts_empty(self, music_tree):
+        view = ViewInfo(str(music_tree), recursive=True)
+
+        assert view.canciones == []
+
+    def test_background_scan_streams_songs(self, music_tree):
+        view = ViewInfo(str(music_tree), recursive=True)
+        notified = []
+
+        view.start_background_scan(lambda: notified.append(True)).join()
+        delta = view.take_scanned_songs()
+
+        assert notified
+        assert delta.added == [os.path.join("Album", "01.mp3"), "top.mp3"]
+        assert view.canciones == [os.path.join("Album", "01.mp3"), "top.mp3"]
+        assert not view.take_scanned_songs()
+
+    def test_background_rescan_reports_removed_and_modified(self, music_tree):
+        view = ViewInfo(str(music_tree), recursive=True)
+        view.start_background_scan(lambda: None).join()
+        view.take_scanned_songs()
+        view._metadata_cache["top.mp3"] = ("t", "a", "a", "c")
+        (music_tree / "Album" / "01.mp3").unlink()
+        (music_tree / "top.mp3").write_bytes(b"longer contents")
+        (music_tree / "Album" / "02.mp3").write_bytes(b"2")
+
+        view.start_background_scan(lambda: None).join()
+        delta = view.take_scanned_songs()
+
+        assert delta.added == [os.path.join("Album", "02.mp3")]
+        assert delta.removed == [os.path.join("Album", "01.mp3")]
+        assert delta.modified == ["top.mp3"]
+        assert view.canciones == [os.path.join("Album", "02.mp3"), "top.mp3"]
+        assert "top.mp3" not in view._metadata_cache
+
+    def test_background_scans_never_overlap(self, music_tree):
+        view = ViewInfo(str(music_tree), recursive=True)
+        started = threading.Event()
+        release = threading.Event()
+        walks = 0
+        scan = view._scanner.scan
+
+        def slow_scan(**kwargs):
+            nonlocal walks
+            walks += 1
+            started.set()
+            release.wait()
+            return scan(**kwargs)
+
+        view._scanner.scan = slow_scan
+        first = view.start_background_scan(lambda: None)
+        started.wait()
+        second = view.start_background_scan(lambda: None)
+        third = view.start_background_scan(lambda: None)
+        release.set()
+        first.join()
+
+        assert second is first and third is first
+        assert walks == 2
+        assert view.take_scanned_songs().added == [os.path.join("Album", "01.mp3"), "top.mp3"]
+
+    def test_multiple_roots(self, music_tree, tmp_path_factory):
+        extra = tmp_path_factory.mktemp("extra")
+        (extra / "other.mp3").write_bytes(b"o")
+
+        view = ViewInfo([str(music_tree), str(extra)])
+
+        assert view.get_dir() == str(music_tree)
+        assert view.canciones == [str(extra / "other.mp3"), "top.mp3"]
+
+    def test_add_songs_keeps_order(self, music_tree):
+        view = ViewInfo(str(music_tree))
+        view.add_songs(["a.mp3", "z.mp3"])
+
+        assert view.canciones == ["a.mp3", "top.mp3", "z.mp3"]
+
+
+class TestViewInfoTagIndex:
+    @pytest.fixture
+    def music_dir(self, tmp_path):
+        (tmp_path / "song.mp3").write_bytes(b"not really an mp3")
+        cwd = os.getcwd()
+        yield tmp_path
+        os.chdir(cwd)
+
+    @pytest.fixture
+    def tag_index(self, tmp_path):
+        index = TagIndex(db_path=tmp_path / "index.sqlite3")
+        yield index
+        index.close()
+
+    def test_song_info_populates_index(self, music_dir, tag_index, mock_read_tags):
+        view = ViewInfo(str(music_dir), tag_index=tag_index)
+        view.song_info(0)
+
+        signature = StatSignature.from_stat(os.stat(music_dir / "song.mp3"))
+        cached = tag_index.get(str(music_dir / "song.mp3"), signature)
+        assert cached == ("Title", "Album", "Artist", "Has cover")
+
+    def test_song_info_uses_index_without_opening_file(self, music_dir, tag_index):
+        signature = StatSignature.from_stat(os.stat(music_dir / "song.mp3"))
+        tag_index.put(str(music_dir / "song.mp3"), signature, ("I", "Ind", "Ex", "No Cover"))
+
+        with patch("src.viewInfo.read_tags") as mock_read:
+            view = ViewInfo(str(music_dir), tag_index=tag_index)
+            result = view.song_info(0)
+
+        mock_read.assert_not_called()
+        assert result == ("I", "Ind", "Ex", "No Cover")
+
+    def test_song_info_rereads_changed_file(self, music_dir, tag_index, mock_read_tags):
+        tag_index.put(
+            str(music_dir / "song.mp3"), StatSignature(1, 1, 1), ("Stale", "", "", "No Cover")
+        )
+
+        view = ViewInfo(str(music_dir), tag_index=tag_index)
+        result = view.song_info(0)
+
+        assert result == ("Title", "Album", "Artist", "Has cover")
+
+    def test_invalidate_cache_drops_index_row(self, music_dir, tag_index, mock_read_tags):
+        view = ViewInfo(str(music_dir), tag_index=tag_index)
+        view.song_info(0)
+        view.invalidate_cache("song.mp3")
+
+        signature = StatSignature.from_stat(os.stat(music_dir / "song.mp3"))
+        assert tag_index.get(str(music_dir / "song.mp3"), signature) is None
+
+    def test_cover_location_from_index(self, music_dir, tag_index, mock_read_tags):
+        view = ViewInfo(str(music_dir), tag_index=tag_index)
+        view.song_info(0)
+        mock_read_tags.reset_mock()
+
+        assert view.cover_location("song.mp3") == (10, 100)
+        mock_read_tags.assert_not_called()
+
+    def test_cover_location_reads_file_when_unknown(self, music_dir, tag_index, mock_read_tags):
+        view = ViewInfo(str(music_dir), tag_index=tag_index)
+
+        assert view.cover_location("song.mp3") == (10, 100)
+        signature = StatSignature.from_stat(os.stat(music_dir / "song.mp3"))
+        assert tag_index.get_cover_location(str(music_dir / "song.mp3"), signature) == (10, 100)
+
+    def test_cover_hash_stored_in_index(self, music_dir, tag_index, mock_read_tags):
+        view = ViewInfo(str(music_dir), tag_index=tag_index)
+        view.cover_location("song.mp3")
+
+        digest = view.cover_hash("song.mp3", b"image")
+
+        with patch("src.viewInfo.cover_hash") as mock_hash:
+            assert view.cover_hash("song.mp3", b"image") == digest
+        mock_hash.assert_not_called()